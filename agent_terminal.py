@@ -1,7 +1,9 @@
 import os
 from dotenv import load_dotenv
 from groq import Groq
-from src.agent_core.agent_controller import run_multi_agent
+from src.agent_core.agent_controller import stream_multi_agent
+from src.agent_core.llm_cache import CachedClient, SQLiteBackend
+from src.telemetry import tracer
 
 # ==========================================
 #   CARREGAR VARIÁVEIS DE AMBIENTE (.env)
@@ -13,8 +15,83 @@ API_KEY = os.getenv("GROQ_API_KEY")
 if not API_KEY:
     raise ValueError("❌ ERRO: A variável GROQ_API_KEY não existe. Crie o arquivo .env na raiz do projeto contendo:\nGROQ_API_KEY=SUACHAVEAQUI")
 
-# Criar cliente GROQ
-client = Groq(api_key=API_KEY)
+# Criar cliente GROQ (respostas repetidas vêm do cache em disco)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+
+client = CachedClient(Groq(api_key=API_KEY), backend=SQLiteBackend(LLM_CACHE_PATH), ttl=LLM_CACHE_TTL)
+
+# ==========================================
+#   RENDERIZAÇÃO INCREMENTAL
+# ==========================================
+def render_events(goal: str, events):
+    """
+    Imprime os eventos de `stream_multi_agent` assim que chegam.
+
+    Etapas rodam em paralelo, mas a saída segue a ordem do plano: a etapa
+    em foco é impressa token a token; as seguintes ficam num buffer e são
+    despejadas quando chega a vez delas. As etapas já começam enquanto o
+    plano chega; a saída delas só é impressa depois do plano completo.
+    """
+    print("\n" + "=" * 80)
+    print("🧠 Sistema Multi-Agente (GROQ 2025)")
+    print(f"🎯 Objetivo: {goal}\n")
+
+    plan, buffers, done = [], {}, set()
+    focus, planned = 0, False
+
+    def open_stage(pos):
+        print(f"⚙️ EXECUTANDO: {plan[pos].get('name')}")
+        print("".join(buffers.pop(pos, [])), end="", flush=True)
+
+    def advance():
+        nonlocal focus
+        while focus in done:
+            print("\n")
+            focus += 1
+            if focus < len(plan):
+                open_stage(focus)
+
+    for event in events:
+        kind = event["type"]
+
+        if kind == "plan_stage":
+            if not plan:
+                print("📌 PLANO GERADO:")
+            step = event["stage"]
+            plan.append(step)
+            print(f"- {step.get('id')} — {step.get('name')}: {step.get('description')}")
+
+        elif kind == "plan":
+            plan, planned = event["plan"], True
+            print()
+            open_stage(0)
+            advance()
+
+        elif kind == "delta":
+            if planned and event["index"] == focus:
+                print(event["text"], end="", flush=True)
+            else:
+                buffers.setdefault(event["index"], []).append(event["text"])
+
+        elif kind == "stage_done":
+            done.add(event["index"])
+            if planned:
+                advance()
+
+        elif kind == "critique":
+            print("🔍 CRÍTICO:")
+            for item in event["items"]:
+                print(f"- {item}")
+
+        elif kind == "done":
+            print("\n✅ Execução finalizada.")
+
+        elif kind == "error":
+            print(event["message"])
+
+    print("=" * 80 + "\n")
+
 
 # ==========================================
 #   INTERFACE DO TERMINAL ALIENGBUK
@@ -30,12 +107,18 @@ while True:
         print("👋 Encerrando ALIENGBUK.")
         break
 
-    # Executa o sistema multi-agente
-    try:
-        response = run_multi_agent(goal, client)
-    except Exception as e:
-        response = f"❌ ERRO DURANTE EXECUÇÃO DO AGENTE:\n{e}"
+    # Executa o sistema multi-agente, exibindo cada etapa enquanto é gerada
+    tracer.new_run()
+    render_events(goal, stream_multi_agent(goal, client))
 
-    print("\n" + "=" * 80)
-    print(response)
-    print("=" * 80 + "\n")
+    # Telemetria (AIML_TELEMETRY=1): resumo por etapa/modelo + spans em JSONL
+    if tracer.enabled:
+        for row in tracer.summary()["groups"]:
+            print(
+                f"📊 {row['kind']}/{row['stage'] or '-'} [{row['model']}] "
+                f"{row['calls']}x p50={row['p50_ms']}ms tokens={row['prompt_tokens']}+{row['completion_tokens']} "
+                f"cache={row['cache_hits']}"
+            )
+        if os.getenv("AIML_TELEMETRY_JSONL"):
+            tracer.export_jsonl(os.getenv("AIML_TELEMETRY_JSONL"))
+        print()
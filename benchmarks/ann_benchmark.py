@@ -0,0 +1,119 @@
+"""
+Benchmark dos backends ANN do VectorStore: recall@k vs. índice flat,
+latência p50/p99 por consulta e memória do índice.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.ann_benchmark --n 200000 --dim 384 --k 10
+    python -m benchmarks.ann_benchmark --json resultados.json
+"""
+import argparse
+import json
+import time
+
+import faiss
+import numpy as np
+
+from src.rag_engine.index_factory import index_memory_bytes, make_index, set_search_params, train_index
+
+
+# ================================
+# 🔹 Dados sintéticos
+# ================================
+def synthetic_vectors(n: int, dim: int, clusters: int = 256, seed: int = 0) -> np.ndarray:
+    # Mistura de gaussianas: parecido com embeddings reais, que formam grupos
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=n)
+    vectors = centers[labels] + 0.35 * rng.normal(size=(n, dim)).astype(np.float32)
+    return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+# ================================
+# 🔹 Medições
+# ================================
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def measure(index, queries: np.ndarray, k: int) -> tuple[np.ndarray, list[float]]:
+    latencies, found = [], []
+    for q in queries:
+        start = time.perf_counter()
+        _, ids = index.search(q[None, :], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append(ids[0])
+    return np.array(found), latencies
+
+
+def run_config(name: str, vectors, queries, truth, k: int, metric: str, build_params: dict, search_params: dict) -> dict:
+    start = time.perf_counter()
+    index = make_index(vectors.shape[1], metric=metric, num_vectors=len(vectors), **build_params)
+    train_index(index, vectors)
+    index.add(vectors)
+    build_s = time.perf_counter() - start
+
+    set_search_params(index, **search_params)
+    found, latencies = measure(index, queries, k)
+
+    return {
+        "name": name,
+        **build_params,
+        **search_params,
+        "build_s": round(build_s, 3),
+        "memory_mb": round(index_memory_bytes(index) / 2**20, 2),
+        f"recall@{k}": round(recall_at_k(found, truth), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+    }
+
+
+def default_configs(nprobes: list[int], ef_searches: list[int]) -> list[tuple[str, dict, dict]]:
+    configs = [("flat", {"kind": "flat"}, {})]
+    for nprobe in nprobes:
+        configs.append((f"ivf_flat/nprobe={nprobe}", {"kind": "ivf_flat"}, {"nprobe": nprobe}))
+        configs.append((f"ivf_pq/nprobe={nprobe}", {"kind": "ivf_pq"}, {"nprobe": nprobe}))
+    for ef in ef_searches:
+        configs.append((f"hnsw/ef={ef}", {"kind": "hnsw"}, {"ef_search": ef}))
+    return configs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall/latência/memória dos índices FAISS")
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--metric", choices=["l2", "ip"], default="l2")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 64, 128])
+    parser.add_argument("--json", help="salva os resultados neste arquivo")
+    args = parser.parse_args()
+
+    vectors = synthetic_vectors(args.n + args.queries, args.dim)
+    if args.metric == "ip":
+        faiss.normalize_L2(vectors)
+    vectors, queries = vectors[: args.n], vectors[args.n:]
+
+    # Verdade: busca exata
+    exact = make_index(args.dim, kind="flat", metric=args.metric)
+    exact.add(vectors)
+    _, truth = exact.search(queries, args.k)
+
+    results = []
+    for name, build_params, search_params in default_configs(args.nprobe, args.ef_search):
+        row = run_config(name, vectors, queries, truth, args.k, args.metric, build_params, search_params)
+        results.append(row)
+        print(
+            f"{name:<22} recall@{args.k}={row[f'recall@{args.k}']:.3f} "
+            f"p50={row['p50_ms']:.3f}ms p99={row['p99_ms']:.3f}ms "
+            f"mem={row['memory_mb']:.1f}MB build={row['build_s']:.1f}s"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Backends do embedder (torch, torch-int8, onnx, onnx-int8): paridade com a
+referência torch float32 (cosseno por sentença) e vazão em sentenças/s.
+
+Sai com código 1 se algum backend ficar abaixo de `--min-cosine`, então
+serve também como verificação antes de trocar `RAG_EMBEDDER_BACKEND`.
+Backends sem as dependências instaladas são ignorados (com aviso); sem
+torch + sentence-transformers não há referência e nada é verificado.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.embedder_backends --texts 1000
+    python -m benchmarks.embedder_backends --backends torch onnx-int8 --threads 4 --json backends.json
+"""
+import argparse
+import importlib.util
+import json
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.embedding_service_benchmark import synthetic_texts
+from src.rag_engine.embedder_backends import BACKENDS, load_embedder
+
+
+# Módulos que cada backend importa (os ONNX exportam o modelo com torch no primeiro uso)
+REQUIREMENTS = {
+    "torch": ("torch", "sentence_transformers"),
+    "torch-int8": ("torch", "sentence_transformers"),
+    "onnx": ("torch", "transformers", "onnxruntime"),
+    "onnx-int8": ("torch", "transformers", "onnxruntime"),
+}
+
+
+def missing_modules(backend: str) -> list[str]:
+    return [
+        name for name in REQUIREMENTS[backend]
+        if name not in sys.modules and importlib.util.find_spec(name) is None
+    ]
+
+
+def encode(model, texts: list[str], batch_size: int) -> np.ndarray:
+    return np.asarray(model.encode(texts, batch_size=batch_size, show_progress_bar=False), dtype=np.float32)
+
+
+def cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paridade e vazão dos backends do embedder")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--texts", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    parser.add_argument("--json", help="salva os resultados neste arquivo")
+    args = parser.parse_args()
+
+    if args.threads:
+        try:
+            import torch
+            torch.set_num_threads(args.threads)
+        except ImportError:
+            pass
+
+    missing = missing_modules("torch")
+    if missing:
+        print(f"Referência torch indisponível (falta {', '.join(missing)}): paridade não verificada.")
+        return
+
+    texts = synthetic_texts(args.texts)
+    reference = encode(load_embedder(args.model, "torch"), texts, args.batch_size)
+
+    results, failed = [], []
+    for backend in args.backends:
+        missing = missing_modules(backend)
+        if missing:
+            print(f"{backend:<11} ignorado (falta {', '.join(missing)})")
+            continue
+
+        model = load_embedder(args.model, backend, args.threads)
+        encode(model, texts[:8], args.batch_size)  # carrega os pesos / exporta
+
+        start = time.perf_counter()
+        vectors = encode(model, texts, args.batch_size)
+        rate = len(texts) / (time.perf_counter() - start)
+
+        similarity = cosine(vectors, reference)
+        row = {
+            "backend": backend,
+            "sentences_per_s": round(rate, 1),
+            "cosine_min": round(float(similarity.min()), 4),
+            "cosine_mean": round(float(similarity.mean()), 4),
+        }
+        results.append(row)
+        if row["cosine_min"] < args.min_cosine:
+            failed.append(backend)
+
+    base = results[0]["sentences_per_s"] if results else 1.0
+    for row in results:
+        flag = "  ⚠️" if row["backend"] in failed else ""
+        print(
+            f"{row['backend']:<11} {row['sentences_per_s']:>9.1f} sent/s ({row['sentences_per_s'] / base:.1f}x)"
+            f"  cos min={row['cosine_min']:.4f} média={row['cosine_mean']:.4f}{flag}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+    if failed:
+        print(f"Paridade abaixo de {args.min_cosine}: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
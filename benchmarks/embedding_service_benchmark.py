@@ -0,0 +1,81 @@
+"""
+Vazão de embeddings sob carga concorrente: cada thread pede poucos
+textos por vez, direto no SentenceTransformer vs. via EmbeddingService
+(micro-lotes).
+
+Uso (na raiz do projeto):
+    python -m benchmarks.embedding_service_benchmark --clients 32 --texts 2000
+    python -m benchmarks.embedding_service_benchmark --max-wait-ms 2 10 --json emb.json
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.model_registry import sentence_transformer
+from src.rag_engine.embedding_service import EmbeddingService
+
+
+def synthetic_texts(n: int, seed: int = 0) -> list[str]:
+    rng = np.random.default_rng(seed)
+    words = ["dados", "cliente", "modelo", "contrato", "erro", "sistema", "política", "acesso", "registro", "rede"]
+    return [" ".join(rng.choice(words, rng.integers(5, 120))) for _ in range(n)]
+
+
+def run(encode, texts: list[str], clients: int, per_request: int) -> float:
+    requests = [texts[i:i + per_request] for i in range(0, len(texts), per_request)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        list(pool.map(encode, requests))
+    return len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vazão do serviço de embeddings")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--per-request", type=int, default=1)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, nargs="+", default=[2.0, 5.0])
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--json", help="salva os resultados neste arquivo")
+    args = parser.parse_args()
+
+    model = sentence_transformer(args.model)
+    texts = synthetic_texts(args.texts)
+    model.encode(texts[:8])  # carrega os pesos
+
+    # Sem serviço: cada chamada é um forward próprio (o modelo não é thread-safe)
+    lock = threading.Lock()
+
+    def direct(batch):
+        with lock:
+            return model.encode(batch, show_progress_bar=False)
+
+    results = [{"name": "direct", "texts_per_s": round(run(direct, texts, args.clients, args.per_request), 1)}]
+
+    for wait in args.max_wait_ms:
+        service = EmbeddingService(model, args.max_batch_size, wait, args.threads)
+        rate = run(service.encode, texts, args.clients, args.per_request)
+        results.append({
+            "name": f"service/wait={wait}ms",
+            "texts_per_s": round(rate, 1),
+            "mean_batch": round(service.texts / max(service.batches, 1), 1),
+        })
+        service.close()
+
+    base = results[0]["texts_per_s"]
+    for row in results:
+        print(f"{row['name']:<22} {row['texts_per_s']:>9.1f} textos/s ({row['texts_per_s'] / base:.1f}x)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
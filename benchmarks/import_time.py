@@ -0,0 +1,80 @@
+"""
+Mede o tempo de importação dos módulos do projeto em processos novos e
+aponta quais dependências pesadas cada um puxa já no import.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --repeat 10 --json import_time.json
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+
+MODULES = [
+    "src.agent_core.agent_controller",
+    "src.rag_engine.rag_real",
+    "src.rag_engine.collection",
+    "src.stage3_nlp_llm.nlp_demo",
+    "src.stage5_rag_generative.rag_demo",
+]
+
+HEAVY = ["torch", "transformers", "sentence_transformers", "faiss", "PyPDF2", "groq"]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str, repeat: int) -> dict:
+    samples, heavy, error = [], [], None
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY)],
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            error = proc.stderr.strip().splitlines()[-1] if proc.stderr else "erro"
+            break
+        data = json.loads(proc.stdout.strip().splitlines()[-1])
+        samples.append(data["seconds"])
+        heavy = data["heavy"]
+
+    return {
+        "module": module,
+        "median_s": round(statistics.median(samples), 4) if samples else None,
+        "max_s": round(max(samples), 4) if samples else None,
+        "heavy_imports": heavy,
+        "error": error,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de import dos módulos")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="salva os resultados neste arquivo")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    results = [measure(m, args.repeat) for m in args.modules]
+    for r in results:
+        if r["error"]:
+            print(f"{r['module']:<40} ERRO: {r['error']}")
+        else:
+            heavy = ", ".join(r["heavy_imports"]) or "-"
+            print(f"{r['module']:<40} mediana={r['median_s']:.3f}s pesados: {heavy}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Verificação de remoção por tipo de índice: depois de `VectorStore.remove`,
+cada vetor restante, buscado com ele mesmo, tem que voltar com o próprio
+id (distância ~0) — também depois de salvar e carregar.
+
+Sai com código 1 se algum tipo devolver ids errados. Roda sem modelo
+(vetores sintéticos, embedder trivial).
+
+Uso (na raiz do projeto):
+    python -m benchmarks.index_remove_check
+    python -m benchmarks.index_remove_check --kinds ivf_flat ivf_pq --n 2000
+"""
+import argparse
+import sys
+import tempfile
+
+import numpy as np
+
+from benchmarks.ann_benchmark import synthetic_vectors
+from src.rag_engine.index_factory import INDEX_KINDS, supports_remove
+from src.rag_engine.rag_real import VectorStore
+
+
+class _LookupEmbedder:
+    # "Texto" do chunk é o índice da linha em `vectors`
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+
+    def encode(self, texts, **kwargs) -> np.ndarray:
+        return self.vectors[[int(t) for t in texts]]
+
+
+def check(kind: str, vectors: np.ndarray, removed: list[int], queries: int) -> tuple[str, list[str]]:
+    embedder = _LookupEmbedder(vectors)
+    params = {"pq_m": 8} if kind == "ivf_pq" else {}
+    # nprobe = nlist: a verificação é dos ids, não do recall
+    store = VectorStore(embedder, index_kind=kind, nprobe=1024, retrieval="dense", **params)
+    store.add_stream(str(i) for i in range(len(vectors)))
+    mode = "remove_ids" if supports_remove(store.index) else "reconstrução"
+    store.remove(removed)
+
+    problems = []
+    alive = [i for i in range(len(vectors)) if i not in set(removed)]
+    sample = np.random.default_rng(0).choice(alive, queries, replace=False)
+
+    def verify(label: str, target: VectorStore):
+        hits = target.search_vectors(vectors[sample], top_k=1)
+        wrong = [(int(i), row[0].chunk_id if row else None) for i, row in zip(sample, hits) if not row or row[0].chunk_id != i]
+        if wrong:
+            problems.append(f"{label}: {len(wrong)}/{len(sample)} ids errados (ex.: {wrong[:3]})")
+        found_removed = {h.chunk_id for row in target.search_vectors(vectors[removed], top_k=1) for h in row} & set(removed)
+        if found_removed:
+            problems.append(f"{label}: ids removidos ainda aparecem ({sorted(found_removed)[:3]})")
+
+    verify("após remove", store)
+    with tempfile.TemporaryDirectory() as path:
+        store.save(path)
+        verify("após save/load", VectorStore.load(path, embedder))
+    return mode, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remoção + busca em cada tipo de índice")
+    parser.add_argument("--kinds", nargs="+", choices=INDEX_KINDS, default=list(INDEX_KINDS))
+    parser.add_argument("--n", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=32)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    vectors = synthetic_vectors(args.n, args.dim)
+    # Remoções no começo, no meio e no fim dos ids
+    removed = [0, 5, 6, args.n // 2, args.n - 1]
+
+    failed = []
+    for kind in args.kinds:
+        mode, problems = check(kind, vectors, removed, args.queries)
+        print(f"{kind:<9} ({mode}): {'ok' if not problems else '; '.join(problems)}")
+        if problems:
+            failed.append(kind)
+
+    if failed:
+        print(f"Remoção com ids errados: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""
+Testes de carga offline: sistema multi-agente e RAG contra o
+FakeGroqClient (latência, tokens/s, jitter e erros/429 configuráveis),
+sem chamadas reais à API.
+
+Cenários:
+    single_goal  latência de um objetivo (plano, primeiro token, total)
+    batch        vazão de `run_batch` com RateLimitedClient (retries em 429)
+    rag_ingest   ingestão de um corpus sintético (docs/s, chunks/s)
+    rag_query    QPS de recuperação e de perguntas completas (ask)
+
+Uso (na raiz do projeto):
+    python -m benchmarks.load_test --json results.json
+    python -m benchmarks.load_test --scenarios batch --rate-limit-rate 0.1 --jitter 0.3
+    python -m benchmarks.load_test --json new.json --compare results.json
+
+O embedder padrão é um hashing determinístico (sem torch); use
+`--embedder all-MiniLM-L6-v2` para medir com o modelo real.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.agent_core.agent_controller import stream_multi_agent
+from src.agent_core.batch_runner import goal_id, run_batch
+from src.agent_core.fake_client import FakeGroqClient
+from src.agent_core.rate_limit import RateLimitedClient, RateLimiter
+from src.agent_core.router import Router
+
+SCENARIOS = ("single_goal", "batch", "rag_ingest", "rag_query")
+
+WORDS = [
+    "dados", "cliente", "modelo", "contrato", "erro", "sistema", "política", "acesso", "registro", "rede",
+    "pagamento", "prazo", "servidor", "usuário", "relatório", "auditoria", "backup", "latência", "índice", "consulta",
+]
+
+
+# ================================
+# 🔹 Dados sintéticos
+# ================================
+def synthetic_corpus(docs: int, words_per_doc: int, seed: int = 0) -> list[str]:
+    # Cada documento tem um termo próprio ("docN") para perguntas com resposta conhecida
+    rng = np.random.default_rng(seed)
+    return [f"doc{i} " + " ".join(rng.choice(WORDS, words_per_doc)) for i in range(docs)]
+
+
+def synthetic_questions(n: int, docs: int, seed: int = 1) -> list[str]:
+    rng = np.random.default_rng(seed)
+    return [f"O que diz doc{rng.integers(docs)} sobre {rng.choice(WORDS)}?" for _ in range(n)]
+
+
+class HashEmbedder:
+    """Embedder determinístico de bag-of-words (hashing), sem modelo."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def encode(self, texts, **kwargs) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                out[row, zlib.crc32(word.encode("utf-8")) % self.dim] += 1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.clip(norms, 1e-12, None)
+
+
+# ================================
+# 🔹 Métricas
+# ================================
+def latency_summary(samples: list[float]) -> dict:
+    values = np.asarray(samples) * 1000
+    return {
+        "n": len(samples),
+        "mean_ms": round(float(values.mean()), 1),
+        "p50_ms": round(float(np.percentile(values, 50)), 1),
+        "p95_ms": round(float(np.percentile(values, 95)), 1),
+        "max_ms": round(float(values.max()), 1),
+    }
+
+
+def make_client(args, seed_offset: int = 0) -> FakeGroqClient:
+    return FakeGroqClient(
+        completion_tokens=args.completion_tokens,
+        stages=args.stages,
+        default=(args.latency_ms / 1000, args.tps),
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        stream_chunk_tokens=args.chunk_tokens,
+        seed=args.seed + seed_offset,
+    )
+
+
+# ================================
+# 🔹 Cenários
+# ================================
+def single_goal(args) -> dict:
+    client = make_client(args)
+    plan_s, first_token_s, total_s, errors = [], [], [], 0
+
+    for i in range(args.runs):
+        start = time.perf_counter()
+        first = None
+        for event in stream_multi_agent(f"Objetivo de teste {i}", client, router=Router()):
+            now = time.perf_counter() - start
+            if event["type"] == "plan":
+                plan_s.append(now)
+            elif event["type"] == "delta" and first is None:
+                first = now
+            elif event["type"] == "error":
+                errors += 1
+        if first is not None:
+            first_token_s.append(first)
+        total_s.append(time.perf_counter() - start)
+
+    return {
+        "plan": latency_summary(plan_s) if plan_s else None,
+        "first_token": latency_summary(first_token_s) if first_token_s else None,
+        "total": latency_summary(total_s),
+        "errors": errors,
+        "llm_calls": client.calls,
+    }
+
+
+def batch(args) -> dict:
+    client = make_client(args, 1)
+    limited = RateLimitedClient(client, RateLimiter(rpm=args.rpm, tpm=args.tpm), base_delay=0.05, max_delay=1.0)
+    goals = [{"id": goal_id(f"Objetivo {i}"), "goal": f"Objetivo {i}"} for i in range(args.goals)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stats = run_batch(goals, limited, os.path.join(tmp, "out.jsonl"), workers=args.workers, router=Router())
+
+    return {
+        **stats,
+        "goals_per_s": round(args.goals / stats["elapsed_s"], 2),
+        "llm_calls": client.calls,
+        "injected_429": client.rate_limited,
+        "injected_errors": client.errors,
+        "retries_429": limited.retries,
+        "rate_limit_wait_s": round(limited.limiter.waited_s, 3),
+    }
+
+
+def _collection(args, embedder):
+    from src.rag_engine.chunking import WordChunker
+    from src.rag_engine.collection import DocumentCollection
+    from src.rag_engine.rag_real import VectorStore
+
+    store = VectorStore(embedder, index_kind=args.index_kind, metric="ip")
+    # O chunker padrão usa o tokenizer do modelo real; o hashing fica com janelas de palavras
+    chunker = None if args.embedder else WordChunker(args.chunk_words)
+    return DocumentCollection(store, chunker)
+
+
+def _embedder(args):
+    if args.embedder:
+        from src.rag_engine.embedder_backends import load_embedder
+        return load_embedder(args.embedder, args.backend)
+    return HashEmbedder()
+
+
+def rag_ingest(args, embedder=None) -> tuple[dict, object]:
+    embedder = embedder or _embedder(args)
+    corpus = synthetic_corpus(args.docs, args.doc_words, args.seed)
+    collection = _collection(args, embedder)
+
+    start = time.perf_counter()
+    chunks = sum(collection.add_document(f"doc{i}", text) for i, text in enumerate(corpus))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "docs": args.docs,
+        "chunks": chunks,
+        "elapsed_s": round(elapsed, 3),
+        "docs_per_s": round(args.docs / elapsed, 1),
+        "chunks_per_s": round(chunks / elapsed, 1),
+        "index_kind": args.index_kind,
+    }, collection
+
+
+def rag_query(args, collection=None) -> dict:
+    if collection is None:
+        _, collection = rag_ingest(args)
+    questions = synthetic_questions(args.queries, args.docs, args.seed + 1)
+
+    # Só recuperação, em lotes (uma chamada ao embedder e ao FAISS por lote)
+    start = time.perf_counter()
+    for i in range(0, len(questions), args.query_batch):
+        collection.search_batch(questions[i:i + args.query_batch], top_k=3)
+    retrieval_qps = len(questions) / (time.perf_counter() - start)
+
+    # Pergunta completa (recuperação + resposta do LLM falso) com concorrência
+    client = make_client(args, 2)
+    asks = questions[: args.asks]
+    latencies, errors = [], 0
+
+    def ask(question: str):
+        begin = time.perf_counter()
+        try:
+            collection.ask(question, client, top_k=3)
+        except Exception:
+            return None
+        return time.perf_counter() - begin
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        for latency in pool.map(ask, asks):
+            if latency is None:
+                errors += 1
+            else:
+                latencies.append(latency)
+    ask_elapsed = time.perf_counter() - start
+
+    return {
+        "queries": len(questions),
+        "retrieval_qps": round(retrieval_qps, 1),
+        "asks": len(asks),
+        "ask_qps": round(len(asks) / ask_elapsed, 2),
+        "ask_latency": latency_summary(latencies) if latencies else None,
+        "ask_errors": errors,
+    }
+
+
+# ================================
+# 🔹 Comparação entre execuções
+# ================================
+def _flatten(data: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(old: dict, new: dict):
+    before, after = _flatten(old["scenarios"]), _flatten(new["scenarios"])
+    print(f"\nComparação com {old['meta'].get('commit') or '?'}:")
+    for name in sorted(before.keys() & after.keys()):
+        if before[name]:
+            print(f"  {name:<40} {before[name]:>10} -> {after[name]:>10} ({after[name] / before[name]:.2f}x)")
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Testes de carga offline (FakeGroqClient)")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=0)
+    # Cliente falso
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="latência base (tempo até o primeiro token)")
+    parser.add_argument("--tps", type=float, default=1000.0, help="tokens/s da geração")
+    parser.add_argument("--completion-tokens", type=int, default=200)
+    parser.add_argument("--jitter", type=float, default=0.2, help="sigma log-normal da latência")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=None)
+    parser.add_argument("--chunk-tokens", type=int, default=8, help="tokens por pedaço no streaming")
+    parser.add_argument("--stages", type=int, default=3)
+    # Agente
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--goals", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rpm", type=float, default=100_000)
+    parser.add_argument("--tpm", type=float, default=1e9)
+    # RAG
+    parser.add_argument("--embedder", default=None, help="modelo real (padrão: hashing)")
+    parser.add_argument("--backend", default="torch")
+    parser.add_argument("--index-kind", default="flat")
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--doc-words", type=int, default=1000)
+    parser.add_argument("--chunk-words", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--query-batch", type=int, default=32)
+    parser.add_argument("--asks", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--json", help="salva os resultados neste arquivo")
+    parser.add_argument("--compare", help="JSON de uma execução anterior")
+    args = parser.parse_args()
+
+    scenarios = {}
+    collection = None
+    for name in args.scenarios:
+        start = time.perf_counter()
+        if name == "single_goal":
+            scenarios[name] = single_goal(args)
+        elif name == "batch":
+            scenarios[name] = batch(args)
+        elif name == "rag_ingest":
+            scenarios[name], collection = rag_ingest(args)
+        elif name == "rag_query":
+            scenarios[name] = rag_query(args, collection)
+        print(f"{name:<12} ({time.perf_counter() - start:.1f}s) {json.dumps(scenarios[name], ensure_ascii=False)}")
+
+    result = {
+        "meta": {
+            "commit": _commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "scenarios": scenarios,
+    }
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), result)
+
+
+if __name__ == "__main__":
+    main()
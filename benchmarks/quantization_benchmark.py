@@ -0,0 +1,128 @@
+"""
+Benchmark do armazenamento compacto do VectorStore: memória por vetor,
+recall@k contra a busca exata em float32 e latência, para fp16, sq8 e
+binário (com diferentes fatores de rescoring). Mede também a tabela de
+chunks (dict de str vs. ChunkStore).
+
+Uso (na raiz do projeto):
+    python -m benchmarks.quantization_benchmark --n 100000 --dim 384 --k 10
+    python -m benchmarks.quantization_benchmark --rescore 1 4 16 --json quant.json
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+from benchmarks.ann_benchmark import measure, recall_at_k, synthetic_vectors
+from src.rag_engine.chunk_store import ChunkStore
+from src.rag_engine.index_factory import index_memory_bytes, make_index, train_index
+from src.rag_engine.quantized import BinaryIndex
+
+
+def run_config(name: str, vectors, queries, truth, k: int, metric: str, build_params: dict) -> dict:
+    start = time.perf_counter()
+    index = make_index(vectors.shape[1], metric=metric, num_vectors=len(vectors), **build_params)
+    train_index(index, vectors)
+    index.add(vectors)
+    build_s = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as path:
+        if isinstance(index, BinaryIndex):
+            # Como no VectorStore salvo: vetores de rescoring memory-mapped
+            index.save(path)
+            index = BinaryIndex.load(path, metric, index.rescore_factor)
+
+        found, latencies = measure(index, queries, k)
+        memory = index_memory_bytes(index)
+
+    return {
+        "name": name,
+        **build_params,
+        "build_s": round(build_s, 3),
+        "bytes_per_vector": round(memory / len(vectors), 1),
+        "mb_per_million": round(memory / len(vectors) * 1e6 / 2**20, 1),
+        f"recall@{k}": round(recall_at_k(found, truth), 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+    }
+
+
+def chunk_table(n: int, chars: int = 400) -> dict:
+    """Memória da tabela de chunks: dict de str vs. ChunkStore salvo (mmap)."""
+    rng = np.random.default_rng(0)
+    words = ["".join(rng.choice(list("abcdefghij"), 6)) for _ in range(1000)]
+    texts = [" ".join(rng.choice(words, chars // 7)) for _ in range(n)]
+
+    as_dict = dict(enumerate(texts))
+    dict_bytes = sys.getsizeof(as_dict) + sum(sys.getsizeof(t) + sys.getsizeof(i) for i, t in as_dict.items())
+
+    store = ChunkStore.from_items(as_dict.items())
+    in_memory = store.memory_bytes()
+    with tempfile.TemporaryDirectory() as path:
+        store.save(path)
+        resident = store.memory_bytes()
+        start = time.perf_counter()
+        for i in rng.integers(0, n, 10_000):
+            store[int(i)]
+        lookup_us = (time.perf_counter() - start) / 10_000 * 1e6
+
+    return {
+        "chunks": n,
+        "dict_mb": round(dict_bytes / 2**20, 2),
+        "chunk_store_unsaved_mb": round(in_memory / 2**20, 2),
+        "chunk_store_resident_mb": round(resident / 2**20, 2),
+        "lookup_us": round(lookup_us, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memória/recall do armazenamento quantizado")
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--metric", choices=["l2", "ip"], default="ip")
+    parser.add_argument("--rescore", type=int, nargs="+", default=[1, 4, 10])
+    parser.add_argument("--json", help="salva os resultados neste arquivo")
+    args = parser.parse_args()
+
+    vectors = synthetic_vectors(args.n + args.queries, args.dim)
+    if args.metric == "ip":
+        faiss.normalize_L2(vectors)
+    vectors, queries = vectors[: args.n], vectors[args.n:]
+
+    exact = make_index(args.dim, kind="flat", metric=args.metric)
+    exact.add(vectors)
+    _, truth = exact.search(queries, args.k)
+
+    configs = [("flat", {"kind": "flat"}), ("fp16", {"kind": "fp16"}), ("sq8", {"kind": "sq8"})]
+    configs += [(f"binary/rescore={r}", {"kind": "binary", "rescore_factor": r}) for r in args.rescore]
+
+    results = []
+    for name, build_params in configs:
+        row = run_config(name, vectors, queries, truth, args.k, args.metric, build_params)
+        results.append(row)
+        print(
+            f"{name:<20} recall@{args.k}={row[f'recall@{args.k}']:.3f} "
+            f"{row['bytes_per_vector']:.0f} B/vetor ({row['mb_per_million']:.0f} MB/milhão) "
+            f"p50={row['p50_ms']:.3f}ms"
+        )
+
+    chunks = chunk_table(min(args.n, 200_000))
+    print(
+        f"chunks ({chunks['chunks']}): dict={chunks['dict_mb']}MB "
+        f"ChunkStore={chunks['chunk_store_unsaved_mb']}MB antes de salvar, "
+        f"{chunks['chunk_store_resident_mb']}MB residente depois (lookup {chunks['lookup_us']}µs)"
+    )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results, "chunks": chunks}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
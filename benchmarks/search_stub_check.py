@@ -0,0 +1,166 @@
+"""
+Verificação do SearchClient contra um servidor HTTP local que imita a
+Tavily (/search, JSON) e o DuckDuckGo (/html/, HTML) — sem internet.
+
+Cenários:
+    merge      os dois provedores respondem; resultados intercalados, sem URL repetida
+    cache      a mesma busca de novo não chega ao servidor
+    slow       um provedor estoura o timeout; o outro responde no tempo dele
+    one_fails  um provedor devolve 500; a busca segue com o outro
+    all_fail   todos devolvem 500; SearchError com o erro de cada provedor
+    many       várias consultas em paralelo, cada uma com seus resultados
+
+Sai com código 1 se algum cenário falhar.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.search_stub_check
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from src.tools.search import DuckDuckGoProvider, SearchClient, SearchError, TavilyProvider
+
+
+class _Stub:
+    # Comportamento por provedor: "ok", "slow" ou "error"
+    def __init__(self):
+        self.mode = {"tavily": "ok", "duckduckgo": "ok"}
+        self.hits = {"tavily": 0, "duckduckgo": 0}
+        self.delay = 1.0
+
+
+def _handler(stub: _Stub):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _respond(self, provider: str, content_type: str, body: str):
+            stub.hits[provider] += 1
+            mode = stub.mode[provider]
+            if mode == "slow":
+                time.sleep(stub.delay)
+            status = 500 if mode == "error" else 200
+            data = body.encode() if status == 200 else b"erro do stub"
+            try:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            query = payload["query"]
+            results = [
+                {"title": f"T{i} {query}", "url": f"https://t.example/{query}/{i}", "content": f"tavily {i}"}
+                for i in range(payload["max_results"])
+            ]
+            # Uma URL em comum com o DuckDuckGo, para testar a remoção de repetidos
+            results[-1]["url"] = f"https://shared.example/{query}"
+            self._respond("tavily", "application/json", json.dumps({"results": results}))
+
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)["q"][0]
+            items = [
+                f'<div class="result"><a class="result__a" href="https://d.example/{query}/{i}">D{i} {query}</a>'
+                f'<div class="result__snippet">duckduckgo {i}</div></div>'
+                for i in range(3)
+            ]
+            items.append(
+                f'<div class="result"><a class="result__a" href="https://shared.example/{query}">D shared</a>'
+                f'<div class="result__snippet">duckduckgo shared</div></div>'
+            )
+            self._respond("duckduckgo", "text/html", f"<html><body>{''.join(items)}</body></html>")
+
+    return Handler
+
+
+def _client(base_url: str, timeout: float) -> SearchClient:
+    providers = [
+        TavilyProvider(api_key="stub", base_url=base_url, timeout=timeout),
+        DuckDuckGoProvider(base_url=base_url, timeout=timeout),
+    ]
+    return SearchClient(providers, session=requests.Session())
+
+
+def run_checks(base_url: str, stub: _Stub) -> list[str]:
+    failures = []
+
+    def expect(name: str, ok: bool, detail: str = ""):
+        print(f"{name:<10} {'ok' if ok else 'FALHOU ' + detail}")
+        if not ok:
+            failures.append(name)
+
+    client = _client(base_url, timeout=0.5)
+    results = client.search("merge", max_results=6)
+    urls = [r["url"] for r in results]
+    providers = [r["provider"] for r in results]
+    expect(
+        "merge",
+        len(urls) == len(set(urls)) == 6 and providers[:2] == ["tavily", "duckduckgo"],
+        f"{providers} {urls}",
+    )
+
+    hits = dict(stub.hits)
+    again = client.search("merge", max_results=6)
+    expect("cache", again == results and stub.hits == hits, f"{stub.hits} vs {hits}")
+
+    stub.mode["tavily"] = "slow"
+    start = time.perf_counter()
+    results = _client(base_url, timeout=0.5).search("slow")
+    elapsed = time.perf_counter() - start
+    expect(
+        "slow",
+        elapsed < stub.delay and results and all(r["provider"] == "duckduckgo" for r in results),
+        f"{elapsed:.2f}s, {len(results)} resultados",
+    )
+
+    stub.mode["tavily"] = "error"
+    results = _client(base_url, timeout=0.5).search("one_fails")
+    expect("one_fails", bool(results) and all(r["provider"] == "duckduckgo" for r in results), f"{results}")
+
+    stub.mode["duckduckgo"] = "error"
+    try:
+        _client(base_url, timeout=0.5).search("all_fail")
+        expect("all_fail", False, "nenhuma exceção")
+    except SearchError as e:
+        expect("all_fail", set(e.errors) == {"tavily", "duckduckgo"} and "HTTPError" in str(e), str(e))
+
+    stub.mode = {"tavily": "ok", "duckduckgo": "ok"}
+    queries = [f"q{i}" for i in range(8)]
+    batches = _client(base_url, timeout=0.5).search_many(queries, max_results=3)
+    expect(
+        "many",
+        len(batches) == len(queries) and all(
+            batch and all(f"/{q}" in r["url"] for r in batch) for q, batch in zip(queries, batches)
+        ),
+        f"{[len(b) for b in batches]}",
+    )
+    return failures
+
+
+def main():
+    stub = _Stub()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(stub))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        failures = run_checks(f"http://127.0.0.1:{server.server_address[1]}", stub)
+    finally:
+        server.shutdown()
+
+    if failures:
+        print(f"Cenários com falha: {', '.join(failures)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Vazão do ShardedStore (um processo por shard, índice memory-mapped) para
+diferentes números de shards, com vetores sintéticos. Um shard equivale
+a um VectorStore único em processo separado.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.sharded_benchmark --n 200000 --shards 1 2 4 8
+    python -m benchmarks.sharded_benchmark --kind ivf_flat --json sharded.json
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+from benchmarks.ann_benchmark import synthetic_vectors
+from src.rag_engine.sharded import ShardedStore, build_shards
+
+
+class PrecomputedEmbedder:
+    """Embedder falso: o "texto" de cada chunk é o índice do vetor."""
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+
+    def encode(self, texts):
+        return self.vectors[[int(t) for t in texts]]
+
+
+def throughput(store, queries: np.ndarray, k: int, batch: int) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(queries), batch):
+        store.search_vectors(queries[i:i + batch], k)
+    return len(queries) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vazão da busca em shards")
+    parser.add_argument("--n", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--kind", default="flat")
+    parser.add_argument("--metric", choices=["l2", "ip"], default="ip")
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--json", help="salva os resultados neste arquivo")
+    args = parser.parse_args()
+
+    vectors = synthetic_vectors(args.n + args.queries, args.dim)
+    if args.metric == "ip":
+        faiss.normalize_L2(vectors)
+    vectors, queries = vectors[: args.n], vectors[args.n:]
+    embedder = PrecomputedEmbedder(vectors)
+
+    results = []
+    with tempfile.TemporaryDirectory() as root:
+        for num_shards in args.shards:
+            path = os.path.join(root, f"shards_{num_shards}")
+            start = time.perf_counter()
+            build_shards(
+                path,
+                (str(i) for i in range(args.n)),
+                num_shards,
+                embedder=embedder,
+                batch_size=4096,
+                index_kind=args.kind,
+                metric=args.metric,
+            )
+            build_s = time.perf_counter() - start
+
+            with ShardedStore(path, embedder=embedder) as store:
+                store.search_vectors(queries[: args.batch], args.k)  # aquecimento
+                qps = throughput(store, queries, args.k, args.batch)
+
+            row = {"shards": num_shards, "build_s": round(build_s, 2), "qps": round(qps, 1)}
+            results.append(row)
+            print(f"shards={num_shards:<3} qps={qps:>9.1f} build={build_s:.1f}s")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "cpus": os.cpu_count(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,35 @@
-from typing import List, Dict, Any
-from groq import Groq
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Dict, Any, Iterator, Optional
 import json
+import queue
+import threading
+
+from src.agent_core.router import Budget, Router, default_router, estimate_tokens
+from src.agent_core.scheduler import run_stages, run_stages_stream
+from src.agent_core.structured import (
+    CRITIQUE_SCHEMA,
+    PLAN_SCHEMA,
+    STAGE_SCHEMA,
+    StreamingArrayParser,
+    StructuredOutputError,
+    complete_json,
+    conform,
+)
+from src.agent_core.streaming import iter_deltas
+from src.telemetry import span
+
+if TYPE_CHECKING:
+    from groq import Groq
 
 # =========================================================
 #   ESCOLHA AUTOMÁTICA DO MODELO (MODELOS SUPORTADOS 2025)
 # =========================================================
+# O roteamento fica em router.py: tamanho do prompt, dificuldade estimada,
+# orçamento de latência/custo e estatísticas observadas por modelo.
 
-def choose_model(task: str) -> str:
-    text = (task or "").lower()
-
-    # Palavras que indicam necessidade de raciocínio profundo
-    reasoning_keywords = ["planejar", "analisar", "explicar", "estratégia", "motivo"]
-
-    # Modelo forte atual da Groq
-    if any(x in text for x in reasoning_keywords):
-        return "llama-3.1-70b-versatile"
-
-    # Modelo rápido / padrão
-    return "llama-3.1-8b-instant"
+def choose_model(task: str, budget: Optional[Budget] = None) -> str:
+    return default_router.choose(task or "", stage="choose_model", budget=budget)["model"]
 
 
 # =========================================================
@@ -25,50 +37,122 @@ def choose_model(task: str) -> str:
 # =========================================================
 
 class Planner:
-    def __init__(self, client: Groq):
-        self.client = client
+    EXPECTED_OUTPUT_TOKENS = 300
 
-    def plan(self, goal: str) -> List[Dict[str, Any]]:
-        model = choose_model(goal)
+    def __init__(self, client: Groq, router: Optional[Router] = None, budget: Optional[Budget] = None):
+        self.client = client
+        self.router = router or default_router
+        self.budget = budget
 
+    def _messages(self, goal: str) -> List[Dict[str, str]]:
         prompt = f"""
 Você é um planner especialista. Transforme o objetivo abaixo em 3 etapas claras.
 
 OBJETIVO:
 {goal}
 
+Se uma etapa precisar do resultado de outra, informe os ids em "depends_on".
+Etapas sem dependências podem ser executadas em paralelo.
+
 Responda SOMENTE em JSON:
-[
-  {{"id": 1, "name": "Etapa 1", "description": "..." }},
-  {{"id": 2, "name": "Etapa 2", "description": "..." }},
-  {{"id": 3, "name": "Etapa 3", "description": "..." }}
-]
+{{
+  "etapas": [
+    {{"id": 1, "name": "Etapa 1", "description": "...", "depends_on": [] }},
+    {{"id": 2, "name": "Etapa 2", "description": "...", "depends_on": [] }},
+    {{"id": 3, "name": "Etapa 3", "description": "...", "depends_on": [1, 2] }}
+  ]
+}}
 """
 
-        response = self.client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-        )
-
-        content = (response.choices[0].message.content or "").strip()
+        return [{"role": "user", "content": prompt}]
 
-        try:
-            data = json.loads(content)
-            if isinstance(data, list):
-                return data
-        except:
-            pass
+    def plan(self, goal: str) -> List[Dict[str, Any]]:
+        """
+        Plano validado (JSON mode / schema quando o modelo suporta). Levanta
+        StructuredOutputError se nem o reparo local nem a nova tentativa
+        produzirem um plano válido.
+        """
+        data = complete_json(
+            self.router,
+            self.client,
+            self._messages(goal),
+            PLAN_SCHEMA,
+            stage="planner",
+            budget=self.budget,
+            text=goal,
+            expected_output_tokens=self.EXPECTED_OUTPUT_TOKENS,
+        )
+        return _number_stages(data["etapas"])
+
+    def plan_stream(self, goal: str, cancel: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Gera cada etapa assim que o objeto dela fecha no stream, para o
+        scheduler despachar antes do plano terminar. JSON mode não funciona
+        com streaming, então o formato vem só do prompt.
+
+        Na primeira etapa inválida o despacho para (nada é descartado em
+        silêncio): o stream é lido até o fim e o plano é refeito com UMA
+        chamada corrigida (com schema), como em `plan`. As etapas já
+        despachadas ficam; da resposta corrigida saem só as de id novo.
+        Levanta StructuredOutputError se a correção também falhar.
+        """
+        messages = self._messages(goal)
+        model = self.router.choose(
+            goal,
+            stage="planner",
+            budget=self.budget,
+            expected_output_tokens=self.EXPECTED_OUTPUT_TOKENS,
+            prompt_tokens=estimate_tokens(messages[0]["content"]),
+        )["model"]
+
+        parser = StreamingArrayParser()
+        errors: List[str] = []
+        emitted = set()
+        seen = 0
+
+        start = self.router.clock()
+        with span("llm", stage="planner", model=model, stream=True) as s:
+            stream = self.client.chat.completions.create(model=model, messages=messages, stream=True)
+            for text in iter_deltas(stream, cancel, s):
+                for item in parser.feed(text):
+                    stage, item_errors = conform(item, STAGE_SCHEMA, f"$.etapas[{seen}]")
+                    seen += 1
+                    errors += item_errors
+                    # Depois de um erro o plano vai ser corrigido: só coleta
+                    if errors or parser.errors:
+                        continue
+                    stage.setdefault("id", seen)
+                    emitted.add(stage["id"])
+                    yield stage
+        self.router.record(model, self.router.clock() - start, estimate_tokens(parser.text))
+
+        errors = parser.errors + errors
+        if cancel is not None and cancel.is_set():
+            return
+        if emitted and not errors:
+            return
+
+        # Uma única nova tentativa, mostrando a resposta e os erros
+        data = complete_json(
+            self.router,
+            self.client,
+            messages,
+            PLAN_SCHEMA,
+            stage="planner",
+            previous=(parser.text, errors or ["nenhuma etapa completa na resposta"]),
+            budget=self.budget,
+            text=goal,
+            expected_output_tokens=self.EXPECTED_OUTPUT_TOKENS,
+        )
+        for stage in _number_stages(data["etapas"]):
+            if stage["id"] not in emitted:
+                yield stage
 
-        try:
-            start = content.find("[")
-            end = content.rfind("]") + 1
-            if start != -1 and end > start:
-                data = json.loads(content[start:end])
-                return data
-        except:
-            pass
 
-        return []
+def _number_stages(stages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    for pos, stage in enumerate(stages):
+        stage.setdefault("id", pos + 1)
+    return stages
 
 
 # =========================================================
@@ -76,12 +160,15 @@ Responda SOMENTE em JSON:
 # =========================================================
 
 class Worker:
-    def __init__(self, client: Groq):
-        self.client = client
+    # Tamanho típico da explicação de uma etapa
+    EXPECTED_OUTPUT_TOKENS = 600
 
-    def execute(self, stage: Dict[str, Any]) -> str:
-        model = choose_model(stage.get("description", ""))
+    def __init__(self, client: Groq, router: Optional[Router] = None, budget: Optional[Budget] = None):
+        self.client = client
+        self.router = router or default_router
+        self.budget = budget
 
+    def _messages(self, stage: Dict[str, Any]) -> List[Dict[str, str]]:
         prompt = f"""
 Você é um worker. Execute o estágio abaixo:
 
@@ -91,25 +178,55 @@ DESCRIÇÃO: {stage.get('description')}
 Explique passo a passo o que foi feito.
 """
 
-        response = self.client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
+        return [{"role": "user", "content": prompt}]
+
+    def execute(self, stage: Dict[str, Any]) -> str:
+        response = self.router.complete(
+            self.client,
+            self._messages(stage),
+            stage="worker",
+            budget=self.budget,
+            text=stage.get("description", ""),
+            expected_output_tokens=self.EXPECTED_OUTPUT_TOKENS,
         )
 
         return (response.choices[0].message.content or "").strip()
 
+    def execute_stream(self, stage: Dict[str, Any], cancel: Optional[threading.Event] = None) -> Iterator[str]:
+        messages = self._messages(stage)
+        model = self.router.choose(
+            stage.get("description", ""),
+            stage="worker",
+            budget=self.budget,
+            expected_output_tokens=self.EXPECTED_OUTPUT_TOKENS,
+            prompt_tokens=estimate_tokens(messages[0]["content"]),
+        )["model"]
+
+        # Em streaming não há fallback por prazo: o primeiro token já foi enviado
+        start = self.router.clock()
+        parts = []
+        with span("llm", stage="worker", model=model, stream=True) as s:
+            stream = self.client.chat.completions.create(model=model, messages=messages, stream=True)
+            for text in iter_deltas(stream, cancel, s):
+                parts.append(text)
+                yield text
+        self.router.record(model, self.router.clock() - start, estimate_tokens("".join(parts)))
+
 
 # =========================================================
 #   CRITIC
 # =========================================================
 
 class Critic:
-    def __init__(self, client: Groq):
+    # O crítico sempre pede um modelo de alta qualidade
+    MIN_QUALITY = 0.8
+
+    def __init__(self, client: Groq, router: Optional[Router] = None, budget: Optional[Budget] = None):
         self.client = client
+        self.router = router or default_router
+        self.budget = budget
 
     def review(self, goal: str, plan: List[Dict[str, Any]], results: List[Dict[str, str]]):
-        model = "llama-3.1-70b-versatile"
-
         prompt = f"""
 Você é um crítico. Avalie o planejamento e execução.
 
@@ -132,52 +249,69 @@ Responda em JSON:
 }}
 """
 
-        response = self.client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-        )
-
-        content = (response.choices[0].message.content or "").strip()
-
         try:
-            parsed = json.loads(content)
-            return parsed.get("melhorias", [])
-        except:
-            pass
-
-        lines = [l.strip("-• ").strip() for l in content.split("\n") if l.strip()]
-        return lines[:3]
+            data = complete_json(
+                self.router,
+                self.client,
+                [{"role": "user", "content": prompt}],
+                CRITIQUE_SCHEMA,
+                stage="critic",
+                budget=self.budget,
+                expected_output_tokens=300,
+                min_quality=self.MIN_QUALITY,
+            )
+        except StructuredOutputError as e:
+            # As etapas já rodaram: a falha do crítico não derruba a execução
+            return [f"⚠️ Crítica indisponível ({e})"]
+
+        return data["melhorias"]
 
 
 # =========================================================
 #   ORCHESTRATOR
 # =========================================================
 
-def run_multi_agent(goal: str, groq_client: Groq) -> str:
+def run_multi_agent(
+    goal: str,
+    groq_client: Groq,
+    max_concurrency: int = 4,
+    budget: Optional[Budget] = None,
+    router: Optional[Router] = None,
+    raise_on_plan_error: bool = False,
+) -> str:
+    """
+    Executa o fluxo completo e devolve o log. Plano inválido vira uma
+    mensagem no log, ou StructuredOutputError com `raise_on_plan_error`
+    (execução em lote, para o objetivo ser tentado de novo).
+    """
     log = []
 
     log.append("🧠 Sistema Multi-Agente (GROQ 2025)")
     log.append(f"🎯 Objetivo: {goal}")
     log.append("")
 
-    planner = Planner(groq_client)
-    plan = planner.plan(goal)
-
-    if not plan:
-        return "❌ O planner não conseguiu gerar um plano."
+    planner = Planner(groq_client, router, budget)
+    try:
+        plan = planner.plan(goal)
+    except StructuredOutputError as e:
+        if raise_on_plan_error:
+            raise
+        return f"❌ O planner não conseguiu gerar um plano: {e}"
 
     log.append("📌 PLANO GERADO:")
     for step in plan:
         log.append(f"- {step.get('id')} — {step.get('name')}: {step.get('description')}")
     log.append("")
 
-    worker = Worker(groq_client)
-    critic = Critic(groq_client)
+    worker = Worker(groq_client, router, budget)
+    critic = Critic(groq_client, router, budget)
+
+    # Etapas independentes rodam em paralelo; resultados voltam na ordem do plano
+    outputs = run_stages(plan, worker.execute, max_concurrency=max_concurrency)
 
     results = []
 
-    for stage in plan:
-        output = worker.execute(stage)
+    for stage, output in zip(plan, outputs):
         results.append({"name": stage.get("name"), "output": output})
 
         log.append("⚙️ EXECUTADO:")
@@ -193,3 +327,97 @@ def run_multi_agent(goal: str, groq_client: Groq) -> str:
     log.append("\n✅ Execução finalizada.")
 
     return "\n".join(log)
+
+
+# =========================================================
+#   ORCHESTRATOR (STREAMING)
+# =========================================================
+
+def stream_multi_agent(
+    goal: str,
+    groq_client: Groq,
+    max_concurrency: int = 4,
+    cancel: Optional[threading.Event] = None,
+    budget: Optional[Budget] = None,
+    router: Optional[Router] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Mesmo fluxo de `run_multi_agent`, mas gera eventos à medida que ficam
+    prontos, em vez de devolver o log só no final:
+
+    - {"type": "plan_stage", "index": i, "stage": {...}}  (etapa lida do stream do planner)
+    - {"type": "plan", "plan": [...]}                   (plano completo)
+    - {"type": "stage_start", "index": i, "name": ...}
+    - {"type": "delta", "index": i, "text": ...}     (tokens do worker)
+    - {"type": "stage_done", "index": i, "name": ..., "output": ...}
+    - {"type": "critique", "items": [...]}
+    - {"type": "done"} ou {"type": "error", "message": ...}
+
+    Etapas paralelas intercalam seus deltas; `index` é a posição no plano.
+    Uma etapa começa assim que chega do planner e suas dependências
+    terminaram, então `stage_start`/`delta` podem vir antes de `plan`.
+    Fechar o gerador (ou sinalizar `cancel`) interrompe os streams em curso.
+    """
+    cancel = cancel or threading.Event()
+
+    try:
+        planner = Planner(groq_client, router, budget)
+        worker = Worker(groq_client, router, budget)
+        events: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        positions: Dict[int, int] = {}
+
+        def planned() -> Iterator[Dict[str, Any]]:
+            plan = []
+            for stage in planner.plan_stream(goal, cancel):
+                positions[id(stage)] = len(plan)
+                events.put({"type": "plan_stage", "index": len(plan), "stage": stage})
+                plan.append(stage)
+                yield stage
+            events.put({"type": "plan", "plan": plan})
+
+        def execute(stage: Dict[str, Any]) -> str:
+            pos = positions[id(stage)]
+            events.put({"type": "stage_start", "index": pos, "name": stage.get("name")})
+            parts = []
+            for text in worker.execute_stream(stage, cancel):
+                parts.append(text)
+                events.put({"type": "delta", "index": pos, "text": text})
+            output = "".join(parts).strip()
+            events.put({"type": "stage_done", "index": pos, "name": stage.get("name"), "output": output})
+            return output
+
+        def run():
+            try:
+                plan, outputs = run_stages_stream(planned(), execute, max_concurrency=max_concurrency)
+                events.put({"type": "_finished", "plan": plan, "outputs": outputs})
+            except Exception as e:
+                events.put({"type": "_failed", "error": e})
+
+        threading.Thread(target=run, daemon=True).start()
+
+        while True:
+            event = events.get()
+            if event["type"] == "_failed":
+                raise event["error"]
+            if event["type"] == "_finished":
+                plan, outputs = event["plan"], event["outputs"]
+                break
+            yield event
+
+        if cancel.is_set():
+            return
+
+        results = [{"name": stage.get("name"), "output": output} for stage, output in zip(plan, outputs)]
+        feedback = Critic(groq_client, router, budget).review(goal, plan, results)
+        yield {"type": "critique", "items": feedback}
+        yield {"type": "done"}
+
+    except StructuredOutputError as e:
+        yield {"type": "error", "message": f"❌ O planner não conseguiu gerar um plano: {e}"}
+
+    except Exception as e:
+        yield {"type": "error", "message": f"❌ ERRO DURANTE EXECUÇÃO DO AGENTE:\n{e}"}
+
+    finally:
+        # Consumidor saiu antes do fim: interrompe os workers em andamento
+        cancel.set()
@@ -0,0 +1,201 @@
+"""
+Executa `run_multi_agent` sobre uma fila de objetivos (JSONL ou stdin).
+
+Uso (na raiz do projeto):
+    python -m src.agent_core.batch_runner goals.jsonl -o results.jsonl --rpm 30 --tpm 6000
+    cat goals.txt | python -m src.agent_core.batch_runner - -o results.jsonl
+
+Cada linha de entrada é um objeto `{"id": ..., "goal": ...}` ou o texto
+do objetivo; linhas inválidas são avisadas no stderr e puladas. O arquivo de saída também é o checkpoint: ao rodar de novo,
+objetivos já concluídos com sucesso são pulados.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, Optional, Set, TextIO
+
+from src.agent_core.agent_controller import run_multi_agent
+from src.agent_core.router import Budget, Router
+
+
+# =========================================================
+#   ENTRADA E CHECKPOINT
+# =========================================================
+
+def goal_id(goal: str) -> str:
+    # Estável entre execuções mesmo se a ordem da fila mudar
+    return hashlib.sha256(goal.encode("utf-8")).hexdigest()[:12]
+
+
+def iter_goals(lines: Iterable[str], log: Optional[TextIO] = None) -> Iterator[Dict[str, str]]:
+    """
+    Objetivos da fila. Linhas com JSON inválido ou sem "goal" são puladas
+    (e avisadas em `log`) para não derrubar o lote inteiro.
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line) if line.startswith("{") else {"goal": line}
+        except json.JSONDecodeError as e:
+            if log is not None:
+                print(f"[invalid] linha {number}: JSON inválido ({e.msg})", file=log, flush=True)
+            continue
+        goal = item.get("goal")
+        if not goal:
+            if log is not None:
+                print(f"[invalid] linha {number}: sem \"goal\"", file=log, flush=True)
+            continue
+        yield {"id": str(item.get("id") or goal_id(goal)), "goal": goal}
+
+
+def completed_ids(path: str) -> Set[str]:
+    """IDs já concluídos com sucesso no arquivo de resultados."""
+    if not os.path.exists(path):
+        return set()
+
+    done = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Linha truncada por uma execução interrompida
+                continue
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+
+# =========================================================
+#   EXECUÇÃO EM LOTE
+# =========================================================
+
+def run_batch(
+    goals: Iterable[Dict[str, str]],
+    client,
+    output_path: str,
+    workers: int = 4,
+    max_concurrency: int = 4,
+    budget: Optional[Budget] = None,
+    router: Optional[Router] = None,
+    progress: Optional[TextIO] = None,
+) -> Dict[str, Any]:
+    """
+    Roda os objetivos num pool compartilhado de `workers` threads (cada
+    objetivo ainda paraleliza suas etapas com `max_concurrency`). O ritmo
+    real é ditado pelo cliente — use `RateLimitedClient` para respeitar
+    as cotas do provedor.
+
+    Resultados são gravados em `output_path` assim que cada objetivo termina.
+    """
+    done = completed_ids(output_path)
+    stats = {"ok": 0, "error": 0, "skipped": 0}
+    started = time.perf_counter()
+
+    def execute(item: Dict[str, str]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            # Plano inválido levanta exceção: fica como "error" e volta na próxima execução
+            output = run_multi_agent(
+                item["goal"],
+                client,
+                max_concurrency=max_concurrency,
+                budget=budget,
+                router=router,
+                raise_on_plan_error=True,
+            )
+            record = {"status": "ok", "output": output}
+        except Exception as e:
+            record = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+        return {"id": item["id"], "goal": item["goal"], **record, "elapsed_s": round(time.perf_counter() - start, 3)}
+
+    with open(output_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=workers) as pool:
+
+        def collect(futures):
+            for future in futures:
+                record = future.result()
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                stats[record["status"]] += 1
+                if progress is not None:
+                    print(f"[{record['status']}] {record['id']} ({record['elapsed_s']}s)", file=progress, flush=True)
+
+        # Janela limitada: a fila pode ter milhares de objetivos
+        pending = set()
+        for item in goals:
+            if item["id"] in done:
+                stats["skipped"] += 1
+                continue
+            done.add(item["id"])
+            pending.add(pool.submit(execute, item))
+            if len(pending) >= workers * 2:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+
+        finished, _ = wait(pending)
+        collect(finished)
+
+    stats["elapsed_s"] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+# =========================================================
+#   CLI
+# =========================================================
+
+def main():
+    from dotenv import load_dotenv
+    from groq import Groq
+
+    from src.agent_core.llm_cache import CachedClient, SQLiteBackend
+    from src.agent_core.rate_limit import RateLimitedClient, RateLimiter
+
+    parser = argparse.ArgumentParser(description="Executa objetivos em lote com o sistema multi-agente")
+    parser.add_argument("input", help="arquivo JSONL de objetivos ou '-' para stdin")
+    parser.add_argument("-o", "--output", required=True, help="resultados em JSONL (também serve de checkpoint)")
+    parser.add_argument("--workers", type=int, default=4, help="objetivos em paralelo")
+    parser.add_argument("--max-concurrency", type=int, default=4, help="etapas em paralelo por objetivo")
+    parser.add_argument("--rpm", type=float, default=float(os.getenv("GROQ_RPM", "30")))
+    parser.add_argument("--tpm", type=float, default=float(os.getenv("GROQ_TPM", "6000")))
+    parser.add_argument("--max-retries", type=int, default=5)
+    args = parser.parse_args()
+
+    load_dotenv()
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise ValueError("❌ ERRO: A variável GROQ_API_KEY não existe.")
+
+    limited = RateLimitedClient(Groq(api_key=api_key), RateLimiter(rpm=args.rpm, tpm=args.tpm), max_retries=args.max_retries)
+    client = CachedClient(
+        limited,
+        backend=SQLiteBackend(os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite")),
+        ttl=float(os.getenv("LLM_CACHE_TTL", "86400")),
+    )
+
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    try:
+        stats = run_batch(
+            iter_goals(source, log=sys.stderr),
+            client,
+            args.output,
+            workers=args.workers,
+            max_concurrency=args.max_concurrency,
+            progress=sys.stderr,
+        )
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    stats["retries_429"] = limited.retries
+    stats["rate_limit_wait_s"] = round(limited.limiter.waited_s, 3)
+    print(json.dumps(stats, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
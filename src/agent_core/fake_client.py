@@ -0,0 +1,180 @@
+import json
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, Iterator, Optional, Tuple
+
+
+# =========================================================
+#   CLIENTE GROQ FALSO (OFFLINE)
+# =========================================================
+
+class FakeTimeoutError(TimeoutError):
+    pass
+
+
+class FakeAPIError(Exception):
+    """Erro injetado; `status_code` 429 é tratado como rate limit."""
+
+    def __init__(self, message: str, status_code: int = 500, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        self.response = SimpleNamespace(status_code=status_code, headers=headers)
+
+
+class VirtualClock:
+    """Relógio simulado: o cliente falso avança o tempo sem dormir."""
+
+    def __init__(self):
+        self.now = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        with self._lock:
+            self.now += seconds
+
+
+class FakeGroqClient:
+    """
+    Imita `client.chat.completions.create` sem rede.
+
+    `models` mapeia nome -> (latência base em s, tokens/s). A latência de
+    cada chamada é base + completion_tokens / tokens_por_s. Com `clock`
+    (VirtualClock) o tempo é só contabilizado; sem ele, a chamada dorme.
+
+    Respostas são determinísticas: um plano JSON para o planner, uma
+    crítica JSON para o crítico e texto para o resto. O papel é lido da
+    mensagem system (ou da primeira), então novas tentativas de correção
+    recebem o mesmo formato.
+
+    Para testes de carga:
+    - `default`: (base, tokens/s) dos modelos fora de `models`
+    - `jitter`: sigma de um fator log-normal aplicado à latência (0 = fixa)
+    - `error_rate` / `rate_limit_rate`: fração das chamadas que falham com
+      `FakeAPIError` 500 / 429 (com `retry_after` no cabeçalho)
+    - `stream_chunk_tokens`: com stream=True, o texto sai em pedaços desse
+      tamanho; a base é o tempo até o primeiro token e o resto é dividido
+      entre os pedaços
+    A sequência de sorteios é fixada por `seed`.
+    """
+
+    def __init__(
+        self,
+        models: Optional[Dict[str, Tuple[float, float]]] = None,
+        completion_tokens: int = 200,
+        clock: Optional[VirtualClock] = None,
+        stages: int = 3,
+        default: Tuple[float, float] = (0.0, float("inf")),
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: Optional[float] = None,
+        stream_chunk_tokens: int = 0,
+        seed: int = 0,
+    ):
+        self.models = models or {}
+        self.completion_tokens = completion_tokens
+        self.clock = clock
+        self.stages = stages
+        self.default = default
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.stream_chunk_tokens = stream_chunk_tokens
+        self.calls = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def latency(self, model: str, completion_tokens: int) -> float:
+        base, tokens_per_s = self.models.get(model, self.default)
+        return base + completion_tokens / tokens_per_s
+
+    def _draw(self) -> Tuple[float, float]:
+        # (fator de latência, sorteio de erro) numa única seção crítica
+        with self._lock:
+            self.calls += 1
+            factor = self._rng.lognormvariate(0.0, self.jitter) if self.jitter else 1.0
+            return factor, self._rng.random()
+
+    def _wait(self, seconds: float):
+        if self.clock is not None:
+            self.clock.advance(seconds)
+        elif seconds > 0:
+            time.sleep(seconds)
+
+    def content_for(self, prompt: str) -> str:
+        if "planner" in prompt:
+            return json.dumps({"etapas": [
+                {"id": i, "name": f"Etapa {i}", "description": f"Executar a parte {i} do objetivo", "depends_on": []}
+                for i in range(1, self.stages + 1)
+            ]}, ensure_ascii=False)
+        if "crítico" in prompt:
+            return json.dumps({"melhorias": ["Melhoria 1", "Melhoria 2", "Melhoria 3"]}, ensure_ascii=False)
+        return " ".join(["resposta"] * self.completion_tokens)
+
+    def create(self, model: str, messages, timeout: Optional[float] = None, stream: bool = False, **kwargs):
+        factor, roll = self._draw()
+
+        if roll < self.rate_limit_rate:
+            with self._lock:
+                self.rate_limited += 1
+            raise FakeAPIError(f"{model}: rate limit", status_code=429, retry_after=self.retry_after)
+        if roll < self.rate_limit_rate + self.error_rate:
+            with self._lock:
+                self.errors += 1
+            raise FakeAPIError(f"{model}: erro interno", status_code=500)
+
+        # O papel (planner, worker, crítico) vem do system ou da primeira mensagem:
+        # numa nova tentativa de correção a última é o pedido de conserto
+        role = next((m for m in messages if m["role"] == "system"), messages[0])["content"]
+        prompt = "\n".join(m["content"] for m in messages)
+        latency = self.latency(model, self.completion_tokens) * factor
+
+        if timeout is not None and latency > timeout:
+            self._wait(timeout)
+            raise FakeTimeoutError(f"{model} excedeu {timeout:.2f}s")
+
+        content = self.content_for(role)
+        usage = SimpleNamespace(
+            prompt_tokens=len(prompt) // 4 + 1,
+            completion_tokens=self.completion_tokens,
+            total_tokens=len(prompt) // 4 + 1 + self.completion_tokens,
+        )
+
+        if stream and self.stream_chunk_tokens:
+            base = self.models.get(model, self.default)[0] * factor
+            return self._stream(content, usage, base, latency - base)
+
+        self._wait(latency)
+
+        if stream:
+            return iter([
+                SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))]),
+                SimpleNamespace(choices=[], x_groq=SimpleNamespace(usage=usage)),
+            ])
+
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(index=0, message=SimpleNamespace(role="assistant", content=content), finish_reason="stop")],
+            usage=usage,
+        )
+
+    def _stream(self, content: str, usage, first_token_s: float, generation_s: float) -> Iterator[SimpleNamespace]:
+        words = content.split(" ")
+        pieces = [" ".join(words[i:i + self.stream_chunk_tokens]) for i in range(0, len(words), self.stream_chunk_tokens)]
+        self._wait(first_token_s)
+        for i, piece in enumerate(pieces):
+            if i:
+                self._wait(generation_s / max(len(pieces) - 1, 1))
+            text = piece if i == 0 else " " + piece
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+        yield SimpleNamespace(choices=[], x_groq=SimpleNamespace(usage=usage))
@@ -0,0 +1,257 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, Optional
+
+
+# =========================================================
+#   CHAVE DO CACHE
+# =========================================================
+
+# Parâmetros que não mudam a resposta do modelo
+_IGNORED_PARAMS = {"stream", "timeout", "extra_headers"}
+
+
+def cache_key(params: Dict[str, Any]) -> str:
+    """sha256 de (model, messages, temperature, ...) em JSON canônico."""
+    relevant = {k: v for k, v in params.items() if k not in _IGNORED_PARAMS and v is not None}
+    payload = json.dumps(relevant, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# =========================================================
+#   SERIALIZAÇÃO DA RESPOSTA
+# =========================================================
+
+def _usage_record(usage) -> Dict[str, int]:
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0),
+        "completion_tokens": getattr(usage, "completion_tokens", 0),
+        "total_tokens": getattr(usage, "total_tokens", 0),
+    }
+
+
+def to_record(response) -> Dict[str, Any]:
+    choice = response.choices[0]
+    return {
+        "model": getattr(response, "model", None),
+        "content": choice.message.content,
+        "finish_reason": getattr(choice, "finish_reason", None),
+        "usage": _usage_record(getattr(response, "usage", None)),
+    }
+
+
+def from_record(record: Dict[str, Any]):
+    # Mesmo formato de acesso do SDK: response.choices[0].message.content
+    return SimpleNamespace(
+        model=record["model"],
+        cached=True,
+        choices=[
+            SimpleNamespace(
+                index=0,
+                message=SimpleNamespace(role="assistant", content=record["content"]),
+                finish_reason=record["finish_reason"],
+            )
+        ],
+        usage=SimpleNamespace(**record["usage"]),
+    )
+
+
+def stream_from_record(record: Dict[str, Any]) -> Iterator[SimpleNamespace]:
+    # Acerto numa chamada com stream=True: o texto inteiro num único chunk
+    yield SimpleNamespace(
+        model=record["model"],
+        cached=True,
+        choices=[
+            SimpleNamespace(
+                index=0,
+                delta=SimpleNamespace(role="assistant", content=record["content"]),
+                finish_reason=record["finish_reason"],
+            )
+        ],
+    )
+    yield SimpleNamespace(choices=[], x_groq=SimpleNamespace(usage=SimpleNamespace(**record["usage"])))
+
+
+# =========================================================
+#   BACKENDS
+# =========================================================
+
+class MemoryBackend:
+    """LRU em memória com TTL por entrada."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            record, expires_at = item
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return record
+
+    def set(self, key: str, record: Dict[str, Any], ttl: Optional[float]):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (record, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+class SQLiteBackend:
+    """Cache em disco (SQLite), compartilhado entre execuções e processos."""
+
+    def __init__(self, path: str, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                " key TEXT PRIMARY KEY, record TEXT NOT NULL,"
+                " expires_at REAL, last_used REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT record, expires_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] < now:
+                self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE completions SET last_used = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, record: Dict[str, Any], ttl: Optional[float]):
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?)",
+                (key, json.dumps(record, ensure_ascii=False), expires_at, now),
+            )
+            # Remove as entradas menos usadas além do limite
+            self._conn.execute(
+                "DELETE FROM completions WHERE key IN ("
+                " SELECT key FROM completions ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+
+# =========================================================
+#   CLIENTE COM CACHE + SINGLE-FLIGHT
+# =========================================================
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.record = None
+        self.error = None
+
+
+class CachedClient:
+    """
+    Envolve um cliente Groq (ou qualquer objeto com
+    `chat.completions.create`) adicionando cache de respostas e
+    coalescência de chamadas idênticas simultâneas: só uma vai à API,
+    as demais esperam e reaproveitam o resultado.
+
+    Com `stream=True` a resposta é gravada quando o stream termina (stream
+    interrompido não entra no cache) e um acerto volta como stream de um
+    único chunk. Streams idênticos simultâneos não são coalescidos.
+    """
+
+    def __init__(self, client, backend=None, ttl: Optional[float] = 3600.0):
+        self.client = client
+        self.backend = backend or MemoryBackend()
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._inflight: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def create(self, **kwargs):
+        key = cache_key(kwargs)
+        record = self.backend.get(key)
+        if record is not None:
+            self.hits += 1
+            return stream_from_record(record) if kwargs.get("stream") else from_record(record)
+
+        if kwargs.get("stream"):
+            self.misses += 1
+            return self._record_stream(key, self.client.chat.completions.create(**kwargs))
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            self.hits += 1
+            return from_record(flight.record)
+
+        self.misses += 1
+        try:
+            response = self.client.chat.completions.create(**kwargs)
+            flight.record = to_record(response)
+            self.backend.set(key, flight.record, self.ttl)
+            return response
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def _record_stream(self, key: str, stream) -> Iterator[Any]:
+        parts, record = [], {"model": None, "finish_reason": None, "usage": _usage_record(None)}
+        try:
+            for chunk in stream:
+                record["model"] = getattr(chunk, "model", None) or record["model"]
+                # Groq manda o uso em chunk.x_groq.usage; OpenAI em chunk.usage
+                usage_holder = getattr(chunk, "x_groq", None) or chunk
+                if getattr(usage_holder, "usage", None) is not None:
+                    record["usage"] = _usage_record(usage_holder.usage)
+                if chunk.choices:
+                    choice = chunk.choices[0]
+                    if choice.delta.content:
+                        parts.append(choice.delta.content)
+                    record["finish_reason"] = getattr(choice, "finish_reason", None) or record["finish_reason"]
+                yield chunk
+
+            # Só chega aqui se o stream foi consumido até o fim
+            record["content"] = "".join(parts)
+            self.backend.set(key, record, self.ttl)
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
@@ -1,22 +1,17 @@
 ﻿from groq import Groq
 
+from src.agent_core.router import LEGACY_GROQ_MODELS, Router
+
 # ==========================================
 #   CONFIG GROQ – MODELO HÍBRIDO
 # ==========================================
 
-def choose_model(task: str) -> str:
-    task = task.lower()
-
-    # Tarefas que precisam de raciocínio complexo
-    if any(x in task for x in ["planejar", "analisar", "explicar", "estratégia", "motivo"]):
-        return "llama3-70b-8192"
+# Mesmo roteador adaptativo do agent_controller, com os modelos desta versão
+router = Router(LEGACY_GROQ_MODELS)
 
-    # Tarefas longas (RAG, documentos, resumos)
-    if any(x in task for x in ["documento", "texto", "resumo", "rag"]):
-        return "mixtral-8x7b-32768"
 
-    # Padrão (rápido)
-    return "mixtral-8x7b-32768"
+def choose_model(task: str) -> str:
+    return router.choose(task or "", stage="choose_model")["model"]
 
 
 # ==========================================
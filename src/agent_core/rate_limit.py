@@ -0,0 +1,158 @@
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import Callable, Optional
+
+from src.agent_core.router import estimate_tokens
+
+
+# =========================================================
+#   TOKEN BUCKET
+# =========================================================
+
+class TokenBucket:
+    """
+    Balde de fichas com reabastecimento contínuo (`rate_per_min` por minuto).
+
+    `reserve` debita na hora (o saldo pode ficar negativo) e devolve quanto
+    o chamador deve esperar: quem chega primeiro sai primeiro, sem disputa
+    entre threads acordando ao mesmo tempo.
+    """
+
+    def __init__(self, rate_per_min: float, capacity: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        if rate_per_min <= 0:
+            raise ValueError("rate_per_min precisa ser positivo.")
+        self.rate = rate_per_min / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_min
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float = 1.0) -> float:
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+            return max(0.0, -self.tokens / self.rate)
+
+    def refund(self, amount: float):
+        # amount negativo cobra a diferença (uso real acima do estimado)
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """Cotas do provedor: requisições por minuto (RPM) e tokens por minuto (TPM)."""
+
+    def __init__(
+        self,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.requests = TokenBucket(rpm, clock=clock) if rpm else None
+        self.tokens = TokenBucket(tpm, clock=clock) if tpm else None
+        self.sleep = sleep
+        self.waited_s = 0.0
+
+    def acquire(self, tokens: int) -> float:
+        wait = 0.0
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.reserve(tokens))
+        if wait > 0:
+            self.waited_s += wait
+            self.sleep(wait)
+        return wait
+
+    def settle(self, estimated: int, actual: int):
+        if self.tokens is not None and actual:
+            self.tokens.refund(estimated - actual)
+
+
+# =========================================================
+#   CLIENTE COM LIMITE E RETRY EM 429
+# =========================================================
+
+def _is_rate_limited(error: Exception) -> bool:
+    # groq.RateLimitError tem status_code 429
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimitedClient:
+    """
+    Envolve um cliente com `chat.completions.create`: cada chamada espera
+    a vez no `RateLimiter` e, ao receber 429, tenta de novo com backoff
+    exponencial (com jitter, respeitando `retry-after` quando vier).
+
+    Deve ficar por baixo do `CachedClient`, para respostas em cache não
+    gastarem cota.
+    """
+
+    def __init__(
+        self,
+        client,
+        limiter: RateLimiter,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        default_output_tokens: int = 600,
+    ):
+        self.client = client
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.default_output_tokens = default_output_tokens
+        self.retries = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def _estimate(self, kwargs) -> int:
+        prompt = sum(estimate_tokens(m.get("content") or "") for m in kwargs.get("messages", []))
+        return prompt + (kwargs.get("max_tokens") or self.default_output_tokens)
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt) * (0.5 + random.random() / 2)
+        return max(delay, _retry_after(error) or 0.0)
+
+    def create(self, **kwargs):
+        estimated = self._estimate(kwargs)
+
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(estimated)
+            try:
+                response = self.client.chat.completions.create(**kwargs)
+            except Exception as e:
+                if not _is_rate_limited(e) or attempt == self.max_retries:
+                    raise
+                with self._lock:
+                    self.retries += 1
+                self.limiter.sleep(self._backoff(attempt, e))
+                continue
+
+            # Streams não trazem usage aqui; fica valendo a estimativa
+            usage = getattr(response, "usage", None)
+            self.limiter.settle(estimated, getattr(usage, "total_tokens", 0) or 0)
+            return response
@@ -0,0 +1,347 @@
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from src.agent_core.structured import response_format
+from src.telemetry import span
+
+
+# =========================================================
+#   PERFIS DOS MODELOS
+# =========================================================
+
+class ModelProfile(NamedTuple):
+    name: str
+    base_latency_s: float      # latência até o primeiro token
+    tokens_per_s: float        # velocidade de geração
+    cost_in_per_m: float       # US$ por 1M tokens de entrada
+    cost_out_per_m: float      # US$ por 1M tokens de saída
+    context_window: int
+    quality: float             # 0..1, prior de qualidade
+    structured_output: str = "json_object"   # json_schema | json_object | none
+
+
+GROQ_MODELS = [
+    ModelProfile("llama-3.1-8b-instant", 0.25, 750.0, 0.05, 0.08, 131_072, 0.60),
+    ModelProfile("llama-3.1-70b-versatile", 0.50, 250.0, 0.59, 0.79, 131_072, 0.85),
+]
+
+# Modelos usados por multi_agent_system.py (versão híbrida)
+LEGACY_GROQ_MODELS = [
+    ModelProfile("mixtral-8x7b-32768", 0.30, 480.0, 0.24, 0.24, 32_768, 0.65),
+    ModelProfile("llama3-70b-8192", 0.50, 280.0, 0.59, 0.79, 8_192, 0.85),
+]
+
+
+class Budget(NamedTuple):
+    latency_s: Optional[float] = None
+    cost_usd: Optional[float] = None
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 caracteres por token em inglês/português
+    return len(text) // 4 + 1
+
+
+# Palavras que sugerem raciocínio mais profundo (sinal fraco, combinado com tamanho)
+REASONING_HINTS = ("planejar", "analisar", "explicar", "estratégia", "motivo", "analyze", "explain", "plan")
+
+
+def estimate_difficulty(text: str) -> float:
+    text = (text or "").lower()
+    length_score = min(1.0, estimate_tokens(text) / 1500)
+    hint_score = min(1.0, sum(h in text for h in REASONING_HINTS) / 3)
+    return round(0.6 * length_score + 0.4 * hint_score, 3)
+
+
+# =========================================================
+#   ESTATÍSTICAS ONLINE (EWMA)
+# =========================================================
+
+class ModelStats:
+    def __init__(self, profile: ModelProfile, alpha: float = 0.2):
+        self.alpha = alpha
+        self.base_latency_s = profile.base_latency_s
+        self.tokens_per_s = profile.tokens_per_s
+        self.quality = profile.quality
+        self.calls = 0
+        self.timeouts = 0
+
+    def _ewma(self, old: float, new: float) -> float:
+        return (1 - self.alpha) * old + self.alpha * new
+
+    def record(self, latency_s: float, completion_tokens: int, ok: bool = True, quality: Optional[float] = None):
+        self.calls += 1
+        if not ok:
+            self.timeouts += 1
+            # Penaliza a latência esperada para o próximo roteamento
+            self.base_latency_s = self._ewma(self.base_latency_s, latency_s)
+            return
+
+        generation_s = latency_s - self.base_latency_s
+        if completion_tokens > 0 and generation_s > 0:
+            self.tokens_per_s = self._ewma(self.tokens_per_s, completion_tokens / generation_s)
+        else:
+            self.base_latency_s = self._ewma(self.base_latency_s, latency_s)
+        if quality is not None:
+            self.quality = self._ewma(self.quality, quality)
+
+    def expected_latency(self, output_tokens: int) -> float:
+        return self.base_latency_s + output_tokens / max(self.tokens_per_s, 1e-6)
+
+
+# =========================================================
+#   ROTEADOR
+# =========================================================
+
+class Router:
+    """
+    Escolhe o modelo por requisição a partir de:
+    - tamanho estimado do prompt e da resposta (latência e custo previstos),
+    - orçamento de latência/custo (`Budget`),
+    - qualidade mínima derivada da dificuldade estimada,
+    - estatísticas observadas por modelo (EWMA), atualizadas a cada chamada.
+
+    Entre os modelos que cabem no orçamento e atingem a qualidade mínima,
+    fica com o mais rápido; se nenhum atinge, com o de maior qualidade.
+    Se a chamada estoura o prazo, repete uma vez no modelo mais rápido.
+    Toda decisão vai para `decisions` (exportável em JSONL para replay).
+    """
+
+    def __init__(
+        self,
+        models: List[ModelProfile] = GROQ_MODELS,
+        clock: Callable[[], float] = time.perf_counter,
+        deadline_factor: float = 1.5,
+        max_decisions: int = 10_000,
+    ):
+        self.profiles = {m.name: m for m in models}
+        self.stats = {m.name: ModelStats(m) for m in models}
+        self.clock = clock
+        self.deadline_factor = deadline_factor
+        self.decisions: deque = deque(maxlen=max_decisions)
+        self._lock = threading.Lock()
+
+    # ---------- escolha ----------
+
+    def _estimate(self, name: str, prompt_tokens: int, output_tokens: int) -> Dict[str, float]:
+        profile, stats = self.profiles[name], self.stats[name]
+        return {
+            "latency_s": round(stats.expected_latency(output_tokens), 4),
+            "cost_usd": (prompt_tokens * profile.cost_in_per_m + output_tokens * profile.cost_out_per_m) / 1e6,
+            "quality": round(stats.quality, 4),
+        }
+
+    def fastest(self, exclude: Optional[str] = None, output_tokens: int = 400) -> str:
+        names = [n for n in self.profiles if n != exclude] or list(self.profiles)
+        return min(names, key=lambda n: self.stats[n].expected_latency(output_tokens))
+
+    def choose(
+        self,
+        text: str,
+        stage: str = "default",
+        budget: Optional[Budget] = None,
+        expected_output_tokens: int = 400,
+        min_quality: Optional[float] = None,
+        difficulty: Optional[float] = None,
+        prompt_tokens: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        budget = budget or Budget()
+        prompt_tokens = prompt_tokens if prompt_tokens is not None else estimate_tokens(text)
+        difficulty = difficulty if difficulty is not None else estimate_difficulty(text)
+        if min_quality is None:
+            min_quality = 0.5 + 0.4 * difficulty
+
+        estimates = {
+            name: self._estimate(name, prompt_tokens, expected_output_tokens)
+            for name, profile in self.profiles.items()
+            if profile.context_window >= prompt_tokens + expected_output_tokens
+        }
+        if not estimates:
+            # Nenhum contexto comporta o prompt: usa o maior disponível
+            name = max(self.profiles, key=lambda n: self.profiles[n].context_window)
+            estimates = {name: self._estimate(name, prompt_tokens, expected_output_tokens)}
+
+        within_budget = [
+            n for n, e in estimates.items()
+            if (budget.latency_s is None or e["latency_s"] <= budget.latency_s)
+            and (budget.cost_usd is None or e["cost_usd"] <= budget.cost_usd)
+        ]
+        good_enough = [n for n in within_budget if estimates[n]["quality"] >= min_quality]
+
+        if good_enough:
+            model = min(good_enough, key=lambda n: (estimates[n]["latency_s"], estimates[n]["cost_usd"]))
+            reason = "quality_within_budget"
+        elif within_budget:
+            model = max(within_budget, key=lambda n: estimates[n]["quality"])
+            reason = "best_quality_within_budget"
+        else:
+            model = min(estimates, key=lambda n: estimates[n]["latency_s"])
+            reason = "over_budget_fastest"
+
+        decision = {
+            "ts": time.time(),
+            "stage": stage,
+            "model": model,
+            "reason": reason,
+            "prompt_tokens": prompt_tokens,
+            "expected_output_tokens": expected_output_tokens,
+            "difficulty": difficulty,
+            "min_quality": round(min_quality, 4),
+            "budget": budget._asdict(),
+            "estimates": estimates,
+        }
+        with self._lock:
+            self.decisions.append(decision)
+        return decision
+
+    # ---------- chamada com prazo e fallback ----------
+
+    def complete(
+        self,
+        client,
+        messages: List[Dict[str, str]],
+        stage: str = "default",
+        budget: Optional[Budget] = None,
+        text: Optional[str] = None,
+        expected_output_tokens: int = 400,
+        min_quality: Optional[float] = None,
+        difficulty: Optional[float] = None,
+        **kwargs,
+    ):
+        text = text if text is not None else " ".join(m["content"] for m in messages)
+        decision = self.choose(
+            text,
+            stage=stage,
+            budget=budget,
+            expected_output_tokens=expected_output_tokens,
+            min_quality=min_quality,
+            difficulty=difficulty,
+            prompt_tokens=sum(estimate_tokens(m["content"]) for m in messages),
+        )
+
+        model = decision["model"]
+        deadline = None
+        if budget is not None and budget.latency_s is not None:
+            deadline = budget.latency_s * self.deadline_factor
+
+        try:
+            return self._call(client, model, messages, stage, deadline, **kwargs)
+        except Exception as e:
+            if not _is_timeout(e):
+                raise
+            fallback = self.fastest(exclude=model, output_tokens=expected_output_tokens)
+            decision["fallback"] = fallback
+            # Segunda tentativa sem prazo: melhor uma resposta lenta do que nenhuma
+            return self._call(client, fallback, messages, stage, None, **kwargs)
+
+    def _call(self, client, model: str, messages, stage: str, deadline: Optional[float], **kwargs):
+        if deadline is not None:
+            kwargs["timeout"] = deadline
+
+        # `schema` vira o response_format que o modelo escolhido suporta
+        schema = kwargs.pop("schema", None)
+        if schema is not None:
+            profile = self.profiles.get(model)
+            fmt = response_format(profile.structured_output if profile else "json_object", schema)
+            if fmt is not None:
+                kwargs["response_format"] = fmt
+
+        start = self.clock()
+        with span("llm", stage=stage, model=model) as s:
+            try:
+                response = client.chat.completions.create(model=model, messages=messages, **kwargs)
+            except Exception as e:
+                if _is_timeout(e):
+                    self.record(model, self.clock() - start, 0, ok=False)
+                raise
+            s.record_usage(response)
+
+        usage = getattr(response, "usage", None)
+        # Respostas do cache não dizem nada sobre a latência do modelo
+        if not getattr(response, "cached", False):
+            self.record(model, self.clock() - start, getattr(usage, "completion_tokens", 0) or 0)
+        return response
+
+    def record(self, model: str, latency_s: float, completion_tokens: int, ok: bool = True, quality: Optional[float] = None):
+        if model in self.stats:
+            with self._lock:
+                self.stats[model].record(latency_s, completion_tokens, ok, quality)
+
+    # ---------- log de decisões ----------
+
+    def export_decisions(self, path: str):
+        with self._lock:
+            decisions = list(self.decisions)
+        with open(path, "a", encoding="utf-8") as f:
+            for d in decisions:
+                f.write(json.dumps(d, ensure_ascii=False) + "\n")
+
+
+def _is_timeout(error: Exception) -> bool:
+    # groq.APITimeoutError, httpx.TimeoutException, TimeoutError...
+    return isinstance(error, TimeoutError) or "Timeout" in type(error).__name__
+
+
+# =========================================================
+#   SIMULAÇÃO OFFLINE (REPLAY DO LOG)
+# =========================================================
+
+def load_decisions(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def simulate(decisions: List[Dict[str, Any]], router: Router, client) -> Dict[str, Any]:
+    """
+    Reexecuta requisições registradas contra um roteador novo e um cliente
+    falso (ver `fake_client.FakeGroqClient`). Só tamanhos, dificuldade,
+    orçamentos e etapa são reaproveitados; o texto do prompt é sintético.
+    """
+    total_latency = total_cost = 0.0
+    misses = fallbacks = 0
+    per_model: Dict[str, int] = {}
+
+    for logged in decisions:
+        budget = Budget(**logged.get("budget", {}))
+        messages = [{"role": "user", "content": "x" * (4 * logged["prompt_tokens"])}]
+
+        start = router.clock()
+        response = router.complete(
+            client,
+            messages,
+            stage=logged.get("stage", "default"),
+            budget=budget,
+            text="",
+            expected_output_tokens=logged.get("expected_output_tokens", 400),
+            min_quality=logged.get("min_quality"),
+            difficulty=logged.get("difficulty"),
+        )
+        elapsed = router.clock() - start
+
+        decision = router.decisions[-1]
+        model = decision.get("fallback", decision["model"])
+        profile = router.profiles[model]
+        usage = response.usage
+        total_cost += (usage.prompt_tokens * profile.cost_in_per_m + usage.completion_tokens * profile.cost_out_per_m) / 1e6
+        total_latency += elapsed
+        per_model[model] = per_model.get(model, 0) + 1
+        fallbacks += "fallback" in decision
+        if budget.latency_s is not None and elapsed > budget.latency_s:
+            misses += 1
+
+    n = max(len(decisions), 1)
+    return {
+        "requests": len(decisions),
+        "mean_latency_s": round(total_latency / n, 4),
+        "total_cost_usd": round(total_cost, 6),
+        "deadline_misses": misses,
+        "fallbacks": fallbacks,
+        "models": per_model,
+    }
+
+
+# Roteador compartilhado do processo (estatísticas acumulam entre execuções)
+default_router = Router()
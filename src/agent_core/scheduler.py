@@ -0,0 +1,192 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+
+# =========================================================
+#   DAG DE ETAPAS (depends_on)
+# =========================================================
+
+def build_dag(plan: List[Dict[str, Any]]) -> Dict[int, List[int]]:
+    """
+    Converte o plano em um DAG: posição da etapa -> posições das dependências.
+
+    O campo `depends_on` é opcional e pode conter ids (ou um único id).
+    Ids desconhecidos são ignorados. Sem `depends_on`, a etapa é independente.
+    """
+    positions = {}
+    for pos, stage in enumerate(plan):
+        positions.setdefault(str(stage.get("id", pos + 1)), pos)
+
+    dag = {}
+    for pos, stage in enumerate(plan):
+        deps = stage.get("depends_on") or []
+        if not isinstance(deps, list):
+            deps = [deps]
+        dag[pos] = sorted({positions[str(d)] for d in deps if str(d) in positions} - {pos})
+
+    _topological_order(dag)
+    return dag
+
+
+def _topological_order(dag: Dict[int, List[int]]) -> List[int]:
+    pending = {pos: len(deps) for pos, deps in dag.items()}
+    dependents: Dict[int, List[int]] = {pos: [] for pos in dag}
+    for pos, deps in dag.items():
+        for dep in deps:
+            dependents[dep].append(pos)
+
+    ready = sorted(pos for pos, count in pending.items() if count == 0)
+    order = []
+    while ready:
+        pos = ready.pop(0)
+        order.append(pos)
+        for child in dependents[pos]:
+            pending[child] -= 1
+            if pending[child] == 0:
+                ready.append(child)
+        ready.sort()
+
+    if len(order) != len(dag):
+        raise ValueError("Ciclo de dependências no plano (depends_on).")
+    return order
+
+
+# =========================================================
+#   EXECUÇÃO CONCORRENTE
+# =========================================================
+
+def run_stages(
+    plan: List[Dict[str, Any]],
+    execute: Callable[[Dict[str, Any]], Any],
+    max_concurrency: int = 4,
+) -> List[Any]:
+    """
+    Executa `execute(stage)` para cada etapa respeitando o DAG de dependências,
+    com no máximo `max_concurrency` chamadas simultâneas.
+
+    Os resultados voltam na ordem original do plano.
+    """
+    dag = build_dag(plan)
+    results: List[Any] = [None] * len(plan)
+
+    if max_concurrency <= 1:
+        for pos in _topological_order(dag):
+            results[pos] = execute(plan[pos])
+        return results
+
+    remaining = {pos: set(deps) for pos, deps in dag.items()}
+    dependents: Dict[int, List[int]] = {pos: [] for pos in dag}
+    for pos, deps in dag.items():
+        for dep in deps:
+            dependents[dep].append(pos)
+
+    ready = [pos for pos, deps in remaining.items() if not deps]
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        while ready or running:
+            while ready and len(running) < max_concurrency:
+                pos = ready.pop(0)
+                running[pool.submit(execute, plan[pos])] = pos
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                pos = running.pop(future)
+                results[pos] = future.result()
+                for child in dependents[pos]:
+                    remaining[child].discard(pos)
+                    if not remaining[child]:
+                        ready.append(child)
+            ready.sort()
+
+    return results
+
+
+# =========================================================
+#   EXECUÇÃO COM PLANO EM STREAMING
+# =========================================================
+
+def _dependency_ids(stage: Dict[str, Any]) -> List[str]:
+    deps = stage.get("depends_on") or []
+    if not isinstance(deps, list):
+        deps = [deps]
+    return [str(d) for d in deps]
+
+
+def run_stages_stream(
+    stages: Iterable[Dict[str, Any]],
+    execute: Callable[[Dict[str, Any]], Any],
+    max_concurrency: int = 4,
+) -> Tuple[List[Dict[str, Any]], List[Any]]:
+    """
+    Como `run_stages`, mas as etapas chegam aos poucos (plano gerado em
+    streaming): cada uma é despachada assim que chega e suas dependências
+    terminaram, sem esperar o plano inteiro.
+
+    Dependência de um id que ainda não apareceu espera por ele; ids que não
+    aparecem até o fim do plano são ignorados (como em `build_dag`).
+    Retorna (plano completo, resultados na ordem do plano).
+    """
+    events: "queue.Queue[Tuple[str, Any, Any]]" = queue.Queue()
+
+    def feed():
+        # `stages` pode bloquear (stream do LLM): consumido numa thread própria
+        try:
+            for stage in stages:
+                events.put(("stage", stage, None))
+            events.put(("end", None, None))
+        except Exception as e:
+            events.put(("error", e, None))
+
+    threading.Thread(target=feed, daemon=True).start()
+
+    plan: List[Dict[str, Any]] = []
+    results: List[Any] = []
+    positions: Dict[str, int] = {}
+    waiting: List[int] = []
+    finished = set()
+    running = 0
+    ended = False
+
+    def ready(pos: int) -> bool:
+        for dep in _dependency_ids(plan[pos]):
+            if dep not in positions:
+                if not ended:
+                    return False
+                continue
+            if positions[dep] != pos and positions[dep] not in finished:
+                return False
+        return True
+
+    with ThreadPoolExecutor(max_workers=max(max_concurrency, 1)) as pool:
+        while not ended or waiting or running:
+            kind, payload, future = events.get()
+
+            if kind == "stage":
+                pos = len(plan)
+                plan.append(payload)
+                results.append(None)
+                positions.setdefault(str(payload.get("id", pos + 1)), pos)
+                waiting.append(pos)
+            elif kind == "done":
+                running -= 1
+                results[payload] = future.result()
+                finished.add(payload)
+            elif kind == "end":
+                ended = True
+            else:
+                raise payload
+
+            for pos in [p for p in waiting if ready(p)]:
+                waiting.remove(pos)
+                running += 1
+                pool.submit(execute, plan[pos]).add_done_callback(
+                    lambda f, pos=pos: events.put(("done", pos, f))
+                )
+
+            if ended and waiting and not running:
+                raise ValueError("Ciclo de dependências no plano (depends_on).")
+
+    return plan, results
@@ -0,0 +1,41 @@
+import threading
+import time
+from typing import Iterator, Optional
+
+
+# =========================================================
+#   STREAMING DE COMPLETIONS (stream=True)
+# =========================================================
+
+def iter_deltas(stream, cancel: Optional[threading.Event] = None, span=None) -> Iterator[str]:
+    """
+    Gera os pedaços de texto de uma completion com `stream=True`.
+
+    Se `cancel` for sinalizado, fecha o stream (encerrando a conexão HTTP)
+    e para de gerar. Com `span` (telemetria), registra o tempo até o
+    primeiro token e o uso de tokens enviado no último chunk.
+    """
+    first = True
+    try:
+        for chunk in stream:
+            if cancel is not None and cancel.is_set():
+                break
+
+            if span is not None:
+                # Groq manda o uso em chunk.x_groq.usage; OpenAI em chunk.usage
+                usage_holder = getattr(chunk, "x_groq", None) or chunk
+                if getattr(usage_holder, "usage", None) is not None:
+                    span.record_usage(usage_holder)
+
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content
+            if text:
+                if first and span is not None:
+                    span.set(ttft_ms=round((time.perf_counter() - span.start) * 1000, 1))
+                    first = False
+                yield text
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
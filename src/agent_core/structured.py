@@ -0,0 +1,314 @@
+import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+# =========================================================
+#   ESQUEMAS (subconjunto de JSON Schema)
+# =========================================================
+
+STAGE_SCHEMA = {
+    "type": "object",
+    "required": ["name", "description"],
+    "properties": {
+        "id": {"type": "integer"},
+        "name": {"type": "string"},
+        "description": {"type": "string"},
+        "depends_on": {"type": "array", "items": {"type": "integer"}, "default": []},
+    },
+}
+
+PLAN_SCHEMA = {
+    "title": "plano",
+    "type": "object",
+    "required": ["etapas"],
+    "properties": {"etapas": {"type": "array", "minItems": 1, "items": STAGE_SCHEMA}},
+}
+
+CRITIQUE_SCHEMA = {
+    "title": "critica",
+    "type": "object",
+    "required": ["melhorias"],
+    "properties": {"melhorias": {"type": "array", "minItems": 1, "items": {"type": "string"}}},
+}
+
+
+class StructuredOutputError(ValueError):
+    """Resposta que continuou inválida depois do reparo local e da nova tentativa."""
+
+    def __init__(self, stage: str, errors: List[str]):
+        super().__init__(f"{stage}: " + "; ".join(errors[:5]))
+        self.stage = stage
+        self.errors = errors
+
+
+# =========================================================
+#   VALIDAÇÃO COM COERÇÃO LOCAL
+# =========================================================
+
+def conform(value: Any, schema: Dict[str, Any], path: str = "$") -> Tuple[Any, List[str]]:
+    """
+    Valida `value` contra `schema` e corrige o que dá para corrigir sem
+    perguntar de novo ao modelo: "3" -> 3 em inteiros, números em strings,
+    escalar -> [escalar] em arrays, lista solta -> {campo: lista} quando o
+    objeto só exige um array, e `default` para campos ausentes.
+    Retorna (valor corrigido, erros).
+    """
+    kind = schema.get("type")
+
+    if kind == "object":
+        required = schema.get("required", [])
+        properties = schema.get("properties", {})
+        if isinstance(value, list) and len(required) == 1 and properties.get(required[0], {}).get("type") == "array":
+            value = {required[0]: value}
+        if not isinstance(value, dict):
+            return value, [f"{path}: esperado objeto"]
+
+        value, errors = dict(value), []
+        for name in required:
+            if name not in value and "default" not in properties.get(name, {}):
+                errors.append(f"{path}.{name}: campo obrigatório")
+        for name, sub in properties.items():
+            if name not in value:
+                if "default" in sub:
+                    value[name] = list(sub["default"]) if isinstance(sub["default"], list) else sub["default"]
+                continue
+            value[name], sub_errors = conform(value[name], sub, f"{path}.{name}")
+            errors += sub_errors
+        return value, errors
+
+    if kind == "array":
+        if value is None:
+            value = []
+        elif not isinstance(value, list):
+            value = [value]
+        items, errors = [], []
+        for i, item in enumerate(value):
+            item, item_errors = conform(item, schema.get("items", {}), f"{path}[{i}]")
+            items.append(item)
+            errors += item_errors
+        if len(items) < schema.get("minItems", 0):
+            errors.append(f"{path}: mínimo de {schema['minItems']} itens")
+        return items, errors
+
+    if kind == "integer":
+        if isinstance(value, bool):
+            return value, [f"{path}: esperado inteiro"]
+        if isinstance(value, int):
+            return value, []
+        if isinstance(value, float) and value.is_integer():
+            return int(value), []
+        if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+            return int(value.strip()), []
+        return value, [f"{path}: esperado inteiro"]
+
+    if kind == "string":
+        if isinstance(value, str):
+            if not value.strip():
+                return value, [f"{path}: texto vazio"]
+            return value.strip(), []
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value), []
+        return value, [f"{path}: esperado texto"]
+
+    return value, []
+
+
+# =========================================================
+#   EXTRAÇÃO TOLERANTE (UMA PASSADA)
+# =========================================================
+
+def extract_json(text: str) -> Any:
+    """
+    Primeiro valor JSON (objeto ou array) dentro de `text`, numa única
+    passada: ignora texto e cercas ``` em volta, remove vírgulas antes de
+    `]`/`}` e, se a resposta foi cortada, descarta o item incompleto e
+    fecha o que ficou aberto. Levanta ValueError se não houver JSON.
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        raise ValueError("nenhum JSON na resposta")
+
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = escape = False
+    # Último ponto em que o JSON estava sintaticamente completo num nível
+    safe_len, safe_stack = 0, []
+
+    for c in text[min(starts):]:
+        if in_string:
+            out.append(c)
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+                if stack and stack[-1] == "]":
+                    safe_len, safe_stack = len(out), list(stack)
+            continue
+
+        if c == '"':
+            in_string = True
+        elif c in "{[":
+            stack.append("}" if c == "{" else "]")
+        elif c in "}]":
+            if not stack or stack[-1] != c:
+                break
+            # Vírgula sobrando antes do fechamento
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            stack.pop()
+            out.append(c)
+            safe_len, safe_stack = len(out), list(stack)
+            if not stack:
+                return json.loads("".join(out))
+            continue
+        out.append(c)
+
+    # Cortado no meio: volta ao último item completo e fecha os níveis abertos
+    if not safe_len:
+        raise ValueError("JSON incompleto")
+    out = out[:safe_len]
+    return json.loads("".join(out) + "".join(reversed(safe_stack)))
+
+
+def parse_json(content: str, schema: Dict[str, Any]) -> Tuple[Any, List[str]]:
+    try:
+        data = json.loads(content)
+    except ValueError:
+        try:
+            data = extract_json(content)
+        except ValueError as e:
+            return None, [f"JSON inválido: {e}"]
+    return conform(data, schema)
+
+
+# =========================================================
+#   PARSER INCREMENTAL (STREAMING)
+# =========================================================
+
+class StreamingArrayParser:
+    """
+    Recebe o texto aos pedaços e devolve cada objeto do primeiro array
+    JSON assim que ele fecha — seja o array da raiz ou o de
+    {"etapas": [...]}. Objetos que não passam nem com `extract_json`
+    vão para `errors`.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.errors: List[str] = []
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self._items = 0
+
+    def feed(self, chunk: str) -> Iterator[Dict[str, Any]]:
+        self.text += chunk
+        while self._pos < len(self.text):
+            c = self.text[self._pos]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c in "{[":
+                self._depth += 1
+                if c == "[" and self._array_depth is None:
+                    self._array_depth = self._depth
+                elif c == "{" and self._array_depth is not None and self._depth == self._array_depth + 1:
+                    self._item_start = self._pos - 1
+            elif c in "}]":
+                self._depth -= 1
+                if c == "}" and self._item_start is not None and self._depth == self._array_depth:
+                    item = self._parse(self.text[self._item_start:self._pos])
+                    self._item_start = None
+                    if item is not None:
+                        yield item
+                elif c == "]" and self._array_depth is not None and self._depth == self._array_depth - 1:
+                    # Fim do array alvo: o resto não interessa
+                    self._array_depth = -1
+
+    def _parse(self, raw: str) -> Optional[Dict[str, Any]]:
+        index = self._items
+        self._items += 1
+        try:
+            return json.loads(raw)
+        except ValueError:
+            try:
+                return extract_json(raw)
+            except ValueError as e:
+                self.errors.append(f"etapas[{index}]: JSON inválido ({e})")
+                return None
+
+
+# =========================================================
+#   CHAMADA COM REPARO E UMA NOVA TENTATIVA
+# =========================================================
+
+def correction_messages(messages: List[Dict[str, str]], content: str, errors: List[str]) -> List[Dict[str, str]]:
+    problems = "\n".join(f"- {e}" for e in errors[:10])
+    return messages + [
+        {"role": "assistant", "content": content},
+        {
+            "role": "user",
+            "content": f"Sua resposta não é um JSON válido para o formato pedido:\n{problems}\n\n"
+                       "Responda SOMENTE com o JSON corrigido, sem texto em volta.",
+        },
+    ]
+
+
+def complete_json(
+    router,
+    client,
+    messages: List[Dict[str, str]],
+    schema: Dict[str, Any],
+    stage: str = "default",
+    previous: Optional[Tuple[str, List[str]]] = None,
+    **kwargs,
+) -> Any:
+    """
+    `router.complete` pedindo JSON ao provedor (`schema`: json_schema ou
+    JSON mode, conforme o modelo) e validando a resposta com reparo local.
+    Se ainda houver erros, faz UMA nova chamada mostrando a resposta e os
+    erros ao modelo. `previous` = (resposta, erros) pula a primeira chamada.
+    Levanta StructuredOutputError se a correção também falhar.
+    """
+    if previous is None:
+        content = _content(router.complete(client, messages, stage=stage, schema=schema, **kwargs))
+        data, errors = parse_json(content, schema)
+        if not errors:
+            return data
+    else:
+        content, errors = previous
+
+    retry = correction_messages(messages, content, errors)
+    content = _content(router.complete(client, retry, stage=f"{stage}_retry", schema=schema, **kwargs))
+    data, errors = parse_json(content, schema)
+    if errors:
+        raise StructuredOutputError(stage, errors)
+    return data
+
+
+def _content(response) -> str:
+    return (response.choices[0].message.content or "").strip()
+
+
+def response_format(mode: str, schema: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """`response_format` da API para o modo do modelo ("json_schema", "json_object" ou "none")."""
+    if mode == "json_schema":
+        return {"type": "json_schema", "json_schema": {"name": schema.get("title", "saida"), "schema": schema}}
+    if mode == "json_object":
+        return {"type": "json_object"}
+    return None
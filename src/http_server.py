@@ -0,0 +1,507 @@
+"""
+Servidor HTTP assíncrono (asyncio puro) para o sistema multi-agente e o RAG.
+
+Uso (na raiz do projeto):
+    python -m src.http_server --port 8000 --docs-dir docs --index-dir .cache/indexes
+
+Endpoints:
+    GET  /health
+    POST /agent  {"goal": "...", "stream": true, "timeout": 60}
+    POST /rag    {"path": "manual.pdf", "question": "...", "stream": true}
+
+Com "stream": true a resposta é text/event-stream (um evento SSE por
+evento do pipeline); sem ele, um JSON no final. Cada pedido roda numa
+thread do pool; com `max_concurrency` pedidos em execução e `max_queue`
+esperando, os seguintes recebem 429. Timeout ou cliente desconectado
+sinalizam o `cancel` do pipeline, que fecha os streams do LLM em curso.
+
+Cliente LLM, embedder, reranker e índices são carregados uma vez e
+compartilhados por todos os pedidos.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from src.telemetry import span
+
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    504: "Gateway Timeout",
+}
+
+
+# =========================================================
+#   HTTP MÍNIMO
+# =========================================================
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    headers: Dict[str, str]
+    body: Dict[str, Any]
+
+
+async def read_request(reader: asyncio.StreamReader) -> Request:
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.LimitOverrunError:
+        raise HttpError(413, "Cabeçalhos grandes demais.")
+
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _ = lines[0].split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "Linha de requisição inválida.")
+
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HttpError(400, "Content-Length inválido.")
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, "Corpo grande demais.")
+
+    body: Dict[str, Any] = {}
+    if length:
+        try:
+            body = json.loads(await reader.readexactly(length))
+        except ValueError:
+            raise HttpError(400, "Corpo não é JSON válido.")
+        if not isinstance(body, dict):
+            raise HttpError(400, "Corpo deve ser um objeto JSON.")
+
+    return Request(method.upper(), target.split("?", 1)[0], headers, body)
+
+
+def _head(status: int, content_type: str, headers: Optional[Dict[str, str]] = None) -> bytes:
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", f"Content-Type: {content_type}", "Connection: close"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    return ("\r\n".join(lines) + "\r\n").encode("latin-1")
+
+
+async def send_json(writer: asyncio.StreamWriter, status: int, payload: Any, headers: Optional[Dict[str, str]] = None):
+    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    writer.write(_head(status, "application/json; charset=utf-8", {**(headers or {}), "Content-Length": str(len(data))}))
+    writer.write(b"\r\n" + data)
+    await writer.drain()
+
+
+def sse(event: Dict[str, Any]) -> bytes:
+    return f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+def _require(body: Dict[str, Any], field: str) -> str:
+    value = body.get(field)
+    if not isinstance(value, str) or not value.strip():
+        raise HttpError(400, f"Campo obrigatório: {field}")
+    return value.strip()
+
+
+# =========================================================
+#   COLEÇÕES RAG COMPARTILHADAS
+# =========================================================
+
+class CollectionPool:
+    """
+    Uma DocumentCollection por arquivo, criada na primeira pergunta e
+    mantida em memória. Com `index_dir`, cada arquivo tem um índice em
+    disco e só é reprocessado quando muda (como `run_rag_real`).
+    """
+
+    def __init__(self, index_dir: Optional[str] = None, **options):
+        self.index_dir = index_dir
+        self.options = options
+        self._collections: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str):
+        from src.rag_engine.collection import DocumentCollection
+
+        with self._lock:
+            lock = self._locks.setdefault(path, threading.Lock())
+
+        # Pedidos para arquivos diferentes ingerem em paralelo; o mesmo arquivo, uma vez só
+        with lock:
+            index_dir = None
+            if self.index_dir:
+                index_dir = os.path.join(self.index_dir, hashlib.sha1(path.encode("utf-8")).hexdigest()[:12])
+
+            collection = self._collections.get(path)
+            if collection is None:
+                collection = DocumentCollection.open(index_dir, **self.options) if index_dir else DocumentCollection(**self.options)
+
+            if collection.add_file(path) and index_dir:
+                collection.save(index_dir)
+
+            self._collections[path] = collection
+            return collection
+
+
+# =========================================================
+#   AGREGAÇÃO (RESPOSTAS SEM STREAMING)
+# =========================================================
+
+def collect_agent(events: List[Dict[str, Any]]) -> Tuple[int, Dict[str, Any]]:
+    # Etapas podem terminar antes do evento "plan" (plano em streaming)
+    result: Dict[str, Any] = {"plan": [], "stages": [], "critique": []}
+    stages: Dict[int, Dict[str, Any]] = {}
+    for event in events:
+        kind = event["type"]
+        if kind == "error":
+            return 500, {"error": event["message"]}
+        if kind == "plan":
+            result["plan"] = event["plan"]
+        elif kind == "stage_done":
+            stages[event["index"]] = {"name": event["name"], "output": event["output"]}
+        elif kind == "critique":
+            result["critique"] = event["items"]
+    result["stages"] = [stages.get(i) for i in range(len(result["plan"]))]
+    return 200, result
+
+
+def collect_rag(events: List[Dict[str, Any]]) -> Tuple[int, Dict[str, Any]]:
+    for event in events:
+        if event["type"] == "error":
+            return 500, {"error": event["message"]}
+        if event["type"] == "done":
+            return 200, {"answer": event["answer"], "cached": event.get("cached", False)}
+    return 500, {"error": "Pipeline terminou sem resposta."}
+
+
+# =========================================================
+#   SERVIDOR
+# =========================================================
+
+class _Route(NamedTuple):
+    events: Callable[[Dict[str, Any], threading.Event], Iterator[Dict[str, Any]]]
+    collect: Callable[[List[Dict[str, Any]]], Tuple[int, Dict[str, Any]]]
+
+
+class AppServer:
+    """
+    Expõe `stream_multi_agent` e o RAG por HTTP.
+
+    Os pipelines são geradores síncronos: cada pedido ocupa uma thread do
+    pool (`max_concurrency`) e os eventos voltam ao loop asyncio por uma
+    fila. A vaga só é liberada quando a thread termina, então um pedido
+    cancelado não deixa trabalho "fantasma" além do limite.
+    """
+
+    def __init__(
+        self,
+        client,
+        docs_dir: str = ".",
+        index_dir: Optional[str] = None,
+        max_concurrency: int = 8,
+        max_queue: int = 32,
+        timeout: float = 120.0,
+        stage_concurrency: int = 4,
+        rerank: bool = False,
+        cache_answers: bool = False,
+        router=None,
+    ):
+        from src.rag_engine.rag_real import collection_options
+
+        self.client = client
+        self.docs_dir = os.path.realpath(docs_dir)
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.stage_concurrency = stage_concurrency
+        self.router = router
+        self.collections = CollectionPool(index_dir, **collection_options(rerank, cache_answers))
+
+        self.active = 0
+        self.pending = 0
+        self.rejected = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pool = ThreadPoolExecutor(max_concurrency, thread_name_prefix="pipeline")
+        self.routes = {
+            "/agent": _Route(self._agent_events, collect_agent),
+            "/rag": _Route(self._rag_events, collect_rag),
+        }
+
+    # ---------- pipelines ----------
+
+    def _agent_events(self, body: Dict[str, Any], cancel: threading.Event) -> Iterator[Dict[str, Any]]:
+        from src.agent_core.agent_controller import stream_multi_agent
+
+        goal = _require(body, "goal")
+        return stream_multi_agent(
+            goal, self.client, max_concurrency=self.stage_concurrency, cancel=cancel, router=self.router
+        )
+
+    def _rag_events(self, body: Dict[str, Any], cancel: threading.Event) -> Iterator[Dict[str, Any]]:
+        path = self._resolve(_require(body, "path"))
+        question = _require(body, "question")
+        return self._rag_stream(path, question, cancel)
+
+    def _rag_stream(self, path: str, question: str, cancel: threading.Event) -> Iterator[Dict[str, Any]]:
+        try:
+            collection = self.collections.get(path)
+            yield from collection.ask_stream(question, self.client, top_k=3, cancel=cancel)
+        except Exception as e:
+            yield {"type": "error", "message": f"❌ ERRO NO RAG:\n{e}"}
+
+    def _resolve(self, path: str) -> str:
+        # Só arquivos dentro de docs_dir
+        full = os.path.realpath(os.path.join(self.docs_dir, path))
+        if os.path.commonpath([full, self.docs_dir]) != self.docs_dir:
+            raise HttpError(400, "Caminho fora do diretório de documentos.")
+        if not os.path.isfile(full):
+            raise HttpError(404, f"Documento não encontrado: {path}")
+        return full
+
+    @staticmethod
+    def _pump(events: Iterator[Dict[str, Any]], cancel: threading.Event, loop, out: asyncio.Queue):
+        # Roda numa thread do pool: o gerador é consumido e fechado na mesma thread
+        def emit(item):
+            try:
+                loop.call_soon_threadsafe(out.put_nowait, item)
+            except RuntimeError:
+                cancel.set()  # loop encerrado
+
+        try:
+            for event in events:
+                if cancel.is_set():
+                    break
+                emit(event)
+        except Exception as e:
+            emit({"type": "error", "message": f"{type(e).__name__}: {e}"})
+        finally:
+            events.close()
+            emit(None)
+
+    # ---------- conexão ----------
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await read_request(reader)
+
+            if request.path == "/health":
+                await send_json(writer, 200, self.health())
+                return
+
+            route = self.routes.get(request.path)
+            if route is None:
+                raise HttpError(404, f"Rota desconhecida: {request.path}")
+            if request.method != "POST":
+                raise HttpError(405, "Use POST.", {"Allow": "POST"})
+
+            await self._serve(reader, writer, request, route)
+
+        except HttpError as e:
+            try:
+                await send_json(writer, e.status, {"error": e.message}, e.headers)
+            except ConnectionError:
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _serve(self, reader, writer, request: Request, route: _Route):
+        body = request.body
+        stream = bool(body.get("stream"))
+        try:
+            timeout = min(float(body.get("timeout") or self.timeout), self.timeout)
+        except (TypeError, ValueError):
+            raise HttpError(400, "timeout inválido.")
+
+        cancel = threading.Event()
+        # Valida o corpo antes de ocupar vaga (o gerador ainda não rodou)
+        events = route.events(body, cancel)
+
+        if self.pending >= self.max_concurrency + self.max_queue:
+            self.rejected += 1
+            events.close()
+            raise HttpError(429, "Servidor ocupado, tente novamente.", {"Retry-After": "1"})
+
+        loop = asyncio.get_running_loop()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+
+        self.pending += 1
+        future = None
+        started = False
+        disconnected = asyncio.ensure_future(reader.read(1))
+
+        try:
+            async with asyncio.timeout(timeout):
+                await self._slots.acquire()
+                self.active += 1
+                out: asyncio.Queue = asyncio.Queue()
+                future = loop.run_in_executor(self._pool, self._pump, events, cancel, loop, out)
+
+                if stream:
+                    writer.write(_head(200, "text/event-stream; charset=utf-8", {"Cache-Control": "no-cache"}) + b"\r\n")
+                    await writer.drain()
+                    started = True
+
+                collected = []
+                with span("http", stage=request.path.strip("/"), stream=stream):
+                    while True:
+                        get = asyncio.ensure_future(out.get())
+                        done, _ = await asyncio.wait({get, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                        if get not in done:
+                            get.cancel()
+                            if not disconnected.result():
+                                raise ConnectionError("Cliente desconectou.")
+                            disconnected = asyncio.ensure_future(reader.read(1))
+                            continue
+
+                        event = get.result()
+                        if event is None:
+                            break
+                        if stream:
+                            writer.write(sse(event))
+                            await writer.drain()
+                        elif event["type"] != "delta":
+                            collected.append(event)
+
+                if not stream:
+                    status, payload = route.collect(collected)
+                    await send_json(writer, status, payload)
+
+        except TimeoutError:
+            cancel.set()
+            message = f"Tempo limite de {timeout:g}s excedido."
+            if started:
+                writer.write(sse({"type": "error", "message": message}))
+                await writer.drain()
+            else:
+                await send_json(writer, 504, {"error": message})
+
+        finally:
+            cancel.set()
+            disconnected.cancel()
+            if future is None:
+                events.close()
+                self.pending -= 1
+            else:
+                future.add_done_callback(self._release)
+
+    def _release(self, _future):
+        self.active -= 1
+        self.pending -= 1
+        self._slots.release()
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "active": self.active,
+            "queued": self.pending - self.active,
+            "rejected": self.rejected,
+        }
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8000) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# =========================================================
+#   CLI
+# =========================================================
+
+def main():
+    from dotenv import load_dotenv
+    from groq import Groq
+
+    from src.agent_core.llm_cache import CachedClient, SQLiteBackend
+    from src.agent_core.rate_limit import RateLimitedClient, RateLimiter
+
+    parser = argparse.ArgumentParser(description="Servidor HTTP do sistema multi-agente e do RAG")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--docs-dir", default=".", help="arquivos que /rag pode ler")
+    parser.add_argument("--index-dir", default=None, help="índices persistentes por documento")
+    parser.add_argument("--max-concurrency", type=int, default=8, help="pedidos em execução")
+    parser.add_argument("--max-queue", type=int, default=32, help="pedidos esperando antes de 429")
+    parser.add_argument("--timeout", type=float, default=120.0, help="tempo máximo por pedido (s)")
+    parser.add_argument("--stage-concurrency", type=int, default=4, help="etapas em paralelo por objetivo")
+    parser.add_argument("--rerank", action="store_true")
+    parser.add_argument("--cache-answers", action="store_true")
+    parser.add_argument("--rpm", type=float, default=float(os.getenv("GROQ_RPM", "30")))
+    parser.add_argument("--tpm", type=float, default=float(os.getenv("GROQ_TPM", "6000")))
+    parser.add_argument("--no-warmup", action="store_true", help="não carrega o embedder na partida")
+    args = parser.parse_args()
+
+    load_dotenv()
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise ValueError("❌ ERRO: A variável GROQ_API_KEY não existe.")
+
+    # Um cliente para todos os pedidos: limite de taxa e cache são globais ao processo
+    client = CachedClient(
+        RateLimitedClient(Groq(api_key=api_key), RateLimiter(rpm=args.rpm, tpm=args.tpm)),
+        backend=SQLiteBackend(os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite")),
+        ttl=float(os.getenv("LLM_CACHE_TTL", "86400")),
+    )
+
+    app = AppServer(
+        client,
+        docs_dir=args.docs_dir,
+        index_dir=args.index_dir,
+        max_concurrency=args.max_concurrency,
+        max_queue=args.max_queue,
+        timeout=args.timeout,
+        stage_concurrency=args.stage_concurrency,
+        rerank=args.rerank,
+        cache_answers=args.cache_answers,
+    )
+
+    if not args.no_warmup:
+        from src.rag_engine.rag_real import encoder
+        encoder.encode(["aquecimento"])
+
+    async def serve():
+        server = await app.start(args.host, args.port)
+        print(f"🌐 Servidor em http://{args.host}:{args.port} (/agent, /rag, /health)")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print("👋 Encerrando servidor.")
+    finally:
+        app.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import threading
+from typing import Any, Callable, Dict, Iterable
+
+
+# =========================================================
+#   REGISTRO PREGUIÇOSO DE MODELOS
+# =========================================================
+# Modelos pesados (SentenceTransformer, pipelines HF) só são carregados no
+# primeiro uso, uma única vez por processo, e compartilhados por todos.
+
+_loaders: Dict[str, Callable[[], Any]] = {}
+_models: Dict[str, Any] = {}
+_locks: Dict[str, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def register(name: str, loader: Callable[[], Any]):
+    with _registry_lock:
+        _loaders.setdefault(name, loader)
+        _locks.setdefault(name, threading.Lock())
+
+
+def get(name: str) -> Any:
+    model = _models.get(name)
+    if model is not None:
+        return model
+
+    if name not in _loaders:
+        raise KeyError(f"Modelo não registrado: {name}")
+
+    # Duas threads pedindo o mesmo modelo: só uma carrega
+    with _locks[name]:
+        if name not in _models:
+            _models[name] = _loaders[name]()
+    return _models[name]
+
+
+def is_loaded(name: str) -> bool:
+    return name in _models
+
+
+def warmup(names: Iterable[str], background: bool = True):
+    """Carrega os modelos antecipadamente, por padrão numa thread daemon."""
+    names = list(names)
+
+    def load_all():
+        for name in names:
+            get(name)
+
+    if not background:
+        load_all()
+        return None
+
+    thread = threading.Thread(target=load_all, name="model-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+class LazyModel:
+    """
+    Proxy que só carrega o modelo quando um atributo é acessado
+    (ex.: `embedder.encode(...)`), mantendo a API do objeto real.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(get(self._name), attr)
+
+    def __call__(self, *args, **kwargs):
+        # Pipelines HF são chamados diretamente: summarizer(texto)
+        return get(self._name)(*args, **kwargs)
+
+    def __repr__(self):
+        state = "carregado" if is_loaded(self._name) else "não carregado"
+        return f"<LazyModel {self._name} ({state})>"
+
+
+# =========================================================
+#   MODELOS USADOS NO PROJETO
+# =========================================================
+
+def sentence_transformer(model_name: str = "all-MiniLM-L6-v2") -> LazyModel:
+    name = f"sentence-transformer:{model_name}"
+
+    def load():
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+
+    register(name, load)
+    return LazyModel(name)
+
+
+def hf_pipeline(task: str, model: str | None = None) -> LazyModel:
+    name = f"pipeline:{task}:{model or 'default'}"
+
+    def load():
+        from transformers import pipeline
+        return pipeline(task, model=model) if model else pipeline(task)
+
+    register(name, load)
+    return LazyModel(name)
+
+
+def cross_encoder(model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2") -> LazyModel:
+    name = f"cross-encoder:{model_name}"
+
+    def load():
+        from sentence_transformers import CrossEncoder
+        return CrossEncoder(model_name)
+
+    register(name, load)
+    return LazyModel(name)
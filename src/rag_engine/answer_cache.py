@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from src.telemetry import span
+
+
+# ================================
+# 🔹 Cache semântico de respostas
+# ================================
+class SemanticAnswerCache:
+    """
+    Respostas indexadas por (versão da coleção, embedding da pergunta).
+
+    Cada versão tem um índice FAISS pequeno (produto interno sobre vetores
+    normalizados = cosseno). Uma pergunta reaproveita a resposta da mais
+    parecida se a similaridade for >= `threshold`. Entradas expiram após
+    `ttl` segundos; acima de `max_entries` sai a menos usada recentemente.
+    Quando a coleção muda ela chama `drop(versão_antiga)`.
+    """
+
+    def __init__(self, threshold: float = 0.92, ttl: float | None = 3600.0, max_entries: int = 10_000):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        # versão -> índice FAISS (ids = ids das entradas)
+        self._indexes: dict = {}
+        # id -> {"version", "question", "answer", "expires_at"}, em ordem LRU
+        self._entries: OrderedDict[int, dict] = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def get(self, vector: np.ndarray, version: str) -> str | None:
+        query = self._normalize(vector)
+        with self._lock, span("answer_cache", version=version[:8]):
+            index = self._indexes.get(version)
+            if index is None or index.ntotal == 0:
+                self.misses += 1
+                return None
+
+            similarities, ids = index.search(query, min(4, index.ntotal))
+            now = time.monotonic()
+            for similarity, entry_id in zip(similarities[0], ids[0]):
+                if entry_id == -1 or similarity < self.threshold:
+                    break
+                entry = self._entries.get(int(entry_id))
+                if entry is None:
+                    continue
+                if entry["expires_at"] is not None and entry["expires_at"] < now:
+                    self._remove(int(entry_id))
+                    continue
+                self._entries.move_to_end(int(entry_id))
+                self.hits += 1
+                return entry["answer"]
+
+            self.misses += 1
+            return None
+
+    def put(self, vector: np.ndarray, version: str, question: str, answer: str):
+        import faiss
+
+        query = self._normalize(vector)
+        with self._lock:
+            index = self._indexes.get(version)
+            if index is None:
+                index = self._indexes[version] = faiss.IndexIDMap2(faiss.IndexFlatIP(query.shape[1]))
+
+            entry_id = self._next_id
+            self._next_id += 1
+            index.add_with_ids(query, np.array([entry_id], dtype=np.int64))
+            self._entries[entry_id] = {
+                "version": version,
+                "question": question,
+                "answer": answer,
+                "expires_at": time.monotonic() + self.ttl if self.ttl is not None else None,
+            }
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def drop(self, version: str):
+        """Descarta todas as respostas de uma versão da coleção."""
+        with self._lock:
+            if self._indexes.pop(version, None) is None:
+                return
+            for entry_id in [i for i, e in self._entries.items() if e["version"] == version]:
+                del self._entries[entry_id]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        index = self._indexes.get(entry["version"])
+        if index is not None:
+            index.remove_ids(np.array([entry_id], dtype=np.int64))
+            if index.ntotal == 0:
+                del self._indexes[entry["version"]]
+
+
+_default_answer_cache: SemanticAnswerCache | None = None
+
+
+def default_answer_cache() -> SemanticAnswerCache:
+    # Compartilhado no processo: cada coleção usa a própria versão como chave
+    global _default_answer_cache
+    if _default_answer_cache is None:
+        _default_answer_cache = SemanticAnswerCache()
+    return _default_answer_cache
@@ -0,0 +1,173 @@
+import math
+import re
+from collections import Counter
+
+import numpy as np
+
+
+# ================================
+# 🔹 Tokenização léxica
+# ================================
+# Mantém identificadores compostos ("ERR-404", "v2.1.0", "AB/123") como um
+# termo e também indexa as partes, para casar tanto o código exato quanto
+# pedaços dele.
+_TOKEN = re.compile(r"\w+(?:[-./:]\w+)*")
+_PARTS = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = []
+    for match in _TOKEN.findall(text.lower()):
+        tokens.append(match)
+        if not match.isalnum():
+            tokens.extend(_PARTS.findall(match))
+    return tokens
+
+
+# ================================
+# 🔹 Índice BM25 em arrays compactos
+# ================================
+class BM25Index:
+    """
+    Índice invertido BM25 sobre os mesmos ids de chunk do FAISS.
+
+    As postings ficam em formato CSR (numpy): `indptr[t]:indptr[t+1]` são
+    as linhas de documento e frequências do termo `t`. Inclusões e remoções
+    ficam pendentes e são consolidadas na próxima busca, de uma vez.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocab: dict[str, int] = {}
+
+        # Tabela de documentos (linha -> chunk id, tamanho em termos)
+        self.doc_ids = np.zeros(0, dtype=np.int64)
+        self.doc_len = np.zeros(0, dtype=np.float32)
+
+        # Postings CSR
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.rows = np.zeros(0, dtype=np.int32)
+        self.tfs = np.zeros(0, dtype=np.uint16)
+
+        self._pending: list[tuple[int, np.ndarray, np.ndarray]] = []
+        self._removed: set[int] = set()
+
+    def add(self, ids: list[int], texts: list[str]):
+        for chunk_id, text in zip(ids, texts):
+            counts = Counter(tokenize(text))
+            terms = np.fromiter(
+                (self.vocab.setdefault(t, len(self.vocab)) for t in counts), dtype=np.int32, count=len(counts)
+            )
+            tfs = np.fromiter(counts.values(), dtype=np.uint16, count=len(counts))
+            self._pending.append((int(chunk_id), terms, tfs))
+
+    def remove(self, ids: list[int]):
+        self._removed.update(int(i) for i in ids)
+
+    def _compact(self):
+        if not self._pending and not self._removed:
+            return
+
+        # Postings atuais de volta para (termo, linha, tf)
+        terms = np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int32), np.diff(self.indptr))
+        rows, tfs = self.rows, self.tfs
+        doc_ids, doc_len = self.doc_ids, self.doc_len
+
+        if self._pending:
+            base = len(doc_ids)
+            terms = np.concatenate([terms] + [t for _, t, _ in self._pending])
+            rows = np.concatenate([rows] + [np.full(len(t), base + n, dtype=np.int32) for n, (_, t, _) in enumerate(self._pending)])
+            tfs = np.concatenate([tfs] + [f for _, _, f in self._pending])
+            doc_ids = np.concatenate([doc_ids, np.array([i for i, _, _ in self._pending], dtype=np.int64)])
+            doc_len = np.concatenate([doc_len, np.array([f.sum() for _, _, f in self._pending], dtype=np.float32)])
+
+        if self._removed:
+            alive = ~np.isin(doc_ids, np.fromiter(self._removed, dtype=np.int64, count=len(self._removed)))
+            new_row = np.cumsum(alive, dtype=np.int64) - 1
+            keep = alive[rows]
+            terms, rows, tfs = terms[keep], new_row[rows[keep]].astype(np.int32), tfs[keep]
+            doc_ids, doc_len = doc_ids[alive], doc_len[alive]
+
+        order = np.argsort(terms, kind="stable")
+        self.rows, self.tfs = rows[order], tfs[order]
+        self.indptr = np.concatenate([[0], np.cumsum(np.bincount(terms, minlength=len(self.vocab)))]).astype(np.int64)
+        self.doc_ids, self.doc_len = doc_ids, doc_len
+        self._pending, self._removed = [], set()
+
+    def search(self, query: str, top_k: int = 3) -> list[tuple[int, float]]:
+        """Retorna (chunk_id, score) em ordem decrescente de score."""
+        self._compact()
+        n_docs = len(self.doc_ids)
+        if n_docs == 0:
+            return []
+
+        avgdl = float(self.doc_len.mean()) or 1.0
+        norm = self.k1 * (1 - self.b + self.b * self.doc_len / avgdl)
+        scores = np.zeros(n_docs, dtype=np.float32)
+
+        for term in set(tokenize(query)):
+            t = self.vocab.get(term)
+            if t is None or t + 1 >= len(self.indptr):
+                continue
+            start, end = self.indptr[t], self.indptr[t + 1]
+            if start == end:
+                continue
+            rows = self.rows[start:end]
+            tf = self.tfs[start:end].astype(np.float32)
+            df = end - start
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            scores[rows] += idf * tf * (self.k1 + 1) / (tf + norm[rows])
+
+        matched = np.flatnonzero(scores > 0)
+        if len(matched) > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(int(self.doc_ids[r]), float(scores[r])) for r in matched]
+
+    # ---------- persistência ----------
+
+    def save(self, path: str):
+        self._compact()
+        terms = np.array(sorted(self.vocab, key=self.vocab.get), dtype=str)
+        np.savez(
+            path,
+            terms=terms,
+            doc_ids=self.doc_ids,
+            doc_len=self.doc_len,
+            indptr=self.indptr,
+            rows=self.rows,
+            tfs=self.tfs,
+            params=np.array([self.k1, self.b]),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with np.load(path) as data:
+            k1, b = data["params"].tolist()
+            index = cls(k1, b)
+            index.vocab = {t: i for i, t in enumerate(data["terms"].tolist())}
+            index.doc_ids = data["doc_ids"]
+            index.doc_len = data["doc_len"]
+            index.indptr = data["indptr"]
+            index.rows = data["rows"]
+            index.tfs = data["tfs"]
+        return index
+
+
+# ================================
+# 🔹 Fusão por posição (RRF)
+# ================================
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(rankings: list[list[int]], k: int = RRF_K) -> list[tuple[int, float]]:
+    """
+    Combina listas ordenadas de ids: score(id) = Σ 1 / (k + posição).
+    Não depende da escala dos scores (distância L2 vs. BM25).
+    """
+    scores: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
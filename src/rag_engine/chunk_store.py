@@ -0,0 +1,156 @@
+import os
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Iterator
+
+import numpy as np
+
+
+# ================================
+# 🔹 Tabela de chunks (offsets + blob)
+# ================================
+class ChunkStore:
+    """
+    Texto dos chunks em UTF-8 num único blob, endereçado por offsets.
+
+    Interface de dicionário (id -> texto) para o VectorStore. Os ids são
+    crescentes, então a busca é binária sobre um array de int64. O que
+    foi salvo fica memory-mapped (`chunks.ids.npy`, `chunks.offsets.npy`,
+    `chunks.blob`); chunks novos ficam num blob em memória até o próximo
+    `save`. Remoções são marcadas e descartadas ao salvar.
+    """
+
+    def __init__(self):
+        # Parte salva (memory-mapped)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._blob = b""
+
+        # Parte nova (em memória)
+        self._tail_ids = array("q")
+        self._tail_offsets = array("q", [0])
+        self._tail_blob = bytearray()
+
+        self._removed: set[int] = set()
+
+    # ---------- localização ----------
+
+    def _locate(self, chunk_id: int) -> tuple[int, int, bool] | None:
+        if chunk_id in self._removed:
+            return None
+
+        row = int(np.searchsorted(self._ids, chunk_id))
+        if row < len(self._ids) and self._ids[row] == chunk_id:
+            return int(self._offsets[row]), int(self._offsets[row + 1]), False
+
+        row = bisect_left(self._tail_ids, chunk_id)
+        if row < len(self._tail_ids) and self._tail_ids[row] == chunk_id:
+            return self._tail_offsets[row], self._tail_offsets[row + 1], True
+        return None
+
+    def __getitem__(self, chunk_id: int) -> str:
+        location = self._locate(chunk_id)
+        if location is None:
+            raise KeyError(chunk_id)
+        start, end, in_tail = location
+        blob = self._tail_blob if in_tail else self._blob
+        return bytes(blob[start:end]).decode("utf-8")
+
+    def get(self, chunk_id: int, default=None):
+        try:
+            return self[chunk_id]
+        except KeyError:
+            return default
+
+    def __contains__(self, chunk_id: int) -> bool:
+        return self._locate(chunk_id) is not None
+
+    def __len__(self) -> int:
+        return len(self._ids) + len(self._tail_ids) - len(self._removed)
+
+    # ---------- escrita ----------
+
+    def update(self, items: Iterable[tuple[int, str]]):
+        for chunk_id, text in items:
+            last = self._tail_ids[-1] if self._tail_ids else (self._ids[-1] if len(self._ids) else -1)
+            if chunk_id <= last:
+                raise ValueError("ChunkStore espera ids crescentes.")
+            self._tail_blob += text.encode("utf-8")
+            self._tail_ids.append(chunk_id)
+            self._tail_offsets.append(len(self._tail_blob))
+
+    def pop(self, chunk_id: int, default=None):
+        text = self.get(chunk_id)
+        if text is None:
+            return default
+        self._removed.add(chunk_id)
+        return text
+
+    # ---------- iteração ----------
+
+    def keys(self) -> Iterator[int]:
+        for chunk_id in self._ids.tolist():
+            if chunk_id not in self._removed:
+                yield chunk_id
+        for chunk_id in self._tail_ids:
+            if chunk_id not in self._removed:
+                yield chunk_id
+
+    __iter__ = keys
+
+    def values(self) -> Iterator[str]:
+        for _, text in self.items():
+            yield text
+
+    def items(self) -> Iterator[tuple[int, str]]:
+        for chunk_id in self.keys():
+            yield chunk_id, self[chunk_id]
+
+    def memory_bytes(self) -> int:
+        """Bytes em memória (a parte memory-mapped fica a cargo do page cache)."""
+        return len(self._tail_blob) + self._tail_ids.itemsize * (len(self._tail_ids) + len(self._tail_offsets))
+
+    # ---------- persistência ----------
+
+    def save(self, path: str):
+        """Grava ids/offsets/blob compactados e passa a mapeá-los."""
+        os.makedirs(path, exist_ok=True)
+
+        ids, lengths = [], []
+        blob_path = os.path.join(path, "chunks.blob")
+        with open(blob_path + ".tmp", "wb") as f:
+            for chunk_id in self.keys():
+                start, end, in_tail = self._locate(chunk_id)
+                f.write((self._tail_blob if in_tail else self._blob)[start:end])
+                ids.append(chunk_id)
+                lengths.append(end - start)
+
+        offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        # Os arquivos antigos podem estar mapeados por este mesmo processo
+        for name, data in (("chunks.ids.npy", np.asarray(ids, dtype=np.int64)), ("chunks.offsets.npy", offsets)):
+            np.save(os.path.join(path, name + ".tmp.npy"), data)
+            os.replace(os.path.join(path, name + ".tmp.npy"), os.path.join(path, name))
+        os.replace(blob_path + ".tmp", blob_path)
+
+        loaded = ChunkStore.load(path)
+        self.__dict__.update(loaded.__dict__)
+
+    @classmethod
+    def load(cls, path: str) -> "ChunkStore":
+        store = cls()
+        store._ids = np.load(os.path.join(path, "chunks.ids.npy"), mmap_mode="r")
+        store._offsets = np.load(os.path.join(path, "chunks.offsets.npy"), mmap_mode="r")
+
+        blob_path = os.path.join(path, "chunks.blob")
+        # np.memmap não aceita arquivo vazio
+        if os.path.getsize(blob_path) > 0:
+            store._blob = np.memmap(blob_path, dtype=np.uint8, mode="r")
+        return store
+
+    @classmethod
+    def from_items(cls, items: Iterable[tuple[int, str]]) -> "ChunkStore":
+        store = cls()
+        store.update(sorted(items))
+        return store
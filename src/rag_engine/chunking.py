@@ -0,0 +1,168 @@
+import re
+from typing import Callable, Iterator, NamedTuple
+
+
+# ================================
+# 🔹 Chunk com offsets no texto original
+# ================================
+class Chunk(NamedTuple):
+    text: str
+    start: int
+    end: int
+
+
+_WORD = re.compile(r"\S+")
+_SENTENCE = re.compile(r"[^.!?\n]+(?:[.!?]+|$)|\n", re.MULTILINE)
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def _windows(spans: list[tuple[int, int]], size: int, overlap: int) -> Iterator[tuple[int, int]]:
+    # Janelas de `size` unidades avançando `size - overlap`; retorna offsets
+    if not spans:
+        return
+    stride = max(1, size - overlap)
+    for first in range(0, len(spans), stride):
+        last = min(first + size, len(spans)) - 1
+        yield spans[first][0], spans[last][1]
+        if last == len(spans) - 1:
+            break
+
+
+# ================================
+# 🔹 Estratégias
+# ================================
+class WordChunker:
+    """Janelas de `size` palavras com `overlap` palavras repetidas."""
+
+    def __init__(self, size: int = 400, overlap: int = 0):
+        self.size = size
+        self.overlap = overlap
+
+    def chunk(self, text: str) -> Iterator[Chunk]:
+        spans = [m.span() for m in _WORD.finditer(text)]
+        for start, end in _windows(spans, self.size, self.overlap):
+            yield Chunk(text[start:end], start, end)
+
+
+class TokenChunker:
+    """
+    Janelas medidas no tokenizer do próprio embedder, para que nenhum chunk
+    passe do limite do modelo (256 tokens no all-MiniLM-L6-v2) e seja truncado.
+
+    `tokenizer` é um tokenizer "fast" do HuggingFace (precisa de offsets).
+    """
+
+    # [CLS] e [SEP] contam no limite do modelo
+    SPECIAL_TOKENS = 2
+
+    def __init__(self, tokenizer, max_tokens: int = 256, overlap: int = 32):
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.overlap = overlap
+
+    def chunk(self, text: str) -> Iterator[Chunk]:
+        encoding = self.tokenizer(
+            text,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            truncation=False,
+            verbose=False,
+        )
+        spans = [tuple(span) for span in encoding["offset_mapping"]]
+        budget = self.max_tokens - self.SPECIAL_TOKENS
+        for start, end in _windows(spans, budget, self.overlap):
+            yield Chunk(text[start:end], start, end)
+
+
+class SentenceChunker:
+    """
+    Agrupa frases inteiras até `max_tokens`, repetindo `overlap_sentences`
+    frases entre chunks vizinhos. Quebras de parágrafo fecham o chunk.
+
+    `count_tokens` mede cada frase (por padrão, ~1.3 tokens por palavra).
+    Frases maiores que o limite são cortadas por palavras.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 256,
+        overlap_sentences: int = 1,
+        count_tokens: Callable[[str], int] | None = None,
+        respect_paragraphs: bool = True,
+    ):
+        self.max_tokens = max_tokens
+        self.overlap_sentences = overlap_sentences
+        self.count_tokens = count_tokens or _approx_tokens
+        self.respect_paragraphs = respect_paragraphs
+
+    def _sentences(self, text: str) -> Iterator[tuple[int, int, bool]]:
+        # (início, fim, começa_parágrafo)
+        breaks = [m.end() for m in _PARAGRAPH_BREAK.finditer(text)] if self.respect_paragraphs else []
+        next_break = 0
+        for m in _SENTENCE.finditer(text):
+            start, end = m.span()
+            while start < end and text[start].isspace():
+                start += 1
+            if start == end:
+                continue
+
+            new_paragraph = False
+            while next_break < len(breaks) and breaks[next_break] <= start:
+                new_paragraph = True
+                next_break += 1
+            yield start, end, new_paragraph
+
+    def chunk(self, text: str) -> Iterator[Chunk]:
+        current: list[tuple[int, int, int]] = []  # (início, fim, tokens)
+        used = 0
+
+        def emit():
+            start, end = current[0][0], current[-1][1]
+            return Chunk(text[start:end], start, end)
+
+        for start, end, new_paragraph in self._sentences(text):
+            tokens = self.count_tokens(text[start:end])
+
+            if tokens > self.max_tokens:
+                if current:
+                    yield emit()
+                    current, used = [], 0
+                # Frase gigante: corta por palavras dentro dela
+                words = int(self.max_tokens / 1.3) or 1
+                for piece in WordChunker(words).chunk(text[start:end]):
+                    yield Chunk(piece.text, start + piece.start, start + piece.end)
+                continue
+
+            if current and (used + tokens > self.max_tokens or new_paragraph):
+                yield emit()
+                keep = current[-self.overlap_sentences:] if self.overlap_sentences and not new_paragraph else []
+                current = keep
+                used = sum(t for _, _, t in keep)
+                if used + tokens > self.max_tokens:
+                    current, used = [], 0
+
+            current.append((start, end, tokens))
+            used += tokens
+
+        if current:
+            yield emit()
+
+
+def _approx_tokens(text: str) -> int:
+    return int(len(text.split()) * 1.3) + 1
+
+
+# ================================
+# 🔹 Registro de estratégias
+# ================================
+CHUNKERS = {
+    "words": WordChunker,
+    "tokens": TokenChunker,
+    "sentences": SentenceChunker,
+}
+
+
+def get_chunker(name: str, **kwargs):
+    if name not in CHUNKERS:
+        raise ValueError(f"Chunker desconhecido: {name}. Use um de {list(CHUNKERS)}.")
+    return CHUNKERS[name](**kwargs)
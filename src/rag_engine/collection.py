@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+from src.rag_engine.answer_cache import SemanticAnswerCache
+from src.rag_engine.chunking import Chunk
+from src.rag_engine.ingest import iter_chunks, iter_pages
+from src.rag_engine.context import ContextBuilder, default_context_builder
+from src.rag_engine.rag_real import (
+    ANSWER_MODEL,
+    SearchHit,
+    VectorStore,
+    default_chunker,
+    generate_answer,
+    generate_answer_stream,
+)
+from src.rag_engine.rerank import RERANK_CANDIDATES, Reranker
+
+if TYPE_CHECKING:
+    from groq import Groq
+
+
+# ================================
+# 🔹 Coleção de documentos persistente
+# ================================
+class DocumentCollection:
+    """
+    Vários documentos num único VectorStore, endereçados por id.
+
+    Documentos podem ser adicionados/removidos sem reconstruir o índice, e a
+    coleção inteira (índice FAISS + tabela de chunks) é salva em disco para
+    responder muitas perguntas sem reprocessar as fontes.
+
+    Com `reranker`, `ask` busca `RERANK_CANDIDATES * top_k` candidatos e
+    manda ao modelo só os melhores, dentro de `max_context_tokens`.
+    O contexto final passa pelo `context_builder` (sem quase-duplicatas,
+    dentro de `max_context_tokens` ou do orçamento do modelo de resposta).
+
+    Com `answer_cache`, perguntas parecidas com uma já respondida (sobre a
+    mesma `version` da coleção) voltam do cache sem busca nem geração.
+
+    Pode ser compartilhada entre threads: ingestão, remoção e busca passam
+    pelo mesmo lock (a busca BM25 consolida o índice na primeira consulta);
+    só a geração da resposta roda fora dele.
+    """
+
+    def __init__(
+        self,
+        store: VectorStore | None = None,
+        chunker=None,
+        reranker: Reranker | None = None,
+        max_context_tokens: int | None = None,
+        context_builder: ContextBuilder | None = None,
+        answer_cache: SemanticAnswerCache | None = None,
+    ):
+        self.store = store or VectorStore()
+        self._chunker = chunker
+        self.reranker = reranker
+        self.max_context_tokens = max_context_tokens
+        self.context_builder = context_builder or default_context_builder
+        self.answer_cache = answer_cache
+        self._version: str | None = None
+        # doc_id -> {"chunk_ids": [...], "spans": [[início, fim], ...], "fingerprint": "..."}
+        self.documents: dict[str, dict] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def chunker(self):
+        # O chunker padrão usa o tokenizer do embedder: só carrega quando for ingerir
+        if self._chunker is None:
+            self._chunker = default_chunker()
+        return self._chunker
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.documents
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    @property
+    def version(self) -> str:
+        """Muda sempre que um documento entra, sai ou é atualizado."""
+        with self._lock:
+            if self._version is not None:
+                return self._version
+            state = sorted(
+                (doc_id, doc["fingerprint"], doc["chunk_ids"][:1], len(doc["chunk_ids"]))
+                for doc_id, doc in self.documents.items()
+            )
+            self._version = hashlib.sha1(json.dumps(state).encode("utf-8")).hexdigest()
+            return self._version
+
+    def _changed(self):
+        if self.answer_cache is not None and self._version is not None:
+            self.answer_cache.drop(self._version)
+        self._version = None
+
+    # ---------- escrita ----------
+
+    def add_document(self, doc_id: str, text: str, fingerprint: str | None = None) -> int:
+        fingerprint = fingerprint or hashlib.sha1(text.encode("utf-8")).hexdigest()
+        return self._add_chunks(doc_id, self.chunker.chunk(text), fingerprint)
+
+    def _add_chunks(self, doc_id: str, chunks: Iterable[Chunk], fingerprint: str | None) -> int:
+        spans = []
+
+        def texts():
+            for chunk in chunks:
+                spans.append([chunk.start, chunk.end])
+                yield chunk.text
+
+        with self._lock:
+            # Ids anotados lote a lote: se a ingestão falhar no meio (PDF
+            # corrompido, erro no embedder), os chunks já indexados saem e a
+            # versão anterior do documento continua intacta
+            chunk_ids = []
+            try:
+                for batch_ids in self.store.iter_add(texts()):
+                    chunk_ids += batch_ids
+            except BaseException:
+                self.store.remove(chunk_ids)
+                raise
+
+            if doc_id in self.documents:
+                self.remove_document(doc_id)
+            self.documents[doc_id] = {"chunk_ids": chunk_ids, "spans": spans, "fingerprint": fingerprint}
+            self._changed()
+            return len(chunk_ids)
+
+    def add_file(self, path: str, doc_id: str | None = None) -> bool:
+        """
+        Adiciona (ou atualiza) um arquivo. Retorna False se ele já está
+        na coleção e não mudou desde a última ingestão.
+        """
+        doc_id = doc_id or os.path.abspath(path)
+        stat = os.stat(path)
+        fingerprint = f"{stat.st_size}:{stat.st_mtime_ns}"
+
+        with self._lock:
+            current = self.documents.get(doc_id)
+            if current and current["fingerprint"] == fingerprint:
+                return False
+
+            # Páginas -> chunks -> embeddings em lotes, sem carregar o arquivo inteiro
+            self._add_chunks(doc_id, iter_chunks(iter_pages(path), self.chunker), fingerprint)
+            return True
+
+    def remove_document(self, doc_id: str):
+        with self._lock:
+            doc = self.documents.pop(doc_id, None)
+            if doc:
+                self.store.remove(doc["chunk_ids"])
+                self._changed()
+
+    # ---------- leitura ----------
+
+    def search(self, question: str, top_k: int = 3, mode: str | None = None) -> list[str]:
+        with self._lock:
+            return self.store.search(question, top_k=top_k, mode=mode)
+
+    def search_batch(
+        self, questions: list[str], top_k: int = 3, mode: str | None = None, vectors=None
+    ) -> list[list[SearchHit]]:
+        with self._lock:
+            return self.store.search_batch(questions, top_k=top_k, mode=mode, vectors=vectors)
+
+    def retrieve(self, question: str, top_k: int = 3, vector=None) -> list[str]:
+        """Chunks que vão para o prompt (com rerank, se configurado)."""
+        vectors = None if vector is None else vector.reshape(1, -1)
+        if self.reranker is None:
+            return [hit.text for hit in self.search_batch([question], top_k=top_k, vectors=vectors)[0]]
+
+        candidates = self.search_batch([question], top_k=top_k * RERANK_CANDIDATES, vectors=vectors)[0]
+        hits = self.reranker.rerank(
+            question,
+            candidates,
+            top_k=top_k,
+            max_tokens=self.max_context_tokens,
+            count_tokens=self.context_builder.count_tokens,
+        )
+        return [hit.text for hit in hits]
+
+    def _context(self, question: str, top_k: int, vector=None):
+        # `max_context_tokens` limita também o contexto final; sem ele vale o
+        # orçamento do modelo de resposta
+        chunks = self.retrieve(question, top_k=top_k, vector=vector)
+        return self.context_builder.build(chunks, model=ANSWER_MODEL, max_tokens=self.max_context_tokens)
+
+    def _cached_answer(self, question: str, version: str):
+        if self.answer_cache is None:
+            return None, None
+        # Vetor de consulta: não grava a pergunta no cache de embeddings em disco
+        vector = self.store.encode([question], queries=True)[0]
+        return vector, self.answer_cache.get(vector, version)
+
+    def ask(self, question: str, groq_client: Groq, top_k: int = 3) -> str:
+        # A resposta fica associada à versão em que a busca foi feita, mesmo
+        # que a coleção mude durante a geração
+        version = self.version
+        vector, cached = self._cached_answer(question, version)
+        if cached is not None:
+            return cached
+
+        context = self._context(question, top_k, vector)
+        answer = generate_answer(context.text, question, groq_client)
+
+        if vector is not None:
+            self.answer_cache.put(vector, version, question, answer)
+        return answer
+
+    def ask_stream(
+        self, question: str, groq_client: Groq, top_k: int = 3, cancel: threading.Event | None = None
+    ) -> Iterator[dict]:
+        version = self.version
+        vector, cached = self._cached_answer(question, version)
+        if cached is not None:
+            yield {"type": "delta", "text": cached}
+            yield {"type": "done", "answer": cached, "cached": True}
+            return
+
+        context = self._context(question, top_k, vector)
+        yield {"type": "retrieved", "chunks": len(context.chunks), "tokens": context.tokens}
+
+        parts = []
+        for text in generate_answer_stream(context.text, question, groq_client, cancel):
+            parts.append(text)
+            yield {"type": "delta", "text": text}
+        answer = "".join(parts)
+
+        # Resposta interrompida não vai para o cache
+        if vector is not None and not (cancel is not None and cancel.is_set()):
+            self.answer_cache.put(vector, version, question, answer)
+        yield {"type": "done", "answer": answer}
+
+    # ---------- persistência ----------
+
+    def save(self, path: str):
+        with self._lock:
+            self.store.save(path)
+            with open(os.path.join(path, "documents.json"), "w", encoding="utf-8") as f:
+                json.dump(self.documents, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str, embedder=None, chunker=None, **options) -> "DocumentCollection":
+        collection = cls(VectorStore.load(path, embedder), chunker, **options)
+        with open(os.path.join(path, "documents.json"), "r", encoding="utf-8") as f:
+            collection.documents = json.load(f)
+        collection._version = None
+        return collection
+
+    @classmethod
+    def open(cls, path: str, embedder=None, chunker=None, **options) -> "DocumentCollection":
+        if os.path.exists(os.path.join(path, "documents.json")):
+            return cls.load(path, embedder, chunker, **options)
+        return cls(VectorStore(embedder), chunker, **options)
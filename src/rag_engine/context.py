@@ -0,0 +1,124 @@
+import hashlib
+import re
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+from src.agent_core.router import estimate_tokens
+
+
+# ================================
+# 🔹 MinHash (quase-duplicatas)
+# ================================
+_WORD = re.compile(r"\w+")
+_NUM_PERM = 64
+
+# Uma semente por "permutação"; o mix do splitmix64 espalha os bits
+_SEEDS = np.random.default_rng(1).integers(0, 2**63, _NUM_PERM, dtype=np.uint64)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+
+def _mix(x: np.ndarray) -> np.ndarray:
+    x = (x ^ (x >> np.uint64(30))) * _MIX1
+    x = (x ^ (x >> np.uint64(27))) * _MIX2
+    return x ^ (x >> np.uint64(31))
+
+
+def minhash(text: str, shingle: int = 3) -> np.ndarray:
+    """Assinatura MinHash (64 permutações) dos shingles de `shingle` palavras."""
+    words = _WORD.findall(text.lower())
+    if len(words) < shingle:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + shingle]) for i in range(len(words) - shingle + 1)}
+
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    return _mix(hashes[:, None] ^ _SEEDS).min(axis=0)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimativa da similaridade de Jaccard entre os conjuntos de shingles."""
+    return float(np.mean(a == b))
+
+
+# ================================
+# 🔹 Montagem do contexto
+# ================================
+# Tokens de contexto por modelo de resposta (o resto da janela fica para
+# instruções, pergunta e resposta)
+CONTEXT_BUDGETS = {
+    "llama3-70b-8192": 3000,
+    "llama3-8b-8192": 3000,
+    "mixtral-8x7b-32768": 8000,
+    "llama-3.1-70b-versatile": 8000,
+    "llama-3.1-8b-instant": 8000,
+}
+DEFAULT_CONTEXT_BUDGET = 3000
+
+
+class PackedContext(NamedTuple):
+    text: str
+    chunks: list[str]
+    tokens: int
+    duplicates: int       # descartados por serem quase iguais a um já incluído
+    over_budget: int      # descartados por não caberem no orçamento
+
+
+class ContextBuilder:
+    """
+    Transforma os chunks recuperados (em ordem de relevância) no contexto
+    do prompt: descarta quase-duplicatas (Jaccard estimado por MinHash
+    acima de `max_similarity` contra um chunk já incluído) e empacota os
+    mais relevantes até o orçamento de tokens.
+
+    A contagem padrão é a estimativa do router (~4 caracteres por token,
+    O(1) por chunk); passe `count_tokens` com o tokenizer do modelo de
+    resposta para orçamentos exatos.
+    """
+
+    def __init__(
+        self,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+        max_similarity: float = 0.8,
+        separator: str = "\n\n",
+    ):
+        self.count_tokens = count_tokens
+        self.max_similarity = max_similarity
+        self.separator = separator
+
+    def build(self, chunks: list[str], model: str | None = None, max_tokens: int | None = None) -> PackedContext:
+        if max_tokens is None:
+            max_tokens = CONTEXT_BUDGETS.get(model, DEFAULT_CONTEXT_BUDGET)
+
+        separator_tokens = self.count_tokens(self.separator)
+        selected, signatures = [], []
+        used = duplicates = over_budget = 0
+
+        for text in chunks:
+            text = text.strip()
+            if not text:
+                continue
+
+            signature = minhash(text)
+            if any(similarity(signature, other) >= self.max_similarity for other in signatures):
+                duplicates += 1
+                continue
+
+            tokens = self.count_tokens(text) + (separator_tokens if selected else 0)
+            if used + tokens > max_tokens:
+                over_budget += 1
+                continue
+
+            selected.append(text)
+            signatures.append(signature)
+            used += tokens
+
+        return PackedContext(self.separator.join(selected), selected, used, duplicates, over_budget)
+
+
+default_context_builder = ContextBuilder()
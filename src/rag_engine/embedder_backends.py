@@ -0,0 +1,175 @@
+"""
+Backends de CPU para o embedder, todos com a mesma interface
+`encode(texts)` do SentenceTransformer:
+
+- torch:      SentenceTransformer em float32 (referência)
+- torch-int8: quantização dinâmica int8 das camadas Linear (torch)
+- onnx:       modelo exportado para ONNX Runtime
+- onnx-int8:  ONNX com quantização dinâmica int8 (onnxruntime)
+
+Exportação manual (opcional, o primeiro uso exporta sozinho):
+    python -m src.rag_engine.embedder_backends --model all-MiniLM-L6-v2
+"""
+import argparse
+import os
+
+import numpy as np
+
+from src.model_registry import LazyModel, register, sentence_transformer
+
+
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+ONNX_DIR = os.getenv("RAG_ONNX_DIR", ".cache/onnx")
+
+
+def _hub_name(model_name: str) -> str:
+    # Nomes curtos do sentence-transformers vivem no namespace oficial
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+
+# ================================
+# 🔹 torch int8 (quantização dinâmica)
+# ================================
+def load_torch_int8(model_name: str):
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device="cpu")
+    # Pesos das Linear em int8; ativações quantizadas em tempo de execução
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+# ================================
+# 🔹 ONNX Runtime
+# ================================
+def export_onnx(model_name: str, out_dir: str | None = None, quantize: bool = True) -> str:
+    """
+    Exporta o transformer (sem pooling) para `out_dir/model.onnx` e, com
+    `quantize`, gera também `model.int8.onnx`. Retorna o diretório.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    out_dir = out_dir or os.path.join(ONNX_DIR, model_name.replace("/", "__"))
+    os.makedirs(out_dir, exist_ok=True)
+    fp32_path = os.path.join(out_dir, "model.onnx")
+
+    if not os.path.exists(fp32_path):
+        tokenizer = AutoTokenizer.from_pretrained(_hub_name(model_name))
+        model = AutoModel.from_pretrained(_hub_name(model_name)).eval()
+        sample = tokenizer(["exportação"], return_tensors="pt")
+        inputs = tuple(sample[name] for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample)
+        names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                inputs,
+                fp32_path,
+                input_names=names,
+                output_names=["last_hidden_state"],
+                dynamic_axes={**{n: {0: "batch", 1: "seq"} for n in names}, "last_hidden_state": {0: "batch", 1: "seq"}},
+                opset_version=14,
+            )
+        tokenizer.save_pretrained(out_dir)
+
+    int8_path = os.path.join(out_dir, "model.int8.onnx")
+    if quantize and not os.path.exists(int8_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+
+    return out_dir
+
+
+class OnnxEmbedder:
+    """
+    Transformer no ONNX Runtime + mean pooling e normalização L2 em numpy
+    (o mesmo que os módulos Pooling/Normalize do all-MiniLM-L6-v2).
+    """
+
+    def __init__(self, model_name: str, int8: bool = False, threads: int | None = None, max_seq_length: int = 256):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = export_onnx(model_name, quantize=int8)
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        path = os.path.join(model_dir, "model.int8.onnx" if int8 else "model.onnx")
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_seq_length = max_seq_length
+
+    def encode(self, texts, batch_size: int = 32, **kwargs) -> np.ndarray:
+        if isinstance(texts, str):
+            return self.encode([texts], batch_size)[0]
+
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        # Ordena por tamanho: lotes com pouco padding
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        parts = []
+
+        for start in range(0, len(order), batch_size):
+            batch = [texts[i] for i in order[start:start + batch_size]]
+            encoded = self.tokenizer(
+                batch, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np"
+            )
+            feeds = {k: v.astype(np.int64) for k, v in encoded.items() if k in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            parts.append(pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None))
+
+        out = np.empty((len(texts), parts[0].shape[1]), dtype=np.float32)
+        out[order] = np.concatenate(parts)
+        return out
+
+
+# ================================
+# 🔹 Seleção do backend
+# ================================
+def load_tokenizer(model_name: str = "all-MiniLM-L6-v2") -> LazyModel:
+    """Só o tokenizer do embedder (sem os pesos), para contar tokens e fatiar texto."""
+    name = f"tokenizer:{model_name}"
+
+    def load():
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(_hub_name(model_name))
+
+    register(name, load)
+    return LazyModel(name)
+
+
+def load_embedder(model_name: str = "all-MiniLM-L6-v2", backend: str = "torch", threads: int | None = None) -> LazyModel:
+    """Embedder preguiçoso no backend pedido (ver BACKENDS)."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend desconhecido: {backend}. Use um de {BACKENDS}.")
+    if backend == "torch":
+        return sentence_transformer(model_name)
+
+    name = f"embedder:{model_name}:{backend}"
+    if backend == "torch-int8":
+        register(name, lambda: load_torch_int8(model_name))
+    else:
+        register(name, lambda: OnnxEmbedder(model_name, int8=backend == "onnx-int8", threads=threads))
+    return LazyModel(name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta o embedder para ONNX (fp32 + int8)")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+
+    print(export_onnx(args.model, args.out, quantize=not args.no_quantize))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+# ================================
+# 🔹 Cache de embeddings em disco
+# ================================
+class EmbeddingCache:
+    """
+    Cache endereçado por conteúdo: sha1(modelo + texto) -> vetor float32.
+
+    Os vetores ficam numa matriz memory-mapped (`vectors.f32`) com
+    `max_entries` linhas. A posição de cada chave vai para um log só de
+    acréscimo (`index.log`, uma linha "chave slot" por escrita), então
+    persistir custa só as linhas novas; o log é compactado quando fica
+    muito maior que o número de chaves. Quando cheio, a linha menos usada
+    recentemente é reutilizada (após reiniciar, a ordem LRU é a das escritas).
+
+    Seguro entre threads: consulta, alocação e persistência são feitas
+    sob o mesmo lock.
+    """
+
+    # Compacta o log quando ele passa de COMPACT_FACTOR * chaves
+    COMPACT_FACTOR = 2
+
+    def __init__(self, path: str, model_name: str, max_entries: int = 200_000):
+        self.path = path
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.dim = None
+        self.slots: OrderedDict[str, int] = OrderedDict()
+        # Slots livres abaixo de `_next_slot` (chaves descartadas no replay)
+        self._free: list[int] = []
+        self._next_slot = 0
+        self.vectors = None
+        self._log = None
+        self._log_lines = 0
+        self._lock = threading.RLock()
+        self._load()
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.path, "vectors.f32")
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.path, "meta.json")
+
+    @property
+    def _log_path(self) -> str:
+        return os.path.join(self.path, "index.log")
+
+    @property
+    def _legacy_index_path(self) -> str:
+        return os.path.join(self.path, "index.json")
+
+    def _load(self):
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            entries = self._read_log()
+        elif os.path.exists(self._legacy_index_path):
+            # Formato antigo: índice inteiro num JSON
+            with open(self._legacy_index_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            entries = meta.get("entries", [])
+        else:
+            return
+
+        # Capacidade diferente invalida o arquivo de vetores
+        if meta.get("max_entries") != self.max_entries or not os.path.exists(self._vectors_path):
+            return
+
+        self.dim = meta["dim"]
+        self.slots = OrderedDict()
+        owners: dict[int, str] = {}
+        for key, slot in entries:
+            if slot >= self.max_entries:
+                continue
+            # Slot reaproveitado por uma remoção LRU: o dono anterior perdeu o vetor
+            previous = owners.get(slot)
+            if previous is not None and previous != key:
+                del self.slots[previous]
+            old_slot = self.slots.pop(key, None)
+            if old_slot is not None and old_slot != slot:
+                del owners[old_slot]
+            self.slots[key] = slot
+            owners[slot] = key
+
+        self._next_slot = max(owners) + 1 if owners else 0
+        self._free = sorted(set(range(self._next_slot)) - owners.keys(), reverse=True)
+        self.vectors = np.memmap(
+            self._vectors_path, dtype=np.float32, mode="r+", shape=(self.max_entries, self.dim)
+        )
+        self._compact()
+
+    def _read_log(self) -> list:
+        if not os.path.exists(self._log_path):
+            return []
+        entries = []
+        with open(self._log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                # Última linha pode estar incompleta se o processo morreu no meio
+                if len(parts) == 2 and parts[1].isdigit():
+                    entries.append((parts[0], int(parts[1])))
+        return entries
+
+    def _write_meta(self):
+        meta = {"model": self.model_name, "dim": self.dim, "max_entries": self.max_entries}
+        tmp_path = self._meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._meta_path)
+
+    def _compact(self):
+        # Reescreve o log só com a posição atual de cada chave (em ordem LRU)
+        if self._log is not None:
+            self._log.close()
+        tmp_path = self._log_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(f"{key} {slot}\n" for key, slot in self.slots.items())
+        os.replace(tmp_path, self._log_path)
+        self._write_meta()
+        if os.path.exists(self._legacy_index_path):
+            os.remove(self._legacy_index_path)
+        self._log = open(self._log_path, "a", encoding="utf-8")
+        self._log_lines = len(self.slots)
+
+    def _allocate(self, dim: int):
+        os.makedirs(self.path, exist_ok=True)
+        self.dim = dim
+        self.slots.clear()
+        self._free = []
+        self._next_slot = 0
+        self.vectors = np.memmap(
+            self._vectors_path, dtype=np.float32, mode="w+", shape=(self.max_entries, dim)
+        )
+        self._compact()
+
+    def key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        with self._lock:
+            slot = self.slots.get(key)
+            if slot is None:
+                return None
+            self.slots.move_to_end(key)
+            # Cópia: o slot pode ser reaproveitado por outra thread depois
+            return np.array(self.vectors[slot])
+
+    def put(self, key: str, vector: np.ndarray):
+        with self._lock:
+            if self.vectors is None or self.dim != vector.shape[-1]:
+                self._allocate(vector.shape[-1])
+
+            if key in self.slots:
+                slot = self.slots[key]
+                self.slots.move_to_end(key)
+            elif self._free:
+                slot = self._free.pop()
+                self.slots[key] = slot
+            elif self._next_slot < self.max_entries:
+                slot = self._next_slot
+                self._next_slot += 1
+                self.slots[key] = slot
+            else:
+                _, slot = self.slots.popitem(last=False)
+                self.slots[key] = slot
+
+            self.vectors[slot] = vector
+            self._log.write(f"{key} {slot}\n")
+            self._log_lines += 1
+
+    def flush(self):
+        with self._lock:
+            if self.vectors is None:
+                return
+            # Vetores antes do log: uma chave no log sempre aponta para dados gravados
+            self.vectors.flush()
+            self._log.flush()
+            if self._log_lines > self.COMPACT_FACTOR * len(self.slots) + 1000:
+                self._compact()
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+
+# ================================
+# 🔹 Embedder com cache
+# ================================
+class CachedEmbedder:
+    """
+    Mesmo `encode` do SentenceTransformer, mas só roda o modelo nos textos
+    que ainda não estão no cache. Pode ser chamado de várias threads.
+    """
+
+    def __init__(self, embedder, cache: EmbeddingCache):
+        self.embedder = embedder
+        self.cache = cache
+
+    def encode(self, texts: list[str], **kwargs) -> np.ndarray:
+        keys = [self.cache.key(t) for t in texts]
+        found = [self.cache.get(k) for k in keys]
+
+        missing = [i for i, vec in enumerate(found) if vec is None]
+        if missing:
+            # Textos repetidos no mesmo lote são codificados uma vez só
+            unique = list(dict.fromkeys(texts[i] for i in missing))
+            # O modelo roda fora do lock do cache
+            fresh = np.asarray(self.embedder.encode(unique, **kwargs), dtype=np.float32)
+            by_text = dict(zip(unique, fresh))
+
+            for i in missing:
+                found[i] = by_text[texts[i]]
+                self.cache.put(keys[i], found[i])
+            self.cache.flush()
+
+        return self._stack(found)
+
+    def encode_queries(self, texts: list[str], **kwargs) -> np.ndarray:
+        """
+        Para consultas: aproveita o que já está no cache, mas não grava os
+        textos novos (perguntas raramente se repetem e encheriam o disco).
+        """
+        found = [self.cache.get(self.cache.key(t)) for t in texts]
+        missing = [i for i, vec in enumerate(found) if vec is None]
+        if missing:
+            fresh = np.asarray(self.embedder.encode([texts[i] for i in missing], **kwargs), dtype=np.float32)
+            for i, vec in zip(missing, fresh):
+                found[i] = vec
+        return self._stack(found)
+
+    def _stack(self, found: list) -> np.ndarray:
+        if not found:
+            return np.zeros((0, self.cache.dim or 0), dtype=np.float32)
+        return np.stack(found).astype(np.float32, copy=False)
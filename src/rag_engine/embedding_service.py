@@ -0,0 +1,334 @@
+"""
+Serviço de embeddings compartilhado: junta pedidos concorrentes em
+micro-lotes (tamanho máximo / espera máxima) antes de chamar o modelo.
+
+Uso como processo separado (um único conjunto de pesos para vários
+processos, via socket Unix):
+    python -m src.rag_engine.embedding_service --socket /tmp/aiml-embed.sock --threads 4
+    RAG_EMBEDDING_SOCKET=/tmp/aiml-embed.sock python agent_terminal.py
+"""
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import Future
+from typing import NamedTuple
+
+import numpy as np
+
+from src.model_registry import LazyModel, register
+from src.rag_engine.embedder_backends import BACKENDS, load_embedder
+from src.telemetry import span
+
+
+# ================================
+# 🔹 Micro-batching em processo
+# ================================
+class _Request(NamedTuple):
+    texts: list[str]
+    future: Future
+
+
+class EmbeddingService:
+    """
+    Fila única de pedidos atendida por uma thread que monta micro-lotes:
+    espera até `max_batch_size` textos ou `max_wait_ms` desde o primeiro
+    pedido, o que vier antes.
+
+    Dentro do lote os textos são ordenados por tamanho e divididos em
+    baldes de até `max_batch_size`, para que o padding de cada forward
+    seja pequeno. `threads` limita as threads de CPU do torch.
+
+    `encode(texts)` tem a mesma assinatura do SentenceTransformer, então o
+    serviço pode ser usado como embedder do VectorStore. `model_name` e
+    `backend` identificam os vetores (ver `info`).
+    """
+
+    def __init__(
+        self,
+        model=None,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        threads: int | None = None,
+        model_name: str = "all-MiniLM-L6-v2",
+        backend: str = "torch",
+    ):
+        self.model = model or load_embedder(model_name, backend)
+        self.model_name = model_name
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000
+        self.threads = threads
+        self.batches = 0
+        self.texts = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._worker = threading.Thread(target=self._loop, name="embedding-service", daemon=True)
+        self._worker.start()
+
+    def encode(self, texts, **kwargs) -> np.ndarray:
+        if isinstance(texts, str):
+            return self.encode([texts])[0]
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        future = Future()
+        self._queue.put(_Request(list(texts), future))
+        return future.result()
+
+    def info(self) -> dict:
+        """Modelo, backend e limite de tokens por texto de quem gera os vetores."""
+        return {
+            "model": self.model_name,
+            "backend": self.backend,
+            "max_seq_length": self.model.max_seq_length,
+        }
+
+    def close(self):
+        self._queue.put(None)
+        self._worker.join(timeout=5)
+
+    # ---------- thread do modelo ----------
+
+    def _loop(self):
+        if self.threads:
+            _set_torch_threads(self.threads)
+
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            batch, size = [first], len(first.texts)
+            deadline = time.monotonic() + self.max_wait_s
+            stop = False
+
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                batch.append(request)
+                size += len(request.texts)
+
+            self._run(batch)
+            if stop:
+                return
+
+    def _run(self, batch: list[_Request]):
+        texts = [text for request in batch for text in request.texts]
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+
+        try:
+            with span("embedding", model="service", texts=len(texts), requests=len(batch)):
+                parts = []
+                for start in range(0, len(order), self.max_batch_size):
+                    bucket = order[start:start + self.max_batch_size]
+                    parts.append(np.asarray(
+                        self.model.encode([texts[i] for i in bucket], batch_size=len(bucket), show_progress_bar=False),
+                        dtype=np.float32,
+                    ))
+            vectors = np.empty((len(texts), parts[0].shape[1]), dtype=np.float32)
+            vectors[order] = np.concatenate(parts)
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.texts += len(texts)
+
+        start = 0
+        for request in batch:
+            request.future.set_result(vectors[start:start + len(request.texts)])
+            start += len(request.texts)
+
+
+def _set_torch_threads(threads: int):
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+
+# ================================
+# 🔹 API por socket Unix
+# ================================
+# Quadro: 4 bytes (tamanho, big-endian) + payload. Pedido: JSON
+# {"texts": [...]}. Resposta: quadro JSON {"shape": [n, d]} ou
+# {"error": "..."} seguido (se ok) de um quadro com os float32.
+# Pedido {"info": true}: um quadro JSON com `EmbeddingService.info()`.
+
+def _send_frame(sock: socket.socket, payload: bytes):
+    sock.sendall(struct.pack(">I", len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Conexão fechada pelo outro lado.")
+        data += chunk
+    return bytes(data)
+
+
+def _recv_frame(sock: socket.socket) -> bytes:
+    (size,) = struct.unpack(">I", _recv_exact(sock, 4))
+    return _recv_exact(sock, size)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                request = json.loads(_recv_frame(self.request))
+            except (ConnectionError, OSError):
+                return
+
+            if request.get("info"):
+                _send_frame(self.request, json.dumps(self.server.service.info()).encode("utf-8"))
+                continue
+
+            try:
+                vectors = np.ascontiguousarray(self.server.service.encode(request["texts"]), dtype=np.float32)
+            except Exception as e:
+                _send_frame(self.request, json.dumps({"error": f"{type(e).__name__}: {e}"}).encode("utf-8"))
+                continue
+
+            _send_frame(self.request, json.dumps({"shape": list(vectors.shape)}).encode("utf-8"))
+            _send_frame(self.request, vectors.tobytes())
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Uma thread por conexão; todas alimentam o mesmo `EmbeddingService`."""
+
+    daemon_threads = True
+
+    def __init__(self, path: str, service: EmbeddingService):
+        if os.path.exists(path):
+            os.remove(path)
+        self.service = service
+        super().__init__(path, _Handler)
+
+
+class EmbeddingClient:
+    """Cliente do socket com a mesma API `encode` (uma conexão por cliente)."""
+
+    def __init__(self, path: str, timeout: float = 60.0):
+        self.path = path
+        self.timeout = timeout
+        self._sock: socket.socket | None = None
+        self._info: dict | None = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> socket.socket:
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+            self._sock = sock
+        return self._sock
+
+    def _request(self, request: dict, frames: int) -> list[bytes]:
+        payload = json.dumps(request, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            try:
+                sock = self._connect()
+                _send_frame(sock, payload)
+                replies = [_recv_frame(sock)]
+                header = json.loads(replies[0])
+                if "error" in header:
+                    raise RuntimeError(f"Serviço de embeddings: {header['error']}")
+                replies += [_recv_frame(sock) for _ in range(frames - 1)]
+            except (ConnectionError, OSError):
+                self.close()
+                raise
+        return replies
+
+    def encode(self, texts, **kwargs) -> np.ndarray:
+        if isinstance(texts, str):
+            return self.encode([texts])[0]
+
+        header, data = self._request({"texts": list(texts)}, frames=2)
+        return np.frombuffer(data, dtype=np.float32).reshape(json.loads(header)["shape"])
+
+    def info(self) -> dict:
+        """`info()` do serviço do outro lado (o modelo que gera os vetores é o dele)."""
+        if self._info is None:
+            self._info = json.loads(self._request({"info": True}, frames=1)[0])
+        return self._info
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+# ================================
+# 🔹 Instância compartilhada
+# ================================
+EMBEDDING_SOCKET = os.getenv("RAG_EMBEDDING_SOCKET")
+
+
+def shared_encoder(model_name: str = "all-MiniLM-L6-v2", backend: str = "torch") -> LazyModel:
+    """
+    Embedder do processo: cliente do socket se `RAG_EMBEDDING_SOCKET`
+    estiver definido, senão um `EmbeddingService` local sobre o modelo
+    do registro (no backend pedido, ver `embedder_backends`).
+    """
+    name = f"embedding-service:{model_name}:{backend}"
+
+    def load():
+        if EMBEDDING_SOCKET:
+            return EmbeddingClient(EMBEDDING_SOCKET)
+        return EmbeddingService(load_embedder(model_name, backend), model_name=model_name, backend=backend)
+
+    register(name, load)
+    return LazyModel(name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço local de embeddings (socket Unix)")
+    parser.add_argument("--socket", default="/tmp/aiml-embed.sock")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--backend", choices=BACKENDS, default="torch")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--threads", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    service = EmbeddingService(
+        load_embedder(args.model, args.backend, args.threads),
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        threads=args.threads,
+        model_name=args.model,
+        backend=args.backend,
+    )
+    # Carrega os pesos antes de aceitar conexões
+    service.encode(["aquecimento"])
+
+    with EmbeddingServer(args.socket, service) as server:
+        print(f"🧠 Serviço de embeddings em {args.socket} ({args.model}/{args.backend}, {args.threads} threads)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            service.close()
+
+
+if __name__ == "__main__":
+    main()
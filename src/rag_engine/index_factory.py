@@ -0,0 +1,187 @@
+import numpy as np
+
+
+# ================================
+# 🔹 Fábrica de índices FAISS
+# ================================
+INDEX_KINDS = ("flat", "ivf_flat", "ivf_pq", "hnsw", "fp16", "sq8", "binary")
+
+# Tipos que precisam de treino antes do primeiro add
+TRAINED_KINDS = ("ivf_flat", "ivf_pq", "sq8", "binary")
+
+# Nomes das constantes do FAISS (importado só quando um índice é criado)
+METRICS = {
+    "l2": "METRIC_L2",
+    "ip": "METRIC_INNER_PRODUCT",
+}
+
+# IVF precisa de ~39 vetores de treino por centróide
+MIN_POINTS_PER_CENTROID = 39
+
+
+def make_index(
+    dim: int,
+    kind: str = "flat",
+    metric: str = "l2",
+    num_vectors: int | None = None,
+    nlist: int = 1024,
+    pq_m: int = 16,
+    pq_bits: int = 8,
+    hnsw_m: int = 32,
+    ef_construction: int = 200,
+    rescore_factor: int = 4,
+):
+    """
+    Cria um índice FAISS (ainda vazio e possivelmente não treinado).
+
+    - flat:     busca exata, O(N) por consulta
+    - ivf_flat: k-means em `nlist` listas, busca só em `nprobe` delas
+    - ivf_pq:   IVF + product quantization (`pq_m` sub-vetores de `pq_bits` bits)
+    - hnsw:     grafo navegável, sem treino
+    - fp16:     busca exata com vetores em float16 (2x menor)
+    - sq8:      scalar quantization de 8 bits por dimensão (4x menor)
+    - binary:   1 bit por dimensão (32x menor) + rescoring exato dos
+                `rescore_factor * k` melhores candidatos por Hamming
+
+    `num_vectors` (quantos vetores vão treinar o índice) limita `nlist`
+    para que o treino do IVF não falhe em coleções pequenas; com menos de
+    `2 ** pq_bits` vetores o PQ nem treina (cada sub-quantizador tem
+    `2 ** pq_bits` centróides), então `ivf_pq` vira `ivf_flat`.
+
+    `nlist` fica fixo depois do treino: um índice treinado num lote pequeno
+    continua com poucas listas mesmo que o corpus cresça muito. Nesse caso
+    reconstrua o índice com o corpus inteiro (`VectorStore.build`).
+    """
+    if kind not in INDEX_KINDS:
+        raise ValueError(f"Tipo de índice desconhecido: {kind}. Use um de {INDEX_KINDS}.")
+    if metric not in METRICS:
+        raise ValueError(f"Métrica desconhecida: {metric}. Use 'l2' ou 'ip'.")
+
+    if kind == "binary":
+        from src.rag_engine.quantized import BinaryIndex
+        return BinaryIndex(dim, metric, rescore_factor)
+
+    import faiss
+
+    faiss_metric = getattr(faiss, METRICS[metric])
+
+    if kind == "flat":
+        return faiss.IndexFlat(dim, faiss_metric)
+
+    if kind == "fp16":
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, faiss_metric)
+
+    if kind == "sq8":
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss_metric)
+
+    if kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, hnsw_m, faiss_metric)
+        index.hnsw.efConstruction = ef_construction
+        return index
+
+    if num_vectors:
+        nlist = max(1, min(nlist, num_vectors // MIN_POINTS_PER_CENTROID))
+        if kind == "ivf_pq" and num_vectors < 2 ** pq_bits:
+            kind = "ivf_flat"
+
+    quantizer = faiss.IndexFlat(dim, faiss_metric)
+    if kind == "ivf_flat":
+        return faiss.IndexIVFFlat(quantizer, dim, nlist, faiss_metric)
+
+    if dim % pq_m != 0:
+        raise ValueError(f"pq_m={pq_m} precisa dividir a dimensão {dim}.")
+    return faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, pq_bits, faiss_metric)
+
+
+def train_index(index, vectors: np.ndarray, sample_size: int = 50_000, seed: int = 0):
+    """Treina o índice (se necessário) numa amostra aleatória dos vetores."""
+    if index.is_trained:
+        return
+
+    if len(vectors) > sample_size:
+        rng = np.random.default_rng(seed)
+        vectors = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+
+    index.train(np.ascontiguousarray(vectors, dtype=np.float32))
+
+
+def set_search_params(index, nprobe: int | None = None, ef_search: int | None = None):
+    """Ajusta o trade-off recall/latência sem reconstruir o índice."""
+    if _is_binary(index):
+        return
+
+    import faiss
+
+    params = faiss.ParameterSpace()
+
+    if nprobe is not None and _find(index, faiss.IndexIVF) is not None:
+        params.set_index_parameter(index, "nprobe", nprobe)
+
+    if ef_search is not None and _find(index, faiss.IndexHNSW) is not None:
+        params.set_index_parameter(index, "efSearch", ef_search)
+
+
+def has_native_ids(index) -> bool:
+    """
+    IVF e o binário guardam os ids nas próprias listas: dispensam (e não
+    podem usar) o IndexIDMap2, cujo `remove_ids` assume que o índice de
+    dentro renumera os ids internos depois de remover.
+    """
+    if _is_binary(index):
+        return True
+
+    import faiss
+
+    return isinstance(faiss.downcast_index(index), faiss.IndexIVF)
+
+
+def supports_remove(index) -> bool:
+    if _is_binary(index):
+        return True
+
+    import faiss
+
+    if _find(index, faiss.IndexHNSW) is not None:
+        return False
+    # IndexIDMap2 sobre IVF (coleções salvas antes de has_native_ids): o
+    # remove_ids do wrapper desalinha os ids, então reconstrói
+    return has_native_ids(index) or _find(index, faiss.IndexIVF) is None
+
+
+def reconstruct_ids(index, ids) -> np.ndarray:
+    """Vetores guardados no índice (aproximados nos quantizados), na ordem de `ids`."""
+    if not _is_binary(index):
+        import faiss
+
+        # IVF só reconstrói por id com o mapa direto (id -> lista, posição)
+        ivf = _find(index, faiss.IndexIVF)
+        if ivf is not None and ivf.direct_map.type == faiss.DirectMap.NoMap:
+            ivf.make_direct_map()
+    return np.stack([index.reconstruct(int(i)) for i in ids])
+
+
+def index_memory_bytes(index) -> int:
+    """Tamanho serializado do índice (aproximação da memória residente)."""
+    if _is_binary(index):
+        return index.memory_bytes()
+
+    import faiss
+
+    return int(faiss.serialize_index(index).size)
+
+
+def _is_binary(index) -> bool:
+    from src.rag_engine.quantized import BinaryIndex
+    return isinstance(index, BinaryIndex)
+
+
+def _find(index, cls):
+    import faiss
+
+    # Desce por wrappers (IndexIDMap2, etc.) até achar o tipo pedido
+    while index is not None:
+        index = faiss.downcast_index(index)
+        if isinstance(index, cls):
+            return index
+        index = getattr(index, "index", None)
+    return None
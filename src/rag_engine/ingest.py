@@ -0,0 +1,143 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator
+
+from src.rag_engine.chunking import Chunk, WordChunker
+
+
+# PDFs menores que isso são extraídos no próprio processo
+PARALLEL_MIN_PAGES = 32
+PAGES_PER_TASK = 8
+TXT_BLOCK_SIZE = 1 << 20
+
+
+# ================================
+# 🔹 Páginas (streaming)
+# ================================
+def iter_pages(path: str, workers: int | None = None) -> Iterator[str]:
+    """
+    Gera o texto do documento aos poucos: página a página no PDF, blocos
+    de ~1 MB (cortados em espaço em branco) no TXT.
+
+    PDFs grandes são extraídos num pool de processos, mantendo poucas
+    tarefas em voo para que a memória não cresça com o documento.
+    """
+    ext = path.split(".")[-1].lower()
+
+    if ext == "txt":
+        yield from _iter_txt_blocks(path)
+    elif ext == "pdf":
+        yield from _iter_pdf_pages(path, workers)
+    else:
+        raise ValueError("Formato não suportado. Use PDF ou TXT.")
+
+
+def _iter_txt_blocks(path: str) -> Iterator[str]:
+    rest = ""
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        while True:
+            block = f.read(TXT_BLOCK_SIZE)
+            if not block:
+                break
+            block = rest + block
+            # Não corta palavras ao meio entre dois blocos
+            cut = max(block.rfind(" "), block.rfind("\n"))
+            if cut == -1:
+                rest = block
+                continue
+            rest = block[cut + 1:]
+            yield block[: cut + 1]
+    if rest:
+        yield rest
+
+
+# Leitor do PDF em cada processo do pool: aberto uma vez por worker, não por tarefa
+_worker_reader = None
+
+
+def _open_worker_reader(path: str):
+    import PyPDF2
+
+    global _worker_reader
+    _worker_reader = PyPDF2.PdfReader(path)
+
+
+def _extract_pages(start: int, end: int) -> list[str]:
+    return [_worker_reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def _iter_pdf_pages(path: str, workers: int | None) -> Iterator[str]:
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(path)
+    num_pages = len(reader.pages)
+    workers = workers or os.cpu_count() or 1
+
+    if num_pages < PARALLEL_MIN_PAGES or workers == 1:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+
+    ranges = ((s, min(s + PAGES_PER_TASK, num_pages)) for s in range(0, num_pages, PAGES_PER_TASK))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_open_worker_reader, initargs=(path,)) as pool:
+        in_flight = deque()
+        for start, end in ranges:
+            in_flight.append(pool.submit(_extract_pages, start, end))
+            # Janela limitada: no máximo 2 tarefas por worker esperando consumo
+            if len(in_flight) >= workers * 2:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+# ================================
+# 🔹 Chunks e lotes (streaming)
+# ================================
+def iter_chunks(pages: Iterable[str], chunker=None) -> Iterator[Chunk]:
+    """
+    Aplica o chunker página a página. Os offsets dos chunks apontam para o
+    texto completo de `load_document` (páginas unidas por quebra de linha).
+
+    O último chunk de cada página fica retido e o texto dele é fatiado de
+    novo junto com a página seguinte, então janelas atravessam a quebra de
+    página como em `chunker.chunk(load_document(path))`; só um chunk de
+    texto é refeito por página.
+    """
+    chunker = chunker or WordChunker()
+    base = 0
+    # Texto retido (do início do último chunk ao fim da página) e seu offset
+    carry, carry_start = None, 0
+    held = None
+
+    for page in pages:
+        if carry is None:
+            text, start = page, base
+        else:
+            text, start = carry + "\n" + page, carry_start
+
+        chunks = list(chunker.chunk(text))
+        if chunks:
+            for chunk in chunks[:-1]:
+                yield Chunk(chunk.text, start + chunk.start, start + chunk.end)
+            last = chunks[-1]
+            held = Chunk(last.text, start + last.start, start + last.end)
+            carry, carry_start = text[last.start:], start + last.start
+        elif carry is not None:
+            # Nada fatiado: o texto retido segue esperando, com esta página
+            carry = text
+        base += len(page) + 1
+
+    if held is not None:
+        yield held
+
+
+def iter_batches(items: Iterable, batch_size: int = 64) -> Iterator[list]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
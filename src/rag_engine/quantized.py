@@ -0,0 +1,227 @@
+import os
+
+import numpy as np
+
+
+# ================================
+# 🔹 Índice binário + rescoring exato
+# ================================
+class BinaryIndex:
+    """
+    Códigos de 1 bit por dimensão (32x menor que float32) num índice
+    binário do FAISS, com a mesma API usada pelo VectorStore
+    (`add_with_ids`, `search`, `remove_ids`, `reconstruct`...).
+
+    A busca tem duas fases: Hamming nos códigos traz
+    `rescore_factor * k` candidatos, que são reordenados pela distância
+    exata contra os vetores em float16.
+
+    Como no ChunkStore, os vetores de rescoring têm uma parte salva
+    (memory-mapped depois de `save`/`load`: só os códigos são residentes)
+    e uma cauda em memória para os adicionados depois, que cresce dobrando
+    a capacidade. Remoções são marcadas e descartadas ao salvar.
+    """
+
+    # Capacidade inicial da cauda e linhas copiadas por vez ao salvar
+    TAIL_CAPACITY = 1024
+    SAVE_BLOCK = 65_536
+
+    def __init__(self, dim: int, metric: str = "l2", rescore_factor: int = 4):
+        import faiss
+
+        self.d = dim
+        self.metric = metric
+        self.rescore_factor = rescore_factor
+        self.codes = faiss.IndexBinaryIDMap2(faiss.IndexBinaryFlat(_code_dim(dim)))
+
+        # Limiar por dimensão (média do treino): bit = vetor > limiar
+        self.thresholds: np.ndarray | None = None
+
+        # Vetores para rescoring, em ordem crescente de id: parte salva...
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._vectors = np.zeros((0, dim), dtype=np.float16)
+
+        # ...e cauda em memória (só as `_tail_len` primeiras linhas valem)
+        self._tail_ids = np.zeros(0, dtype=np.int64)
+        self._tail_vectors = np.zeros((0, dim), dtype=np.float16)
+        self._tail_len = 0
+
+        self._removed: set[int] = set()
+
+    @property
+    def ntotal(self) -> int:
+        return self.codes.ntotal
+
+    @property
+    def is_trained(self) -> bool:
+        return self.thresholds is not None
+
+    def train(self, vectors: np.ndarray):
+        self.thresholds = np.asarray(vectors, dtype=np.float32).mean(axis=0)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        bits = np.asarray(vectors, dtype=np.float32) > self.thresholds
+        # Dimensão não múltipla de 8: completa com zeros
+        return np.packbits(bits, axis=1, bitorder="little")[:, : _code_dim(self.d) // 8]
+
+    # ---------- escrita ----------
+
+    def _last_id(self) -> int:
+        if self._tail_len:
+            return int(self._tail_ids[self._tail_len - 1])
+        return int(self._ids[-1]) if len(self._ids) else -1
+
+    def add_with_ids(self, vectors: np.ndarray, ids: np.ndarray):
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids):
+            return
+        if ids.min() <= self._last_id():
+            raise ValueError("BinaryIndex espera ids crescentes.")
+
+        self.codes.add_with_ids(self.encode(vectors), ids)
+
+        end = self._tail_len + len(ids)
+        if end > len(self._tail_ids):
+            # Crescimento amortizado: cada linha é copiada O(1) vezes
+            capacity = max(end, 2 * len(self._tail_ids), self.TAIL_CAPACITY)
+            self._tail_ids = _resized(self._tail_ids, capacity, self._tail_len)
+            self._tail_vectors = _resized(self._tail_vectors, capacity, self._tail_len)
+        self._tail_ids[self._tail_len:end] = ids
+        self._tail_vectors[self._tail_len:end] = np.asarray(vectors, dtype=np.float16)
+        self._tail_len = end
+
+    def add(self, vectors: np.ndarray):
+        start = self._last_id() + 1
+        self.add_with_ids(vectors, np.arange(start, start + len(vectors), dtype=np.int64))
+
+    def remove_ids(self, ids: np.ndarray) -> int:
+        ids = np.asarray(ids, dtype=np.int64)
+        removed = self.codes.remove_ids(ids)
+        self._removed.update(ids.tolist())
+        return removed
+
+    def _rescore_vectors(self, ids: np.ndarray) -> np.ndarray:
+        # ids existentes -> vetores float32 (parte salva ou cauda)
+        in_saved = ids <= self._ids[-1] if len(self._ids) else np.zeros(len(ids), dtype=bool)
+        out = np.empty((len(ids), self.d), dtype=np.float32)
+        if in_saved.any():
+            out[in_saved] = self._vectors[np.searchsorted(self._ids, ids[in_saved])]
+        if not in_saved.all():
+            tail_ids = self._tail_ids[: self._tail_len]
+            out[~in_saved] = self._tail_vectors[np.searchsorted(tail_ids, ids[~in_saved])]
+        return out
+
+    def reconstruct(self, chunk_id: int) -> np.ndarray:
+        chunk_id = int(chunk_id)
+        if chunk_id in self._removed:
+            raise KeyError(chunk_id)
+        for ids in (self._ids, self._tail_ids[: self._tail_len]):
+            row = np.searchsorted(ids, chunk_id)
+            if row < len(ids) and ids[row] == chunk_id:
+                return self._rescore_vectors(np.array([chunk_id], dtype=np.int64))[0]
+        raise KeyError(chunk_id)
+
+    # ---------- busca ----------
+
+    def search(self, queries: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        queries = np.asarray(queries, dtype=np.float32)
+        n = len(queries)
+        distances = np.full((n, k), np.inf if self.metric == "l2" else -np.inf, dtype=np.float32)
+        labels = np.full((n, k), -1, dtype=np.int64)
+        if self.ntotal == 0:
+            return distances, labels
+
+        # Fase 1: Hamming nos códigos
+        _, candidates = self.codes.search(self.encode(queries), min(self.ntotal, k * self.rescore_factor))
+
+        # Fase 2: distância exata contra os vetores em float16
+        for qi, row_ids in enumerate(candidates):
+            row_ids = row_ids[row_ids != -1]
+            vectors = self._rescore_vectors(row_ids)
+
+            if self.metric == "ip":
+                scores = vectors @ queries[qi]
+                order = np.argsort(-scores, kind="stable")[:k]
+            else:
+                scores = ((vectors - queries[qi]) ** 2).sum(axis=1)
+                order = np.argsort(scores, kind="stable")[:k]
+
+            distances[qi, : len(order)] = scores[order]
+            labels[qi, : len(order)] = row_ids[order]
+
+        return distances, labels
+
+    # ---------- persistência ----------
+
+    def memory_bytes(self) -> int:
+        """Memória residente: códigos (+ vetores de rescoring não mapeados)."""
+        resident = self.ntotal * _code_dim(self.d) // 8 + self._ids.nbytes
+        resident += self._tail_ids.nbytes + self._tail_vectors.nbytes
+        if not isinstance(self._vectors, np.memmap):
+            resident += self._vectors.nbytes
+        return resident
+
+    def save(self, path: str):
+        """Grava os vetores compactados bloco a bloco e passa a mapeá-los."""
+        import faiss
+
+        os.makedirs(path, exist_ok=True)
+        faiss.write_index_binary(self.codes, os.path.join(path, "index.binary.faiss"))
+        np.save(os.path.join(path, "binary.thresholds.npy"), self.thresholds)
+
+        parts = [(self._ids, self._vectors), (self._tail_ids[: self._tail_len], self._tail_vectors[: self._tail_len])]
+        removed = np.fromiter(self._removed, dtype=np.int64, count=len(self._removed))
+        keeps = [~np.isin(ids, removed) for ids, _ in parts]
+        ids = np.concatenate([part_ids[keep] for (part_ids, _), keep in zip(parts, keeps)])
+
+        # Sem montar a matriz inteira em memória (a parte salva pode estar mapeada)
+        vectors_path = os.path.join(path, "rescore.f16.npy")
+        tmp = vectors_path + ".tmp.npy"
+        out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float16, shape=(len(ids), self.d))
+        pos = 0
+        for (_, vectors), keep in zip(parts, keeps):
+            for start in range(0, len(keep), self.SAVE_BLOCK):
+                block = np.asarray(vectors[start:start + self.SAVE_BLOCK])[keep[start:start + self.SAVE_BLOCK]]
+                out[pos:pos + len(block)] = block
+                pos += len(block)
+        out.flush()
+        del out
+        # O arquivo antigo pode estar memory-mapped por este mesmo processo
+        os.replace(tmp, vectors_path)
+        _save_atomic(os.path.join(path, "rescore.ids.npy"), ids)
+
+        self._ids, self._vectors = ids, np.load(vectors_path, mmap_mode="r")
+        self._tail_ids = np.zeros(0, dtype=np.int64)
+        self._tail_vectors = np.zeros((0, self.d), dtype=np.float16)
+        self._tail_len = 0
+        self._removed = set()
+
+    @classmethod
+    def load(cls, path: str, metric: str = "l2", rescore_factor: int = 4) -> "BinaryIndex":
+        import faiss
+
+        vectors = np.load(os.path.join(path, "rescore.f16.npy"), mmap_mode="r")
+        index = cls(vectors.shape[1], metric, rescore_factor)
+        index.codes = faiss.read_index_binary(os.path.join(path, "index.binary.faiss"))
+        index.thresholds = np.load(os.path.join(path, "binary.thresholds.npy"))
+        index._ids = np.load(os.path.join(path, "rescore.ids.npy"))
+        index._vectors = vectors
+        return index
+
+
+def _code_dim(dim: int) -> int:
+    # Índices binários do FAISS trabalham com múltiplos de 8 bits
+    return (dim + 7) // 8 * 8
+
+
+def _save_atomic(path: str, array: np.ndarray):
+    # O arquivo antigo pode estar memory-mapped por este mesmo processo
+    tmp = path + ".tmp.npy"
+    np.save(tmp, array)
+    os.replace(tmp, path)
+
+
+def _resized(array: np.ndarray, capacity: int, used: int) -> np.ndarray:
+    grown = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+    grown[:used] = array[:used]
+    return grown
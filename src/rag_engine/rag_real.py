@@ -1,74 +1,381 @@
+from __future__ import annotations
+
 import os
-import PyPDF2
-from groq import Groq
-from sentence_transformers import SentenceTransformer
+import json
+import threading
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, Iterator, NamedTuple
 import numpy as np
-import faiss
+
+from src.agent_core.streaming import iter_deltas
+from src.model_registry import LazyModel, register
+from src.telemetry import span
+from src.rag_engine.bm25 import BM25Index, reciprocal_rank_fusion
+from src.rag_engine.chunking import TokenChunker, WordChunker
+from src.rag_engine.embedder_backends import load_embedder, load_tokenizer
+from src.rag_engine.embedding_cache import CachedEmbedder, EmbeddingCache
+from src.rag_engine.embedding_service import EMBEDDING_SOCKET, shared_encoder
+from src.rag_engine.ingest import iter_batches, iter_pages
+from src.rag_engine.chunk_store import ChunkStore
+from src.rag_engine.index_factory import (
+    TRAINED_KINDS,
+    has_native_ids,
+    make_index,
+    reconstruct_ids,
+    set_search_params,
+    supports_remove,
+    train_index,
+)
+from src.rag_engine.quantized import BinaryIndex
+
+if TYPE_CHECKING:
+    from groq import Groq
 
 
 # ================================
 # 🔹 EMBEDDING MODEL (OPEN-SOURCE)
 # ================================
-embedder = SentenceTransformer("all-MiniLM-L6-v2")
+EMBEDDER_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_CACHE_DIR = os.getenv("RAG_EMBEDDING_CACHE_DIR", ".cache/embeddings")
+# torch | torch-int8 | onnx | onnx-int8 (ver embedder_backends)
+EMBEDDER_BACKEND = os.getenv("RAG_EMBEDDER_BACKEND", "torch")
+
+# Carregado só no primeiro encode (importar este módulo não carrega torch)
+embedder = load_embedder(EMBEDDER_MODEL, EMBEDDER_BACKEND)
+
+# Encodes concorrentes viram micro-lotes (ou vão para o serviço no socket)
+encoder = shared_encoder(EMBEDDER_MODEL, EMBEDDER_BACKEND)
+
+
+def _cache_model() -> str:
+    # Chunks já vetorizados não passam de novo pelo modelo; backends
+    # quantizados geram vetores ligeiramente diferentes, então cache próprio.
+    # Com o serviço no socket, vale o modelo/backend dele, não o local.
+    model, backend = EMBEDDER_MODEL, EMBEDDER_BACKEND
+    if EMBEDDING_SOCKET:
+        info = encoder.info()
+        model, backend = info["model"], info["backend"]
+    return model if backend == "torch" else f"{model}@{backend}"
+
+
+register(
+    "rag:cached-embedder",
+    lambda: CachedEmbedder(encoder, EmbeddingCache(EMBEDDING_CACHE_DIR, _cache_model())),
+)
+cached_embedder = LazyModel("rag:cached-embedder")
 
 
 # ================================
 # 🔹 Carregar texto do documento
 # ================================
 def load_document(path: str) -> str:
-    ext = path.split(".")[-1].lower()
-
-    if ext == "txt":
-        with open(path, "r", encoding="utf-8", errors="ignore") as f:
-            return f.read()
-
-    elif ext == "pdf":
-        reader = PyPDF2.PdfReader(path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text
-
-    else:
-        raise ValueError("Formato não suportado. Use PDF ou TXT.")
+    return "\n".join(iter_pages(path))
 
 
 # ================================
 # 🔹 Chunking (quebra em pedaços)
 # ================================
-def chunk_text(text: str, size: int = 400) -> list[str]:
-    words = text.split()
-    chunks = []
-    for i in range(0, len(words), size):
-        chunk = " ".join(words[i:i + size])
-        chunks.append(chunk)
-    return chunks
+def chunk_text(text: str, size: int = 400, overlap: int = 0) -> list[str]:
+    return [chunk.text for chunk in WordChunker(size, overlap).chunk(text)]
+
+
+def default_chunker() -> TokenChunker:
+    # Janelas no tokenizer do embedder: nada passa do limite e é truncado.
+    # Com o serviço no socket, só o tokenizer é carregado aqui (os pesos ficam lá).
+    info = encoder.info()
+    tokenizer = load_tokenizer(info["model"]) if EMBEDDING_SOCKET else embedder.tokenizer
+    return TokenChunker(tokenizer, max_tokens=info["max_seq_length"], overlap=32)
 
 
 # ================================
 # 🔹 Vetorização (FAISS)
 # ================================
+# Chunks usados para treinar índices IVF na ingestão em streaming
+IVF_TRAIN_BATCH = 4096
+
+# "dense": só FAISS; "bm25": só léxico; "hybrid": os dois fundidos por RRF
+RETRIEVAL_MODES = ("dense", "bm25", "hybrid")
+# Padrão continua "dense"; RAG_RETRIEVAL=hybrid (ou `retrieval=`) liga o BM25
+RETRIEVAL_MODE = os.getenv("RAG_RETRIEVAL", "dense")
+
+# Candidatos por retriever antes da fusão (múltiplo de top_k)
+HYBRID_CANDIDATES = 4
+
+
+class SearchHit(NamedTuple):
+    chunk_id: int
+    text: str
+    # Menor é melhor. Em "bm25"/"hybrid" é o score negado.
+    distance: float
+
+
 class VectorStore:
-    def __init__(self):
+    """
+    Índice FAISS + tabela de chunks endereçada por id.
+
+    `index_kind` escolhe o backend ("flat", "ivf_flat", "ivf_pq", "hnsw", ou
+    os compactos "fp16", "sq8", "binary") e
+    `metric` a distância ("l2" ou "ip"; com "ip" os vetores são normalizados,
+    ou seja, similaridade de cosseno). Demais parâmetros vão para
+    `index_factory.make_index`; `nprobe`/`ef_search` ajustam a busca.
+
+    O texto dos chunks fica num `ChunkStore` (offsets + blob, memory-mapped
+    depois de salvo). Um índice BM25 é mantido junto com o FAISS, sobre os
+    mesmos ids;
+    `retrieval` escolhe o modo padrão de busca (ver RETRIEVAL_MODES;
+    sem ele, RETRIEVAL_MODE).
+    """
+
+    def __init__(
+        self,
+        embedder=None,
+        index_kind: str = "flat",
+        metric: str = "l2",
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+        retrieval: str | None = None,
+        **index_params,
+    ):
+        retrieval = retrieval or RETRIEVAL_MODE
+        if retrieval not in RETRIEVAL_MODES:
+            raise ValueError(f"Modo de busca desconhecido: {retrieval}. Use um de {RETRIEVAL_MODES}.")
+
+        self.embedder = embedder or cached_embedder
+        self.retrieval = retrieval
+        self.index_config = {"kind": index_kind, "metric": metric, **index_params}
+        self.search_params = {"nprobe": nprobe, "ef_search": ef_search}
         self.index = None
-        self.chunks = []
+        self.chunks = ChunkStore()
+        self.next_id = 0
+        self.bm25 = BM25Index()
+
+    def encode(self, texts: list[str], queries: bool = False) -> np.ndarray:
+        """
+        Vetores no formato do índice. Com `queries=True` o cache persistente
+        de embeddings (CachedEmbedder) só é lido, nunca gravado.
+        """
+        encode = self.embedder.encode
+        if queries:
+            encode = getattr(self.embedder, "encode_queries", encode)
+        with span("embedding", model=EMBEDDER_MODEL, texts=len(texts)):
+            vectors = np.ascontiguousarray(encode(texts), dtype=np.float32)
+        if self.index_config["metric"] == "ip":
+            import faiss
+            faiss.normalize_L2(vectors)
+        return vectors
+
+    def _new_index(self, vectors: np.ndarray):
+        import faiss
+
+        index = make_index(vectors.shape[1], num_vectors=len(vectors), **self.index_config)
+        # IDMap2 permite remover chunks sem reconstruir o índice (IVF e binário já guardam ids)
+        if not has_native_ids(index):
+            index = faiss.IndexIDMap2(index)
+        train_index(index, vectors)
+        set_search_params(index, **self.search_params)
+        return index
 
     def build(self, chunks: list[str]):
-        self.chunks = chunks
-        vectors = embedder.encode(chunks)
-        self.index = faiss.IndexFlatL2(vectors.shape[1])
-        self.index.add(np.array(vectors))
+        self.index = None
+        self.chunks = ChunkStore()
+        self.next_id = 0
+        self.bm25 = BM25Index()
+        self.add(chunks)
+
+    def add(self, chunks: list[str]) -> list[int]:
+        if not chunks:
+            return []
+
+        vectors = self.encode(chunks)
+        if self.index is None:
+            self.index = self._new_index(vectors)
+
+        ids = np.arange(self.next_id, self.next_id + len(chunks), dtype=np.int64)
+        self.index.add_with_ids(vectors, ids)
+        self.chunks.update(zip(ids.tolist(), chunks))
+        self.bm25.add(ids.tolist(), chunks)
+        self.next_id += len(chunks)
+        return ids.tolist()
+
+    def add_stream(self, chunks: Iterable[str], batch_size: int = 64) -> list[int]:
+        """
+        Vetoriza e indexa os chunks em lotes de `batch_size`, sem materializar
+        o documento inteiro. Índices IVF treinam num primeiro lote maior
+        (até IVF_TRAIN_BATCH chunks), e esse lote fixa `nlist`: se a coleção
+        começar pequena e crescer muito, reconstrua com `build`.
+        """
+        return [i for batch in self.iter_add(chunks, batch_size) for i in batch]
+
+    def iter_add(self, chunks: Iterable[str], batch_size: int = 64) -> Iterator[list[int]]:
+        """Como `add_stream`, mas devolve os ids de cada lote assim que ele entra no índice."""
+        chunks = iter(chunks)
+
+        if self.index is None and self.index_config["kind"] in TRAINED_KINDS:
+            yield self.add(list(islice(chunks, IVF_TRAIN_BATCH)))
+
+        for batch in iter_batches(chunks, batch_size):
+            yield self.add(batch)
+
+    def remove(self, ids: list[int]):
+        if self.index is None or not ids:
+            return
+
+        for i in ids:
+            self.chunks.pop(i, None)
+        self.bm25.remove(ids)
 
-    def search(self, query: str, top_k: int = 3):
-        q_vec = embedder.encode([query])
-        distances, ids = self.index.search(np.array(q_vec), top_k)
-        return [self.chunks[i] for i in ids[0]]
+        if supports_remove(self.index):
+            self.index.remove_ids(np.asarray(ids, dtype=np.int64))
+            return
+
+        # HNSW (e IVF salvo com IDMap2) não remove vetores: reconstrói com os chunks restantes
+        keep = np.fromiter(self.chunks.keys(), dtype=np.int64, count=len(self.chunks))
+        if len(keep) == 0:
+            self.index = None
+            return
+        vectors = reconstruct_ids(self.index, keep)
+        self.index = self._new_index(vectors)
+        self.index.add_with_ids(vectors, keep)
+
+    def set_search_params(self, nprobe: int | None = None, ef_search: int | None = None):
+        self.search_params = {"nprobe": nprobe, "ef_search": ef_search}
+        if self.index is not None:
+            set_search_params(self.index, **self.search_params)
+
+    def search(self, query: str, top_k: int = 3, mode: str | None = None):
+        return [hit.text for hit in self.search_batch([query], top_k, mode)[0]]
+
+    def search_batch(
+        self, queries: list[str], top_k: int = 3, mode: str | None = None, vectors: np.ndarray | None = None
+    ) -> list[list[SearchHit]]:
+        """
+        Uma única chamada ao embedder e uma única busca FAISS para todas as
+        consultas. Retorna, por consulta, os chunks com id e distância.
+        `vectors` (de `encode(queries, queries=True)`) evita vetorizar de novo.
+
+        No modo "hybrid" cada retriever traz `HYBRID_CANDIDATES * top_k`
+        candidatos e a lista final sai da fusão RRF das duas ordens.
+        """
+        mode = mode or self.retrieval
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Modo de busca desconhecido: {mode}. Use um de {RETRIEVAL_MODES}.")
+        if not queries:
+            return []
+        if self.index is None or self.index.ntotal == 0:
+            return [[] for _ in queries]
+
+        if mode == "bm25":
+            return [self._lexical(q, top_k) for q in queries]
+
+        if mode == "dense":
+            return self._dense(queries, top_k, vectors)
+
+        candidates = top_k * HYBRID_CANDIDATES
+        results = []
+        lexical_hits = (self._lexical(q, candidates) for q in queries)
+        for dense, lexical in zip(self._dense(queries, candidates, vectors), lexical_hits):
+            fused = reciprocal_rank_fusion([[h.chunk_id for h in dense], [h.chunk_id for h in lexical]])
+            results.append([SearchHit(i, self.chunks[i], -score) for i, score in fused[:top_k]])
+        return results
+
+    def _lexical(self, query: str, top_k: int) -> list[SearchHit]:
+        with span("search", model="bm25", queries=1, top_k=top_k):
+            hits = self.bm25.search(query, top_k)
+        return [SearchHit(i, self.chunks[i], -score) for i, score in hits]
+
+    def _dense(self, queries: list[str], top_k: int, vectors: np.ndarray | None = None) -> list[list[SearchHit]]:
+        if vectors is None:
+            vectors = self.encode(queries, queries=True)
+        return self.search_vectors(vectors, top_k)
+
+    def search_vectors(self, q_vecs: np.ndarray, top_k: int = 3) -> list[list[SearchHit]]:
+        """Busca densa com consultas já vetorizadas (ver `encode`)."""
+        if self.index is None or self.index.ntotal == 0:
+            return [[] for _ in q_vecs]
+
+        with span("search", model=self.index_config["kind"], queries=len(q_vecs), top_k=top_k):
+            distances, ids = self.index.search(q_vecs, top_k)
+
+        return [
+            [
+                SearchHit(int(i), self.chunks[i], float(d))
+                for i, d in zip(row_ids, row_distances)
+                if i != -1
+            ]
+            for row_ids, row_distances in zip(ids, distances)
+        ]
+
+    def save(self, path: str):
+        import faiss
+
+        os.makedirs(path, exist_ok=True)
+        if isinstance(self.index, BinaryIndex):
+            self.index.save(path)
+        elif self.index is not None:
+            faiss.write_index(self.index, os.path.join(path, "index.faiss"))
+        self.chunks.save(path)
+        self.bm25.save(os.path.join(path, "bm25.npz"))
+
+        data = {
+            "index_config": self.index_config,
+            "search_params": self.search_params,
+            "retrieval": self.retrieval,
+            "next_id": self.next_id,
+        }
+        with open(os.path.join(path, "chunks.json"), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str, embedder=None, mmap: bool = False) -> "VectorStore":
+        """
+        Com `mmap=True` o índice FAISS é mapeado do disco (somente leitura)
+        em vez de copiado para a memória.
+        """
+        with open(os.path.join(path, "chunks.json"), "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        config = dict(data.get("index_config", {}))
+        kind, metric = config.pop("kind", "flat"), config.pop("metric", "l2")
+        store = cls(
+            embedder,
+            index_kind=kind,
+            metric=metric,
+            retrieval=data.get("retrieval", "dense"),
+            **data.get("search_params", {}),
+            **config,
+        )
+        store.next_id = data["next_id"]
+        if "chunks" in data:
+            # Formato antigo: textos dentro do JSON
+            store.chunks = ChunkStore.from_items((int(i), text) for i, text in data["chunks"])
+        else:
+            store.chunks = ChunkStore.load(path)
+
+        bm25_path = os.path.join(path, "bm25.npz")
+        if os.path.exists(bm25_path):
+            store.bm25 = BM25Index.load(bm25_path)
+        else:
+            # Coleções salvas antes do BM25: indexa a partir da tabela de chunks
+            store.bm25.add(list(store.chunks), list(store.chunks.values()))
+
+        index_path = os.path.join(path, "index.faiss")
+        if kind == "binary" and os.path.exists(os.path.join(path, "index.binary.faiss")):
+            store.index = BinaryIndex.load(path, metric, config.get("rescore_factor", 4))
+        elif os.path.exists(index_path):
+            import faiss
+            flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if mmap else 0
+            store.index = faiss.read_index(index_path, flags)
+            set_search_params(store.index, **store.search_params)
+        return store
 
 
 # ================================
 # 🔹 Geração com GROQ
 # ================================
-def generate_answer(context: str, question: str, groq_client: Groq) -> str:
+ANSWER_MODEL = "llama3-70b-8192"
+
+
+def _answer_request(context: str, question: str) -> dict:
     prompt = f"""
 You are a RAG assistant. Use ONLY the provided context to answer.
 
@@ -81,28 +388,92 @@ Question:
 Answer:
 """
 
-    response = groq_client.chat.completions.create(
-        model="llama3-70b-8192",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.2
-    )
+    return {
+        "model": ANSWER_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.2,
+    }
+
+
+def generate_answer(context: str, question: str, groq_client: Groq) -> str:
+    with span("llm", stage="rag_answer", model=ANSWER_MODEL) as s:
+        response = groq_client.chat.completions.create(**_answer_request(context, question))
+        s.record_usage(response)
 
     return response.choices[0].message.content
 
 
+def generate_answer_stream(
+    context: str, question: str, groq_client: Groq, cancel: threading.Event | None = None
+) -> Iterator[str]:
+    with span("llm", stage="rag_answer", model=ANSWER_MODEL, stream=True) as s:
+        stream = groq_client.chat.completions.create(**_answer_request(context, question), stream=True)
+        yield from iter_deltas(stream, cancel, s)
+
+
 # ================================
 # 🔹 FUNÇÃO PRINCIPAL DO RAG REAL
 # ================================
-def run_rag_real(path: str, question: str, groq_client: Groq):
-    text = load_document(path)
-    chunks = chunk_text(text)
+# Orçamento de tokens de contexto quando o rerank está ligado
+RERANK_CONTEXT_TOKENS = 1500
+
+
+def collection_options(rerank: bool, cache_answers: bool) -> dict:
+    options = {}
+    if rerank:
+        from src.rag_engine.rerank import default_reranker
+        options.update(reranker=default_reranker(), max_context_tokens=RERANK_CONTEXT_TOKENS)
+    if cache_answers:
+        from src.rag_engine.answer_cache import default_answer_cache
+        options["answer_cache"] = default_answer_cache()
+    return options
+
+
+def run_rag_real(
+    path: str,
+    question: str,
+    groq_client: Groq,
+    index_dir: str | None = None,
+    rerank: bool = False,
+    cache_answers: bool = False,
+):
+    from src.rag_engine.collection import DocumentCollection
+
+    # Com index_dir o documento só é reprocessado quando o arquivo muda
+    options = collection_options(rerank, cache_answers)
+    collection = DocumentCollection.open(index_dir, **options) if index_dir else DocumentCollection(**options)
+
+    if collection.add_file(path) and index_dir:
+        collection.save(index_dir)
+
+    return collection.ask(question, groq_client, top_k=3)
+
+
+def stream_rag_real(
+    path: str,
+    question: str,
+    groq_client: Groq,
+    index_dir: str | None = None,
+    cancel: threading.Event | None = None,
+    rerank: bool = False,
+    cache_answers: bool = False,
+) -> Iterator[dict]:
+    """
+    Versão em streaming de `run_rag_real`. Eventos:
+    {"type": "retrieved", "chunks": n, "tokens": t}, {"type": "delta", "text": ...},
+    {"type": "done", "answer": ...} ou {"type": "error", "message": ...}.
+    Resposta vinda do cache semântico: um único delta e {"cached": True} no done.
+    """
+    from src.rag_engine.collection import DocumentCollection
 
-    store = VectorStore()
-    store.build(chunks)
+    try:
+        options = collection_options(rerank, cache_answers)
+        collection = DocumentCollection.open(index_dir, **options) if index_dir else DocumentCollection(**options)
 
-    top_chunks = store.search(question, top_k=3)
-    context = "\n\n".join(top_chunks)
+        if collection.add_file(path) and index_dir:
+            collection.save(index_dir)
 
-    answer = generate_answer(context, question, groq_client)
+        yield from collection.ask_stream(question, groq_client, top_k=3, cancel=cancel)
 
-    return answer
+    except Exception as e:
+        yield {"type": "error", "message": f"❌ ERRO NO RAG:\n{e}"}
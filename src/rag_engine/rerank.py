@@ -0,0 +1,115 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+
+from src.agent_core.router import estimate_tokens
+from src.model_registry import cross_encoder
+from src.rag_engine.rag_real import SearchHit
+from src.telemetry import span
+
+
+# ================================
+# 🔹 Reranking com cross-encoder
+# ================================
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+# Candidatos buscados para o rerank (múltiplo do top_k final)
+RERANK_CANDIDATES = 5
+
+
+class Reranker:
+    """
+    Reordena candidatos pontuando cada par (pergunta, chunk) com um
+    cross-encoder local, em lotes.
+
+    Scores ficam num cache LRU em memória (`cache_size` pares): perguntas
+    repetidas sobre os mesmos chunks não passam de novo pelo modelo.
+    """
+
+    def __init__(self, model=None, batch_size: int = 32, cache_size: int = 10_000):
+        self.model = model or cross_encoder(RERANK_MODEL)
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(query: str, text: str) -> str:
+        return hashlib.sha1(f"{query}\0{text}".encode("utf-8")).hexdigest()
+
+    def score(self, query: str, texts: list[str]) -> np.ndarray:
+        keys = [self._key(query, t) for t in texts]
+        scores = np.empty(len(texts), dtype=np.float32)
+        missing = []
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is None:
+                    missing.append(i)
+                else:
+                    self._cache.move_to_end(key)
+                    scores[i] = cached
+
+        if missing:
+            # Pares de tamanho parecido no mesmo lote: menos padding
+            missing.sort(key=lambda i: len(texts[i]))
+            with span("rerank", model=RERANK_MODEL, pairs=len(missing), cached=len(texts) - len(missing)):
+                predicted = self.model.predict(
+                    [(query, texts[i]) for i in missing], batch_size=self.batch_size, show_progress_bar=False
+                )
+
+            with self._lock:
+                for i, value in zip(missing, np.asarray(predicted, dtype=np.float32).ravel()):
+                    scores[i] = value
+                    self._cache[keys[i]] = float(value)
+                    self._cache.move_to_end(keys[i])
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return scores
+
+    def rerank(
+        self,
+        query: str,
+        hits: list[SearchHit],
+        top_k: int = 3,
+        max_tokens: int | None = None,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+    ) -> list[SearchHit]:
+        """
+        Os `top_k` melhores candidatos cujo total de tokens cabe em
+        `max_tokens`. O melhor candidato entra sempre, mesmo sozinho acima
+        do orçamento. `distance` passa a ser o score negado.
+        """
+        if not hits:
+            return []
+
+        scores = self.score(query, [h.text for h in hits])
+        selected, used = [], 0
+
+        for i in np.argsort(-scores, kind="stable"):
+            if len(selected) >= top_k:
+                break
+            hit = hits[i]
+            tokens = count_tokens(hit.text)
+            if max_tokens is not None and selected and used + tokens > max_tokens:
+                continue
+            selected.append(SearchHit(hit.chunk_id, hit.text, -float(scores[i])))
+            used += tokens
+
+        return selected
+
+
+_default_reranker: Reranker | None = None
+
+
+def default_reranker() -> Reranker:
+    # Compartilhado no processo: o cache de scores vale entre perguntas
+    global _default_reranker
+    if _default_reranker is None:
+        _default_reranker = Reranker()
+    return _default_reranker
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import heapq
+import json
+import multiprocessing
+import os
+import threading
+from itertools import islice
+from typing import Iterable
+
+import numpy as np
+
+from src.rag_engine.index_factory import TRAINED_KINDS
+from src.rag_engine.ingest import iter_batches
+from src.rag_engine.rag_real import IVF_TRAIN_BATCH, SearchHit, VectorStore
+
+
+# ================================
+# 🔹 Construção dos shards
+# ================================
+# O chunk global i vai para o shard i % N com id local i // N, então
+# id global = id local * N + shard (sem tabela de mapeamento).
+
+def build_shards(
+    path: str,
+    chunks: Iterable[str],
+    num_shards: int,
+    embedder=None,
+    batch_size: int = 64,
+    **store_params,
+) -> int:
+    """
+    Distribui os chunks em `num_shards` VectorStores salvos em
+    `path/shard_<n>`. Retorna o total de chunks indexados.
+    """
+    store_params.setdefault("retrieval", "dense")
+    shards = [VectorStore(embedder, **store_params) for _ in range(num_shards)]
+    kind = shards[0].index_config["kind"]
+
+    chunks = iter(chunks)
+    total = 0
+
+    def add(batch: list[str]):
+        nonlocal total
+        # Lote alinhado a N: a posição dentro do lote define o shard
+        for shard, store in enumerate(shards):
+            store.add(batch[shard::num_shards])
+        total += len(batch)
+
+    # Índices treináveis precisam de um primeiro lote maior em cada shard
+    first = IVF_TRAIN_BATCH * num_shards if kind in TRAINED_KINDS else batch_size * num_shards
+    add(list(islice(chunks, first)))
+    for batch in iter_batches(chunks, batch_size * num_shards):
+        add(batch)
+
+    for shard, store in enumerate(shards):
+        store.save(os.path.join(path, f"shard_{shard}"))
+
+    meta = {"num_shards": num_shards, "total": total, **shards[0].index_config}
+    with open(os.path.join(path, "shards.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return total
+
+
+# ================================
+# 🔹 Processo de cada shard
+# ================================
+def _shard_main(path: str, conn, threads: int):
+    import faiss
+
+    # Um núcleo por shard: o paralelismo vem dos processos
+    faiss.omp_set_num_threads(threads)
+    store = VectorStore.load(path, mmap=True)
+    conn.send("ready")
+
+    while True:
+        message = conn.recv()
+        if message[0] == "close":
+            break
+
+        _, q_vecs, top_k = message
+        hits = store.search_vectors(q_vecs, top_k)
+        conn.send([[(h.chunk_id, h.distance, h.text) for h in row] for row in hits])
+
+    conn.close()
+
+
+# ================================
+# 🔹 Coordenador (scatter-gather)
+# ================================
+class ShardedStore:
+    """
+    Busca densa sobre N shards, cada um num processo próprio com o índice
+    mapeado do disco.
+
+    O coordenador vetoriza as consultas uma vez, envia o lote a todos os
+    shards, recebe o top-k local de cada um e junta com um merge k-way
+    (heap) pela distância. Só busca densa: o BM25 não é particionado.
+    """
+
+    def __init__(self, path: str, embedder=None, threads_per_shard: int = 1):
+        with open(os.path.join(path, "shards.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+        self.num_shards = self.meta["num_shards"]
+        self.metric = self.meta.get("metric", "l2")
+        # Só para vetorizar as consultas (mesmo embedder e normalização)
+        self.encoder = VectorStore(embedder, index_kind=self.meta.get("kind", "flat"), metric=self.metric)
+        self._lock = threading.Lock()
+
+        # spawn: o FAISS usa threads, e fork com threads ativas é arriscado
+        context = multiprocessing.get_context("spawn")
+        self.connections, self.processes = [], []
+        for shard in range(self.num_shards):
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=_shard_main,
+                args=(os.path.join(path, f"shard_{shard}"), child, threads_per_shard),
+                daemon=True,
+            )
+            process.start()
+            self.connections.append(parent)
+            self.processes.append(process)
+
+        for conn in self.connections:
+            conn.recv()
+
+    def search(self, query: str, top_k: int = 3) -> list[str]:
+        return [hit.text for hit in self.search_batch([query], top_k)[0]]
+
+    def search_batch(self, queries: list[str], top_k: int = 3) -> list[list[SearchHit]]:
+        if not queries:
+            return []
+        return self.search_vectors(self.encoder.encode(queries, queries=True), top_k)
+
+    def search_vectors(self, q_vecs: np.ndarray, top_k: int = 3) -> list[list[SearchHit]]:
+        q_vecs = np.ascontiguousarray(q_vecs, dtype=np.float32)
+
+        # Um lote em voo por vez: todas as conexões respondem na mesma ordem
+        with self._lock:
+            for conn in self.connections:
+                conn.send(("search", q_vecs, top_k))
+            per_shard = [conn.recv() for conn in self.connections]
+
+        # Com "ip" maior é melhor; o FAISS já devolve cada lista ordenada
+        descending = self.metric == "ip"
+        results = []
+        for qi in range(len(q_vecs)):
+            streams = [
+                [SearchHit(local * self.num_shards + shard, text, distance) for local, distance, text in rows[qi]]
+                for shard, rows in enumerate(per_shard)
+            ]
+            merged = heapq.merge(*streams, key=lambda hit: hit.distance, reverse=descending)
+            results.append(list(islice(merged, top_k)))
+        return results
+
+    def close(self):
+        for conn, process in zip(self.connections, self.processes):
+            try:
+                conn.send(("close",))
+            except (BrokenPipeError, OSError):
+                pass
+            process.join(timeout=5)
+            conn.close()
+        self.connections, self.processes = [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
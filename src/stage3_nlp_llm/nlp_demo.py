@@ -1,10 +1,10 @@
-﻿from transformers import pipeline
+﻿from src.model_registry import hf_pipeline
 
 def run_stage3_demo():
     print("\n[Stage 3] NLP & Transformers Demo")
 
-    summarizer = pipeline("summarization", model="facebook/bart-base")
-    sentiment = pipeline("text-classification")
+    summarizer = hf_pipeline("summarization", model="facebook/bart-base")
+    sentiment = hf_pipeline("text-classification")
 
     text = '''
     Machine learning engineers build scalable training systems,
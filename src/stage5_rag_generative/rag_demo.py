@@ -1,9 +1,8 @@
-﻿from transformers import pipeline
-from sentence_transformers import SentenceTransformer
-import faiss
-import numpy as np
+﻿import numpy as np
 
-from tools.web_search import web_search
+from src.model_registry import hf_pipeline
+from src.rag_engine.embedding_service import shared_encoder
+from src.tools.search import SearchError, default_client
 
 
 def run_stage5_demo():
@@ -12,7 +11,16 @@ def run_stage5_demo():
     question = "How should customer data be handled?"
 
     print(f"🔎 Buscando na internet: {question}\n")
-    web_results = web_search(question)
+    # Tavily + DuckDuckGo em paralelo, com cache e conexões reaproveitadas
+    try:
+        web_results = default_client().search(question)
+    except SearchError as e:
+        print(f"❌ {e}")
+        return
+
+    if not web_results:
+        print("❌ Nenhum resultado da web para essa pergunta.")
+        return
 
     web_docs = []
     for r in web_results:
@@ -22,7 +30,10 @@ def run_stage5_demo():
 
     print("\n📚 Criando base vetorial a partir da Web...\n")
 
-    embedder = SentenceTransformer("all-MiniLM-L6-v2")
+    import faiss
+
+    # Mesmo serviço de embeddings usado pelo rag_engine
+    embedder = shared_encoder("all-MiniLM-L6-v2")
     embeddings = embedder.encode(web_docs)
 
     index = faiss.IndexFlatL2(embeddings.shape[1])
@@ -36,7 +47,7 @@ def run_stage5_demo():
     print("\n🧠 CONTEXTO USADO PELO MODELO:\n")
     print(context)
 
-    generator = pipeline("text-generation", model="gpt2")
+    generator = hf_pipeline("text-generation", model="gpt2")
     prompt = f"Context: {context}\nQuestion: {question}\nAnswer:"
 
     result = generator(prompt, max_new_tokens=120)[0]["generated_text"]
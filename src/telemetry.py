@@ -0,0 +1,235 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from typing import Any, Dict, List, Optional
+
+
+# =========================================================
+#   SPANS
+# =========================================================
+
+# Limites (segundos) dos buckets do histograma de latência
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Spans guardados para summary/export; processos longos (servidor) nunca
+# chamam new_run, então os mais antigos são descartados
+MAX_SPANS = int(os.getenv("AIML_TELEMETRY_MAX_SPANS", "10000"))
+
+
+class Span:
+    """
+    Uma chamada medida: LLM, embedding ou busca FAISS.
+
+    Uso: `with tracer.span("llm", stage="worker", model=model) as s:`
+    e, ao final, `s.record_usage(response)` para tokens e cache hit.
+    """
+
+    def __init__(self, tracer: "Tracer", kind: str, stage: Optional[str], model: Optional[str], attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.kind = kind
+        self.stage = stage
+        self.model = model
+        self.attrs = attrs
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cache_hit = False
+        self.error = None
+        self.start = 0.0
+        self.latency = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.latency = time.perf_counter() - self.start
+        if exc is not None:
+            self.error = type(exc).__name__
+        self.tracer._finish(self)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def record_usage(self, response):
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+            self.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+        self.cache_hit = self.cache_hit or bool(getattr(response, "cached", False))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "run_id": self.tracer.run_id,
+            "kind": self.kind,
+            "stage": self.stage,
+            "model": self.model,
+            "latency_ms": round(self.latency * 1000, 3),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cache_hit": self.cache_hit,
+            "error": self.error,
+            **self.attrs,
+        }
+
+
+class _NoopSpan:
+    # Usado quando a telemetria está desligada: nenhuma medição, nenhuma alocação
+    start = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+    def record_usage(self, response):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+# =========================================================
+#   TRACER
+# =========================================================
+
+class Tracer:
+    """
+    Guarda os últimos `max_spans` spans (summary/export_jsonl) e mantém
+    os contadores do Prometheus acumulados à parte, para que continuem
+    crescendo mesmo quando spans antigos saem da janela.
+    """
+
+    def __init__(self, enabled: bool = False, max_spans: int = MAX_SPANS):
+        self.enabled = enabled
+        self.run_id = uuid.uuid4().hex[:12]
+        self.spans: deque = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+        # Contadores do processo inteiro, por conjunto de labels
+        self._calls = defaultdict(int)
+        self._tokens = defaultdict(int)
+        self._hits = defaultdict(int)
+        self._buckets = defaultdict(lambda: [0] * len(LATENCY_BUCKETS))
+        self._sums = defaultdict(float)
+
+    def span(self, kind: str, stage: Optional[str] = None, model: Optional[str] = None, **attrs):
+        if not self.enabled:
+            return _NOOP
+        return Span(self, kind, stage, model, attrs)
+
+    def _finish(self, span: Span):
+        labels = _labels(kind=span.kind, stage=span.stage, model=span.model)
+        with self._lock:
+            self.spans.append(span)
+            self._calls[labels] += 1
+            self._hits[labels] += span.cache_hit
+            self._tokens[_labels(kind=span.kind, stage=span.stage, model=span.model, type="prompt")] += span.prompt_tokens
+            self._tokens[_labels(kind=span.kind, stage=span.stage, model=span.model, type="completion")] += span.completion_tokens
+            self._sums[labels] += span.latency
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if span.latency <= bound:
+                    self._buckets[labels][i] += 1
+
+    def new_run(self) -> str:
+        """Começa uma nova execução: descarta os spans anteriores (os contadores seguem)."""
+        with self._lock:
+            self.run_id = uuid.uuid4().hex[:12]
+            self.spans.clear()
+        return self.run_id
+
+    # ---------- agregação ----------
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = list(self.spans)
+
+        groups: Dict[tuple, List[Span]] = defaultdict(list)
+        for s in spans:
+            groups[(s.kind, s.stage, s.model)].append(s)
+
+        rows = []
+        for (kind, stage, model), items in sorted(groups.items(), key=lambda g: tuple(str(x) for x in g[0])):
+            latencies = sorted(s.latency for s in items)
+            rows.append({
+                "kind": kind,
+                "stage": stage,
+                "model": model,
+                "calls": len(items),
+                "total_ms": round(sum(latencies) * 1000, 1),
+                "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+                "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+                "prompt_tokens": sum(s.prompt_tokens for s in items),
+                "completion_tokens": sum(s.completion_tokens for s in items),
+                "cache_hits": sum(s.cache_hit for s in items),
+                "errors": sum(s.error is not None for s in items),
+            })
+
+        return {
+            "run_id": self.run_id,
+            "spans": len(spans),
+            "prompt_tokens": sum(s.prompt_tokens for s in spans),
+            "completion_tokens": sum(s.completion_tokens for s in spans),
+            "groups": rows,
+        }
+
+    # ---------- exportação ----------
+
+    def export_jsonl(self, path: str):
+        with self._lock:
+            spans = list(self.spans)
+        with open(path, "a", encoding="utf-8") as f:
+            for s in spans:
+                f.write(json.dumps(s.to_dict(), ensure_ascii=False) + "\n")
+
+    def prometheus(self) -> str:
+        """Contadores e histograma (acumulados no processo) no formato texto do Prometheus."""
+        with self._lock:
+            calls, tokens, hits, sums = dict(self._calls), dict(self._tokens), dict(self._hits), dict(self._sums)
+            buckets = {labels: list(counts) for labels, counts in self._buckets.items()}
+
+        lines = [
+            "# TYPE aiml_calls_total counter",
+            *(f"aiml_calls_total{{{l}}} {v}" for l, v in sorted(calls.items())),
+            "# TYPE aiml_cache_hits_total counter",
+            *(f"aiml_cache_hits_total{{{l}}} {v}" for l, v in sorted(hits.items())),
+            "# TYPE aiml_tokens_total counter",
+            *(f"aiml_tokens_total{{{l}}} {v}" for l, v in sorted(tokens.items())),
+            "# TYPE aiml_latency_seconds histogram",
+        ]
+        for l in sorted(calls):
+            for bound, count in zip(LATENCY_BUCKETS, buckets[l]):
+                lines.append(f'aiml_latency_seconds_bucket{{{l},le="{bound}"}} {count}')
+            lines.append(f'aiml_latency_seconds_bucket{{{l},le="+Inf"}} {calls[l]}')
+            lines.append(f"aiml_latency_seconds_sum{{{l}}} {sums[l]:.6f}")
+            lines.append(f"aiml_latency_seconds_count{{{l}}} {calls[l]}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{k}="{v if v is not None else ""}"' for k, v in labels.items())
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    k = min(len(values) - 1, max(0, round(pct / 100 * (len(values) - 1))))
+    return values[k]
+
+
+# =========================================================
+#   TRACER GLOBAL (desligado por padrão)
+# =========================================================
+
+tracer = Tracer(enabled=os.getenv("AIML_TELEMETRY", "0") == "1")
+
+
+def span(kind: str, stage: Optional[str] = None, model: Optional[str] = None, **attrs):
+    return tracer.span(kind, stage, model, **attrs)
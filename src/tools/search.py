@@ -0,0 +1,239 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# =========================================================
+#   SESSÃO HTTP COMPARTILHADA (keep-alive)
+# =========================================================
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session(pool_size: int = 16) -> requests.Session:
+    """Uma sessão por processo: conexões TCP/TLS reaproveitadas entre buscas."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = "Mozilla/5.0"
+            _session = session
+    return _session
+
+
+class SearchError(RuntimeError):
+    """Todos os provedores disponíveis falharam (ou nenhum está configurado)."""
+
+    def __init__(self, query: str, errors: Dict[str, str]):
+        self.query = query
+        self.errors = errors
+        detail = "; ".join(f"{name}: {error}" for name, error in errors.items())
+        super().__init__(f"Busca falhou para {query!r} ({detail or 'nenhum provedor disponível'})")
+
+
+def _result(title: str, url: str, snippet: str, provider: str) -> Dict[str, str]:
+    return {"title": title or "", "url": url or "", "snippet": snippet or "", "provider": provider}
+
+
+# =========================================================
+#   PROVEDORES
+# =========================================================
+
+class TavilyProvider:
+    name = "tavily"
+
+    def __init__(self, api_key: Optional[str] = None, base_url: str = "https://api.tavily.com", timeout: float = 10.0):
+        self.api_key = api_key or os.getenv("TAVILY_API_KEY")
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    @property
+    def available(self) -> bool:
+        return bool(self.api_key)
+
+    def search(self, session: requests.Session, query: str, max_results: int) -> List[Dict[str, str]]:
+        payload = {
+            "api_key": self.api_key,
+            "query": query,
+            "max_results": max_results,
+            "include_answer": False,
+        }
+        response = session.post(f"{self.base_url}/search", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+
+        return [
+            _result(item.get("title"), item.get("url"), item.get("content"), self.name)
+            for item in response.json().get("results", [])
+            if item.get("content")
+        ][:max_results]
+
+
+class DuckDuckGoProvider:
+    name = "duckduckgo"
+    available = True
+
+    def __init__(self, base_url: str = "https://html.duckduckgo.com", timeout: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def search(self, session: requests.Session, query: str, max_results: int) -> List[Dict[str, str]]:
+        from bs4 import BeautifulSoup
+
+        response = session.get(f"{self.base_url}/html/", params={"q": query}, timeout=self.timeout)
+        response.raise_for_status()
+        soup = BeautifulSoup(response.text, "lxml")
+
+        results = []
+        for item in soup.select(".result"):
+            link = item.select_one(".result__a")
+            snippet = item.select_one(".result__snippet")
+            if not snippet or not snippet.get_text(strip=True):
+                continue
+            results.append(_result(
+                link.get_text(strip=True) if link else "",
+                link.get("href") if link else "",
+                snippet.get_text(strip=True),
+                self.name,
+            ))
+            if len(results) >= max_results:
+                break
+        return results
+
+
+# =========================================================
+#   CACHE COM TTL
+# =========================================================
+
+class TTLCache:
+    def __init__(self, ttl: float = 600.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+# =========================================================
+#   CLIENTE DE BUSCA (ASYNC + FAN-OUT)
+# =========================================================
+
+class SearchClient:
+    """
+    Busca em vários provedores e várias consultas em paralelo.
+
+    Cada provedor tem seu próprio timeout; um provedor lento ou com erro
+    não bloqueia os outros (contribui com zero resultados). Se todos os
+    provedores falharem, a busca levanta SearchError com o erro de cada
+    um. Resultados repetidos (mesma URL) são removidos.
+
+    Os provedores usam `requests` (bloqueante): o async aqui é
+    `asyncio.to_thread` por chamada, e um provedor que estoura o timeout
+    continua ocupando sua thread até o timeout HTTP dele.
+    """
+
+    def __init__(self, providers=None, ttl: float = 600.0, session: Optional[requests.Session] = None):
+        self.providers = providers if providers is not None else [TavilyProvider(), DuckDuckGoProvider()]
+        self.cache = TTLCache(ttl)
+        self.session = session or get_session()
+
+    async def _call(self, provider, query: str, max_results: int) -> Tuple[List[Dict[str, str]], Optional[str]]:
+        # Retorna (resultados, erro); o erro fica com a chamada, não com o cliente
+        key = (provider.name, query, max_results)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached, None
+
+        try:
+            results = await asyncio.wait_for(
+                asyncio.to_thread(provider.search, self.session, query, max_results),
+                timeout=provider.timeout,
+            )
+        except Exception as e:
+            return [], f"{type(e).__name__}: {e}"
+
+        self.cache.set(key, results)
+        return results, None
+
+    async def asearch(self, query: str, max_results: int = 5) -> List[Dict[str, str]]:
+        providers = [p for p in self.providers if p.available]
+        outcomes = await asyncio.gather(*(self._call(p, query, max_results) for p in providers))
+
+        errors = {p.name: error for p, (_, error) in zip(providers, outcomes) if error}
+        if len(errors) == len(providers):
+            raise SearchError(query, errors)
+        return _merge([results for results, _ in outcomes], max_results)
+
+    async def asearch_many(self, queries: List[str], max_results: int = 5) -> List[List[Dict[str, str]]]:
+        return list(await asyncio.gather(*(self.asearch(q, max_results) for q in queries)))
+
+    def search(self, query: str, max_results: int = 5) -> List[Dict[str, str]]:
+        return _run(self.asearch(query, max_results))
+
+    def search_many(self, queries: List[str], max_results: int = 5) -> List[List[Dict[str, str]]]:
+        return _run(self.asearch_many(queries, max_results))
+
+
+def _merge(per_provider: List[List[Dict[str, str]]], max_results: int) -> List[Dict[str, str]]:
+    # Intercala os provedores (1º de cada, depois 2º...) e remove URLs repetidas
+    merged, seen = [], set()
+    for rank in range(max((len(r) for r in per_provider), default=0)):
+        for results in per_provider:
+            if rank < len(results):
+                item = results[rank]
+                key = item["url"] or item["snippet"]
+                if key not in seen:
+                    seen.add(key)
+                    merged.append(item)
+    return merged[:max_results]
+
+
+def _run(coro):
+    # API síncrona para quem não está num event loop (terminal, demos)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    coro.close()
+    raise RuntimeError("Dentro de um event loop use asearch/asearch_many.")
+
+
+# =========================================================
+#   CLIENTE PADRÃO
+# =========================================================
+
+_default_client: Optional[SearchClient] = None
+
+
+def default_client() -> SearchClient:
+    global _default_client
+    if _default_client is None:
+        _default_client = SearchClient()
+    return _default_client
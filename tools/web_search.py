@@ -1,32 +1,16 @@
-import requests
-from bs4 import BeautifulSoup
+from src.tools.search import DuckDuckGoProvider, SearchClient
 
+_client = None
 
-def web_search(query: str, max_results: int = 5) -> list[str]:
+
+def web_search(query: str, max_results: int = 5) -> list[dict]:
     """
-    Busca no DuckDuckGo e retorna trechos de texto reais da internet.
+    Busca no DuckDuckGo e retorna resultados reais da internet:
+    [{"title", "url", "snippet", "provider"}, ...]. Levanta SearchError
+    se a busca falhar.
     """
-    url = "https://duckduckgo.com/html/"
-    params = {"q": query}
-
-    headers = {
-        "User-Agent": "Mozilla/5.0"
-    }
-
-    response = requests.get(url, params=params, headers=headers, timeout=10)
-    soup = BeautifulSoup(response.text, "lxml")
-
-    results = []
-
-    for result in soup.select(".result__snippet"):
-        text = result.get_text(strip=True)
-        if text:
-            results.append(text)
-
-        if len(results) >= max_results:
-            break
-
-    if not results:
-        results.append("Nenhuma informação relevante encontrada na web.")
+    global _client
+    if _client is None:
+        _client = SearchClient([DuckDuckGoProvider()])
 
-    return results
+    return _client.search(query, max_results)